@@ -0,0 +1,89 @@
+# audio_cache.py
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def audio_cache_key(text, voice=None, engine=None, rate=None):
+    """Content address for a rendered phrase: same text + voice settings -> same audio"""
+    raw = json.dumps([engine, voice, rate, " ".join((text or "").split())])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Rendered speech keyed by content hash: in-memory LRU bounded by bytes, optional disk tier"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()  # key -> audio bytes
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.wav")
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._entries:
+                return True
+        return bool(self.disk_dir) and os.path.exists(self._disk_path(key))
+
+    def get(self, key):
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return audio
+
+        audio = None
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    audio = f.read()
+            except OSError:
+                audio = None
+
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, audio)
+        return audio
+
+    def put(self, key, audio):
+        if not audio:
+            return
+        with self._lock:
+            self._store(key, audio)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(audio)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"[Audio Cache] Disk write failed: {e}")
+
+    def _store(self, key, audio):
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key))
+        self._entries[key] = audio
+        self._size += len(audio)
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
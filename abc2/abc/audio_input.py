@@ -0,0 +1,271 @@
+# audio_input.py
+
+import collections
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import speech_recognition as sr
+
+# Background re-recognition of partial audio for backends without native streaming
+_partial_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="partial-stt")
+
+
+class MicrophoneStream:
+    """One microphone stream for a whole session.
+
+    The device is opened once and calibrated once; a background thread
+    recalibrates periodically between turns. Calibration writes the energy
+    threshold onto the shared Recognizer, which listen() then uses.
+    """
+
+    def __init__(self, recognizer, device_index=None, calibration_seconds=1.0,
+                 recalibration_interval=60, recalibration_seconds=0.5, can_calibrate=None):
+        self.recognizer = recognizer
+        self.device_index = device_index
+        self.calibration_seconds = calibration_seconds
+        self.recalibration_interval = recalibration_interval
+        self.recalibration_seconds = recalibration_seconds
+        self.can_calibrate = can_calibrate or (lambda: True)
+        self.source = None
+        self._microphone = None
+        self._lock = threading.Lock()  # Only one reader of the stream at a time
+        self._closed = threading.Event()
+        self._recalibration_thread = None
+        self.calibrations = 0
+
+    def open(self):
+        with self._lock:
+            self._open_locked()
+
+    def _open_locked(self):
+        if self.source is not None:
+            return
+        self._microphone = sr.Microphone(device_index=self.device_index)
+        self.source = self._microphone.__enter__()
+        self._closed.clear()
+        self._calibrate_locked(self.calibration_seconds)
+        print(f"[Microphone] Opened and calibrated (energy threshold {self.recognizer.energy_threshold:.0f})")
+        if self.recalibration_interval:
+            self._recalibration_thread = threading.Thread(target=self._recalibrate_loop, daemon=True)
+            self._recalibration_thread.start()
+
+    def _calibrate_locked(self, duration):
+        self.recognizer.adjust_for_ambient_noise(self.source, duration=duration)
+        self.calibrations += 1
+
+    def calibrate(self, duration=None):
+        with self._lock:
+            self._open_locked()
+            self._calibrate_locked(duration or self.calibration_seconds)
+
+    def _recalibrate_loop(self):
+        while not self._closed.wait(self.recalibration_interval):
+            if not self.can_calibrate():
+                continue
+            # Skip this round rather than wait if a turn is being captured
+            if not self._lock.acquire(blocking=False):
+                continue
+            try:
+                if self.source is not None:
+                    self._calibrate_locked(self.recalibration_seconds)
+            except Exception as e:
+                print(f"[Microphone] Recalibration failed: {e}")
+            finally:
+                self._lock.release()
+
+    def listen(self, timeout=None, phrase_time_limit=None):
+        with self._lock:
+            self._open_locked()
+            return self.recognizer.listen(self.source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+
+    @contextlib.contextmanager
+    def reading(self):
+        """Hold the stream for frame-by-frame reads (blocks recalibration meanwhile)"""
+        with self._lock:
+            self._open_locked()
+            yield self.source
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            if self._microphone is not None:
+                try:
+                    self._microphone.__exit__(None, None, None)
+                except Exception as e:
+                    print(f"[Microphone] Error closing stream: {e}")
+            self._microphone = None
+            self.source = None
+
+
+class EnergyVAD:
+    """Frame-level voice activity from RMS energy against the recognizer's calibrated threshold"""
+
+    name = "energy"
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+
+    def is_speech(self, frame, sample_rate):
+        samples = np.frombuffer(frame, dtype=np.int16)
+        if samples.size == 0:
+            return False
+        rms = float(np.sqrt(np.mean(samples.astype(np.float32) ** 2)))
+        return rms > self.recognizer.energy_threshold
+
+
+class WebRtcVAD:
+    """webrtcvad classifier; needs 8/16/32/48 kHz audio in 10, 20 or 30 ms slices"""
+
+    name = "webrtc"
+    SAMPLE_RATES = (8000, 16000, 32000, 48000)
+
+    def __init__(self, aggressiveness=2):
+        import webrtcvad
+        self._vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, frame, sample_rate):
+        slice_bytes = int(sample_rate * 0.03) * 2
+        slices = [frame[i:i + slice_bytes] for i in range(0, len(frame) - slice_bytes + 1, slice_bytes)]
+        if not slices:
+            return False
+        voiced = sum(1 for piece in slices if self._vad.is_speech(piece, sample_rate))
+        return voiced * 2 >= len(slices)
+
+
+def create_vad(recognizer, sample_rate, name="auto"):
+    if name in ("auto", "webrtc") and sample_rate in WebRtcVAD.SAMPLE_RATES:
+        try:
+            return WebRtcVAD()
+        except ImportError:
+            if name == "webrtc":
+                print("[VAD] webrtcvad not installed; using energy VAD")
+    return EnergyVAD(recognizer)
+
+
+class StreamingCapture:
+    """Capture one answer frame by frame with VAD, emitting partial transcripts as it goes.
+
+    The turn ends after end_silence seconds of trailing silence, or after only
+    min_end_silence if the partial transcript has stopped changing.
+    """
+
+    def __init__(self, microphone, recognizer_backend, on_partial=None, vad="auto",
+                 end_silence=0.8, min_end_silence=0.35, partial_interval=1.0, pre_roll=0.3):
+        self.microphone = microphone
+        self.backend = recognizer_backend
+        self.on_partial = on_partial
+        self.vad_name = vad
+        self.end_silence = end_silence
+        self.min_end_silence = min_end_silence
+        self.partial_interval = partial_interval
+        self.pre_roll = pre_roll
+
+    def capture(self, timeout=10, phrase_time_limit=30):
+        """Return the answer as sr.AudioData; raises sr.WaitTimeoutError if nobody starts speaking"""
+        with self.microphone.reading() as source:
+            sample_rate, sample_width = source.SAMPLE_RATE, source.SAMPLE_WIDTH
+            frame_seconds = source.CHUNK / sample_rate
+            vad = create_vad(self.microphone.recognizer, sample_rate, self.vad_name)
+            turn = _Turn(self, sample_rate, sample_width)
+
+            pre_roll = collections.deque(maxlen=max(1, int(self.pre_roll / frame_seconds)))
+            waited = 0.0
+            while True:
+                frame = source.stream.read(source.CHUNK)
+                if vad.is_speech(frame, sample_rate):
+                    break
+                pre_roll.append(frame)
+                waited += frame_seconds
+                if timeout and waited > timeout:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+
+            for buffered in pre_roll:
+                turn.add(buffered)
+            turn.add(frame)
+
+            silence = 0.0
+            while turn.duration < (phrase_time_limit or float("inf")):
+                frame = source.stream.read(source.CHUNK)
+                turn.add(frame)
+                silence = 0.0 if vad.is_speech(frame, sample_rate) else silence + frame_seconds
+                if silence >= self.end_silence:
+                    break
+                if silence >= self.min_end_silence and turn.partial_is_stable():
+                    break
+
+        turn.finish()
+        return sr.AudioData(turn.audio_bytes(), sample_rate, sample_width)
+
+
+class _Turn:
+    """Audio and partial-transcript state for one StreamingCapture.capture() call"""
+
+    def __init__(self, capture, sample_rate, sample_width):
+        self.capture = capture
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.frames = []
+        self.byte_count = 0
+        self.partial = ""
+        self.previous_partial = None
+        self.last_partial_at = time.time()
+        self._pending = None
+        self._stream = None
+        self._finished = False
+        self._publish_lock = threading.Lock()
+        if getattr(capture.backend, "supports_streaming", False):
+            self._stream = capture.backend.start_stream(sample_rate, sample_width)
+
+    @property
+    def duration(self):
+        return self.byte_count / (self.sample_rate * self.sample_width)
+
+    def add(self, frame):
+        self.frames.append(frame)
+        self.byte_count += len(frame)
+        if self._stream is not None:
+            self._publish(self._stream.accept(frame))
+        elif self.capture.partial_interval and time.time() - self.last_partial_at >= self.capture.partial_interval:
+            self._request_partial()
+
+    def _request_partial(self):
+        if self._pending is not None and not self._pending.done():
+            return  # One chunked recognition in flight at a time
+        self.last_partial_at = time.time()
+        snapshot = sr.AudioData(self.audio_bytes(), self.sample_rate, self.sample_width)
+        self._pending = _partial_executor.submit(self.capture.backend.transcribe, snapshot)
+        self._pending.add_done_callback(self._partial_done)
+
+    def _partial_done(self, future):
+        try:
+            self._publish(future.result().text)
+        except Exception:
+            pass  # Partial audio is often unintelligible; the final transcript decides
+
+    def _publish(self, text):
+        with self._publish_lock:
+            if self._finished:
+                return  # A late re-recognition must not overwrite the cleared partial after the final transcript
+            if not text or text == self.partial:
+                if text:
+                    self.previous_partial = text
+                return
+            self.previous_partial, self.partial = self.partial, text
+            if self.capture.on_partial:
+                self.capture.on_partial(text)
+
+    def partial_is_stable(self):
+        return bool(self.partial) and self.partial == self.previous_partial
+
+    def finish(self):
+        # Waits out a partial being published right now; any later one is dropped
+        with self._publish_lock:
+            self._finished = True
+        if self._pending is not None:
+            self._pending.cancel()
+
+    def audio_bytes(self):
+        return b"".join(self.frames)
@@ -1,38 +1,112 @@
+import asyncio
 import json
 import os
 import re
 import random
 import time
-from openai import OpenAI
+import uuid
 from dotenv import load_dotenv
-import cv2
 from docx import Document
-import pygetwindow as gw
 import threading
-import subprocess
 from datetime import datetime
 import speech_recognition as sr
-import numpy as np
 
-from shared_state import save_to_conversation_history
+from shared_state import save_to_conversation_history, publish_ai_state, publish_status, interview_state as default_interview_state, ai_state as default_ai_state
+from llm_cache import get_shared_cache, make_cache_key
+from llm_client import get_llm_client, iter_sentences, aiter_sentences
+from prefetch import QuestionPrefetcher
+from tts import create_speech_worker
+from audio_input import MicrophoneStream, StreamingCapture
+from recognizers import create_recognizer_backend
+from vision_models import get_vision_registry
+from face_pipeline import FacePipeline
+from proctoring import get_proctoring_service, AdaptiveSampler
+from focus_events import create_focus_source
+from interview_engine import get_interview_engine
+from code_executor import get_execution_service
+from judge import split_test_cases, parse_test_cases, run_test_cases
 
 # Load environment variables
 load_dotenv()
 
 class ExpertTechnicalInterviewer:
-    def __init__(self, config_file="interview_config.json", model="gpt-4o-mini-2024-07-18", accent="indian"):
+    CHEATING_RESPONSES = {
+        "tab_change": "Please stay focused on the interview window and avoid switching to other applications.",
+        "face_absence": "Please ensure your face is clearly visible in the camera.",
+        "gaze_absence": "Please maintain focus on the screen and avoid looking away."
+    }
+
+    TONE_RESPONSES = {
+        "arrogant": [
+            "I appreciate your confidence! Let's channel that into demonstrating your technical knowledge.",
+            "Great confidence! Now let's see how you apply that expertise to solve problems.",
+        ],
+        "rude": [
+            "I understand technical interviews can be stressful. Let's take a moment and continue professionally.",
+            "No worries, let's refocus on showcasing your technical abilities.",
+        ]
+    }
+
+    # Constant lines spoken during every interview; pre-rendered into the audio cache at boot
+    FIXED_PHRASES = [
+        "Could you please elaborate on that?",
+        "Let's continue with the next part.",
+        "There was an issue. Please try again.",
+        "Does that answer your question, or would you like me to elaborate?",
+        "Do you have any other questions?",
+        "What would you like to ask?",
+        "This could be about:",
+        "1. The coding problems we discussed",
+        "2. Any of the technical concepts we covered",
+        "3. Best practices in the field",
+        "4. Or anything else technical you'd like to discuss",
+        "1. The professional scenarios we discussed",
+        "2. Any of the domain concepts we covered",
+        "3. Industry best practices",
+        "4. Or anything else you'd like to discuss",
+        "Would you like a small hint to help you get started?",
+        "Now let's discuss your solution.",
+        "Multiple concerning behaviors detected. The interview will now conclude.",
+        "I appreciate your participation, but let's maintain a professional tone throughout our conversation.",
+    ]
+
+    @property
+    def interview_active(self):
+        return not self._ended.is_set()
+
+    @interview_active.setter
+    def interview_active(self, active):
+        if active:
+            self._ended.clear()
+            return
+        self._ended.set()
+        self._wake_submission_waiters()
+
+    def __init__(self, config_file="interview_config.json", model="gpt-4o-mini-2024-07-18", accent="indian", session_state=None, ai_state=None, focus_source=None):
+            # Stages block on these instead of polling; ending the interview wakes all of them
+            self._ended = threading.Event()
+            self._submission_lock = threading.Lock()
+            self._submission_seq = 0
+            self._submission_waiters = []  # (loop, asyncio.Future) of coding stages awaiting a submission
+            self._coding_stage_active = False  # A coding question is being posed, solved or discussed
+
+            # Per-session state (history, warnings); falls back to the process-wide dict
+            self.session_state = session_state if session_state is not None else default_interview_state
+            self.ai_state = ai_state if ai_state is not None else default_ai_state
+
             # Load interview configuration from JSON file
             with open(config_file) as f:
                 self.config = json.load(f)
             
-            # Initialize OpenAI client
-            self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            # Initialize OpenAI client (pooled AsyncOpenAI shared by every session in the process)
             if not os.getenv("OPENAI_API_KEY"):
                 raise ValueError("Please set the OPENAI_API_KEY in .env file")
+            self.llm = get_llm_client(self.config.get("llm_client"))
+            # Prompt-response cache shared by all interviewers in this process
+            self.response_cache = get_shared_cache(self.config.get("llm_cache"))
             self.monitoring_active = True
             self.interview_active = True
             self.camera_active = False
-            self.tab_monitor_ready = False
             self.max_cheating_warnings = 3
             self.cheating_warnings = 0
             self.tone_warnings = 0
@@ -57,13 +131,7 @@ class ExpertTechnicalInterviewer:
             self.face_detection_interval = 5  # seconds between checks
             self.max_face_absence_time = 5  # seconds before warning
             
-            
-            
-            
-            # Start face monitoring thread
-            self.face_monitor_thread = threading.Thread(target=self._monitor_face_presence)
-            self.face_monitor_thread.daemon = True
-            self.face_monitor_thread.start()
+            # Frames arrive through submit_frame (/api/frame); the shared ProctoringService analyses them
             self.eye_landmark_detector = None
             
             self.conversation_history = []
@@ -75,6 +143,13 @@ class ExpertTechnicalInterviewer:
             self.accent = str(accent).lower() if accent else "default"
             self.coding_questions_asked = 0
             self.max_coding_questions = 2
+
+            # Next questions are generated while the candidate is still answering
+            self.prefetcher = QuestionPrefetcher()
+
+            # Each interviewer drives its own TTS engine on a worker thread; rendered audio is shared
+            self.speech = create_speech_worker(self.config.get("tts"))
+            self.speech.prerender(self._fixed_phrases())
             
 
             
@@ -82,6 +157,31 @@ class ExpertTechnicalInterviewer:
             self.recognizer = sr.Recognizer()
             self.recognizer.pause_threshold = 0.8
             self.recognizer.energy_threshold = 4000
+            # Speech-to-text engine (google, vosk or whisper) chosen in interview_config.json
+            self.speech_recognizer = create_recognizer_backend(self.recognizer, self.config.get("speech_recognition"))
+
+            # Microphone is opened and calibrated once per session (lazily, on the first listen)
+            mic_settings = self.config.get("microphone", {})
+            self.microphone = MicrophoneStream(
+                self.recognizer,
+                device_index=mic_settings.get("device_index"),
+                calibration_seconds=mic_settings.get("calibration_seconds", 1.0),
+                recalibration_interval=mic_settings.get("recalibration_interval", 60),
+                can_calibrate=lambda: self.interview_active and not self.speech.is_speaking(owner=self)
+            )
+            # Frame-level VAD capture: ends the turn on trailing silence and publishes partial transcripts
+            self.streaming_capture = None
+            if mic_settings.get("streaming", False):
+                self.streaming_capture = StreamingCapture(
+                    self.microphone,
+                    self.speech_recognizer,
+                    on_partial=self._publish_partial,
+                    vad=mic_settings.get("vad", "auto"),
+                    end_silence=mic_settings.get("end_silence", 0.8),
+                    min_end_silence=mic_settings.get("min_end_silence", 0.35),
+                    partial_interval=mic_settings.get("partial_interval", 1.0)
+                )
+            self.partial_transcript_listeners = []  # Called with each partial transcript (e.g. websocket push)
             
             # Time management from config
             self.total_duration = max(min(self.config.get("duration_minutes", 80), 90), 70)  # Keep between 70-90 minutes
@@ -101,14 +201,40 @@ class ExpertTechnicalInterviewer:
             # Interviewer role from config
             self.interviewer_role = self.config.get("interviewer_role", "technical interviewer")
             
-            # Initialize face detection
-            self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+            # Face detection: cascades are loaded once per process and shared through thread-safe handles
+            self.vision_models = get_vision_registry(self.config.get("vision"))
+            self.face_cascade = self.vision_models.detector("face")
+            self.eye_cascade = self.vision_models.detector("eye")
+            vision_settings = self.config.get("vision", {})
+            self.face_pipeline = FacePipeline(
+                self.face_cascade,
+                self.eye_cascade,
+                detect_width=vision_settings.get("detect_width", 320),
+                full_detect_every=vision_settings.get("full_detect_every", 5)
+            )
+            # Detection runs in a shared process pool unless proctoring is disabled in config
+            proctoring_settings = self.config.get("proctoring", {})
+            self.proctoring = None
+            self.proctoring_id = uuid.uuid4().hex
+            if proctoring_settings.get("enabled", True):
+                self.proctoring = get_proctoring_service(proctoring_settings, vision_settings)
+            # Candidate code runs on a process-wide pool of warm, sandboxed workers
+            self.executor = get_execution_service(self.config.get("code_execution"))
+            # Sample slowly while nothing changes, quickly after a change or near a violation deadline
+            self.frame_sampler = AdaptiveSampler(
+                min_interval=proctoring_settings.get("min_interval", 0.5),
+                max_interval=proctoring_settings.get("max_interval", self.face_detection_interval),
+                backoff=proctoring_settings.get("backoff", 1.5)
+            )
             
             # Initialize camera
             self.cap = None
             self.camera_active = False
             self.current_coding_question = None
+            # Hidden input/expected-output cases for the current coding question
+            self.coding_tests = self.config.get("coding_tests", {})
+            self.current_test_cases = []
+            self.latest_test_report = None
             
             self.tech_domains = {
                 "frontend": ["React", "Angular", "Vue", "JavaScript", "TypeScript", "CSS", "HTML5"],
@@ -132,13 +258,21 @@ class ExpertTechnicalInterviewer:
                               "Healthcare Analytics", "Telemedicine", "HIPAA Compliance"]
             }
                 
-            # Start monitoring threads
             self.last_question = None
-            self.tab_monitor_thread = threading.Thread(target=self._monitor_tab_changes)
-            self.tab_monitor_thread.daemon = True
-            self.tab_monitor_thread.start()
+            # Window focus: pushed by the browser on the server, polled locally in desktop mode
+            self.focus_source = create_focus_source(self.config.get("focus_monitor"), name=focus_source)
             
 
+    def _fixed_phrases(self):
+        """Every constant line this interviewer can speak, including formatted reminders"""
+        phrases = list(self.FIXED_PHRASES)
+        for responses in self.TONE_RESPONSES.values():
+            phrases.extend(responses)
+        for notice in range(1, self.max_cheating_warnings):
+            for response in self.CHEATING_RESPONSES.values():
+                phrases.append(self._cheating_reminder(response, notice))
+        return phrases
+
     def _prepare_client_questions(self):
         """Prepare client questions from config"""
         questions = []
@@ -155,87 +289,38 @@ class ExpertTechnicalInterviewer:
             questions.extend(self.config["hard_questions"])
             
         return questions
-    def _check_gaze_direction(self, frame):
+    def _check_gaze_direction(self, frame, observation=None):
         """Simplified gaze detection using only OpenCV"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # First detect face
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
-        if len(faces) == 0:
+        if observation is None:
+            observation = self.face_pipeline.analyze(frame)
+        if observation.face is None:
             return False
-            
-        # Use first face found
-        (x, y, w, h) = faces[0]
-        
-        # Get region of interest for eyes (upper half of face)
-        roi_gray = gray[y:y+h//2, x:x+w]
-        roi_color = frame[y:y+h//2, x:x+w]
-        
-        # Detect eyes
-        eyes = self.eye_cascade.detectMultiScale(roi_gray, 1.1, 4)
-        
-        if len(eyes) < 2:  # Need at least 2 eyes detected
+
+        gaze_away = observation.gaze_away()
+        if gaze_away is None:  # Need at least 2 eyes detected
             self.eye_detection_attempts += 1
             if self.eye_detection_attempts >= self.max_eye_detection_attempts:
                 # Fallback - if we can't detect eyes but face is present, assume looking at screen
                 return False
             return None  # Undetermined
-        
+
         self.eye_detection_attempts = 0  # Reset counter
-        
-        # Simple gaze estimation based on eye positions
-        eyes = sorted(eyes, key=lambda e: e[0])  # Sort by x position
-        
-        # Calculate center points of eyes
-        eye_centers = []
-        for (ex, ey, ew, eh) in eyes[:2]:  # Take first two eyes
-            eye_centers.append((x + ex + ew//2, y + ey + eh//2))
-        
-        if len(eye_centers) < 2:
-            return None
-        
-        # Calculate angle between eyes (simple horizontal alignment check)
-        dx = eye_centers[1][0] - eye_centers[0][0]
-        dy = eye_centers[1][1] - eye_centers[0][1]
-        angle = np.degrees(np.arctan2(dy, dx))
-        
-        # If eyes are not horizontally aligned (looking left/right)
-        if abs(angle) > 15:  # More than 15 degrees tilt
-            return True
-        
-        # Check if eyes are centered in face (simple approach)
-        face_center_x = x + w//2
-        avg_eye_x = (eye_centers[0][0] + eye_centers[1][0]) / 2
-        
-        # If eyes are significantly off-center
-        if abs(avg_eye_x - face_center_x) > w * 0.2:  # 20% of face width
-            return True
-        
-        return False
+        return gaze_away
 
-    def _check_face_presence(self, frame=None):
+    def _check_face_presence(self, frame=None, observation=None):
         """Check if a face is currently visible in camera"""
-        # If no frame provided, read from camera
-        if frame is None:
-            if not self.cap or not self.cap.isOpened():
-                return False
-                
-            ret, frame = self.cap.read()
-            if not ret:
-                return False
-        
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
-        
-        # Also check for eyes to reduce false positives
-        if len(faces) > 0:
-            for (x, y, w, h) in faces:
-                roi_gray = gray[y:y+h, x:x+w]
-                eyes = self.eye_cascade.detectMultiScale(roi_gray)
-                if len(eyes) > 0:
-                    return True
-                    
-        return False
+        if observation is None:
+            # If no frame provided, read from camera
+            if frame is None:
+                if not self.cap or not self.cap.isOpened():
+                    return False
+
+                ret, frame = self.cap.read()
+                if not ret:
+                    return False
+            observation = self.face_pipeline.analyze(frame)
+
+        return observation.face_present
 
     def _handle_face_absence(self):
         self._handle_cheating_attempt("face_absence")
@@ -244,6 +329,13 @@ class ExpertTechnicalInterviewer:
         """Gracefully shut down the interview session."""
         self.interview_active = False
         self.monitoring_active = False
+        self.prefetcher.invalidate()
+        self.interrupt_speech(force=True)
+        self._close_microphone()
+        if self.proctoring is not None:
+            self.proctoring.forget(self.proctoring_id)
+        self.frame_sampler.reset()
+        self.focus_source.stop()
 
         try:
             self._stop_camera()
@@ -259,59 +351,68 @@ class ExpertTechnicalInterviewer:
     
         return docx_path, feedback_path
 
-    def _monitor_face_presence(self):
-        """Monitor for face and gaze with simpler approach"""
-        print("[Face Monitor] Starting face monitoring thread")
-        while self.monitoring_active and self.interview_active:
-            try:
-                if not self.camera_active:
-                    print("[Face Monitor] Camera not active, waiting...")
-                    time.sleep(self.face_detection_interval)
-                    continue
-                    
-                # Check every interval
-                if time.time() - self.last_face_detection_time > self.face_detection_interval:
-                    print("[Face Monitor] Checking for face...")
-                    ret, frame = self.cap.read()
-                    if not ret:
-                        print("[Face Monitor] Could not read frame from camera")
-                        time.sleep(1)
-                        continue
-                        
-                    # Check basic face presence with the frame we just read
-                    face_found = self._check_face_presence(frame)
-                    print(f"[Face Monitor] Face found: {face_found}")
-                    
-                    if face_found:
-                        self.last_face_detection_time = time.time()
-                        
-                        # Check gaze direction with the same frame
-                        gaze_away = self._check_gaze_direction(frame)
-                        print(f"[Face Monitor] Gaze away: {gaze_away}")
-                        
-                        if gaze_away is True:  # Definitely looking away
-                            if not hasattr(self, 'gaze_away_start_time'):
-                                self.gaze_away_start_time = time.time()
-                            else:
-                                gaze_away_duration = time.time() - self.gaze_away_start_time
-                                if gaze_away_duration > self.gaze_away_threshold:
-                                    print("[Face Monitor] Gaze away threshold exceeded")
-                                    self._handle_gaze_absence()
-                        else:
-                            if hasattr(self, 'gaze_away_start_time'):
-                                del self.gaze_away_start_time
+    def submit_frame(self, frame):
+        """Analyse a camera frame; with the proctoring service the result arrives later via callback"""
+        if self.proctoring is not None:
+            return self.proctoring.submit(self.proctoring_id, frame, self._on_face_observation)
+        self._on_face_observation(self.face_pipeline.analyze(frame))
+        return True
+
+    def proctoring_status(self):
+        """Current per-session sampling rate, plus the shared pool's load"""
+        status = {"sampler": self.frame_sampler.stats(), "sample_interval_ms": self.frame_sample_interval_ms()}
+        if self.proctoring is not None:
+            status["service"] = self.proctoring.stats()
+        return status
+
+    def frame_sample_interval_ms(self):
+        """Interval the camera client should use between uploaded frames"""
+        frame_settings = self.config.get("frames", {})
+        base_ms = max(frame_settings.get("base_interval_ms", 1000), int(self.frame_sampler.interval * 1000))
+        if self.proctoring is None:
+            return base_ms
+        return self.proctoring.sample_interval_ms(base_ms, frame_settings.get("max_interval_ms", 5000))
+
+    def _on_face_observation(self, observation):
+        """Apply one detection result to the face/gaze absence timers"""
+        if not (self.monitoring_active and self.interview_active):
+            return
+
+        face_found = self._check_face_presence(observation=observation)
+        print(f"[Face Monitor] Face found: {face_found}")
+        gaze_away = None
+        deadline_in = None  # Seconds until a running absence timer turns into a violation
+
+        if face_found:
+            self.last_face_detection_time = time.time()
+
+            # Check gaze direction with the same frame
+            gaze_away = self._check_gaze_direction(None, observation)
+            print(f"[Face Monitor] Gaze away: {gaze_away}")
+
+            if gaze_away is True:  # Definitely looking away
+                if not hasattr(self, 'gaze_away_start_time'):
+                    self.gaze_away_start_time = time.time()
+                else:
+                    gaze_away_duration = time.time() - self.gaze_away_start_time
+                    if gaze_away_duration > self.gaze_away_threshold:
+                        print("[Face Monitor] Gaze away threshold exceeded")
+                        self._handle_gaze_absence()
                     else:
-                        absence_duration = time.time() - self.last_face_detection_time
-                        print(f"[Face Monitor] Face absence duration: {absence_duration}")
-                        if absence_duration > self.max_face_absence_time:
-                            print("[Face Monitor] Face absence threshold exceeded")
-                            self._handle_face_absence()
-                            
-                time.sleep(0.5)
-                
-            except Exception as e:
-                print(f"[Face Monitor] Error: {e}")
-                time.sleep(5)
+                        deadline_in = self.gaze_away_threshold - gaze_away_duration
+            else:
+                if hasattr(self, 'gaze_away_start_time'):
+                    del self.gaze_away_start_time
+        else:
+            absence_duration = time.time() - self.last_face_detection_time
+            print(f"[Face Monitor] Face absence duration: {absence_duration}")
+            if absence_duration > self.max_face_absence_time:
+                print("[Face Monitor] Face absence threshold exceeded")
+                self._handle_face_absence()
+            else:
+                deadline_in = self.max_face_absence_time - absence_duration
+
+        self.frame_sampler.observe((face_found, gaze_away), deadline_in)
 
     def _handle_gaze_absence(self):
         self._handle_cheating_attempt("gaze_absence")
@@ -340,6 +441,7 @@ class ExpertTechnicalInterviewer:
         """Mark the start of a new interview section"""
         self.current_section = section_name
         self.section_start_time = time.time()
+        publish_status(self.session_state, section=section_name)
         print(f"[TIMING] Starting {section_name} section")
 
     def _adjust_for_time(self, current_phase):
@@ -358,9 +460,44 @@ class ExpertTechnicalInterviewer:
                 
         return current_phase
 
+    def record_code_submission(self, code_string, test_report=None):
+        """Store a submission and wake the coding stage; returns True if the coding stage owns it
+        (it then leads the discussion, so callers must not start their own)"""
+        with self._submission_lock:
+            self.latest_code_submission = code_string
+            self.latest_test_report = test_report
+            self._submission_seq += 1
+            awaited = self._coding_stage_active
+        self._wake_submission_waiters()
+        return awaited
+
+    def _wake_submission_waiters(self):
+        with self._submission_lock:
+            waiters = list(self._submission_waiters)
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(lambda w=waiter: w.done() or w.set_result(None))
+
+    async def _await_code_submission(self, since_seq, timeout):
+        """Wait until a submission newer than since_seq arrives, the interview ends, or timeout passes"""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        with self._submission_lock:
+            if self._submission_seq != since_seq or not self.interview_active:
+                return self._submission_seq != since_seq and self.interview_active
+            self._submission_waiters.append((loop, waiter))
+        try:
+            await asyncio.wait_for(waiter, max(0.0, timeout))
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._submission_lock:
+                self._submission_waiters.remove((loop, waiter))
+        return self._submission_seq != since_seq and self.interview_active
+
     def submit_candidate_code(self, code_string):
         """Save candidate's code submission and ask follow-up questions."""
-        self.latest_code_submission = code_string
+        if self.record_code_submission(code_string):
+            return  # The coding stage owns this question and will discuss the solution itself
         if code_string and self.current_coding_question:
             # Check time remaining for coding section
             if self._check_time_remaining("coding_challenge") < 60:  # Less than 1 minute left
@@ -374,7 +511,7 @@ class ExpertTechnicalInterviewer:
                 time.sleep(0.1)
                 answer = self.listen()
                 if answer:
-                    save_to_conversation_history("user", f"[Follow-up Answer]\n{answer}")
+                    save_to_conversation_history("user", f"[Follow-up Answer]\n{answer}", self.session_state)
 
     def _identify_language_from_code(self, code):
         """Simple language detection from code snippet"""
@@ -388,10 +525,10 @@ class ExpertTechnicalInterviewer:
             return "JavaScript"
         return "Python"  # default
 
-    def wait_after_speaking(self, message, base=0.6, per_word=0.15):
-        time.sleep(0.1)
+    async def wait_after_speaking(self, message, base=0.6, per_word=0.15):
+        await asyncio.sleep(0.1)
 
-    def _give_small_hint(self, question_text):
+    async def _give_small_hint(self, question_text):
         hint_prompt = f"""You are an AI coding interviewer. Give a small hint for the following problem.
         It should not reveal the full solution, just nudge the candidate in the right direction.
 
@@ -400,9 +537,9 @@ class ExpertTechnicalInterviewer:
 
         Format: Hint: [short helpful nudge]"""
 
-        hint = self.query_openai(hint_prompt)
+        hint = await self.aquery_openai(hint_prompt)
         if hint:
-            self.speak(hint.strip(), interruptible=False)
+            await self.aspeak(hint.strip(), interruptible=False)
     
     def _get_file_extension(self, language):
         return {
@@ -525,14 +662,14 @@ class ExpertTechnicalInterviewer:
         Return only the question, no additional text."""
         
         try:
-            question = self.query_openai(prompt)
+            question = self.query_openai(prompt, use_cache=False)
             return question.strip() if question else None
         except Exception as e:
             print(f"Error generating domain question: {e}")
             return self._get_fallback_question(domain, difficulty)
 
-    def _generate_coding_question(self, domain):
-        """Generate coding question based on experience level"""
+    def _coding_question_prompt(self, domain):
+        """Prompt and difficulty for a coding question matched to the candidate's experience"""
         if not hasattr(self, 'years_experience'):
             self.years_experience = 0
             
@@ -558,46 +695,100 @@ class ExpertTechnicalInterviewer:
         Example Input: [sample] 
         Example Output: [expected]
         Constraints: [any constraints]"""
-        
+        if self.coding_tests.get("enabled", True):
+            prompt += f"""
+
+        The solution must read its input from standard input and print the answer to standard output.
+        After the constraints, add a line "Test Cases:" followed by a JSON array of {self.coding_tests.get("generated_cases", 5)}
+        hidden test cases, each {{"input": "<exact stdin>", "output": "<exact expected stdout>"}}, covering edge cases."""
+        return prompt, difficulty
+
+    def _generate_coding_question(self, domain):
+        """Generate coding question based on experience level"""
+        prompt, difficulty = self._coding_question_prompt(domain)
         try:
-            response = self.query_openai(prompt)
+            # Same domain/difficulty gives the same problem; vary by slot so a session never repeats one
+            response = self.query_openai(prompt, cache_variant=self.coding_questions_asked)
             return response.strip() if response else None
         except Exception as e:
             print(f"Error generating coding question: {e}")
             return self._get_fallback_coding_question(domain, difficulty)
 
-    def _execute_code(self, language, file_path):
+    async def _agenerate_coding_question(self, domain):
+        prompt, difficulty = self._coding_question_prompt(domain)
         try:
-            if language == "Python":
-                result = subprocess.run(["python", file_path], capture_output=True, text=True, timeout=10)
-            elif language == "Java":
-                compile_result = subprocess.run(["javac", file_path], capture_output=True, text=True)
-                if compile_result.returncode != 0:
-                    return f"Compile Error:\n{compile_result.stderr}"
-                class_name = os.path.basename(file_path).replace(".java", "")
-                result = subprocess.run(["java", class_name], capture_output=True, text=True, timeout=10, cwd=os.path.dirname(file_path))
-            elif language == "C++":
-                exe_path = file_path.replace(".cpp", ".exe")
-                compile_result = subprocess.run(["g++", file_path, "-o", exe_path], capture_output=True, text=True)
-                if compile_result.returncode != 0:
-                    return f"Compile Error:\n{compile_result.stderr}"
-                result = subprocess.run([exe_path], capture_output=True, text=True, timeout=10)
-            elif language == "JavaScript":
-                result = subprocess.run(["node", file_path], capture_output=True, text=True, timeout=10)
-            else:
-                return "Unsupported language."
+            response = await self.aquery_openai(prompt, cache_variant=self.coding_questions_asked)
+            return response.strip() if response else None
+        except Exception as e:
+            print(f"Error generating coding question: {e}")
+            return self._get_fallback_coding_question(domain, difficulty)
 
-            output = ""
-            if result.stdout:
-                output += f"Output:\n{result.stdout}\n"
-            if result.stderr:
-                output += f"Errors:\n{result.stderr}\n"
-            return output if output else "Code executed successfully (no output)."
+    def _configured_coding_question(self, slot):
+        """(question, test cases) from the "coding_tests" config section for this slot, or None"""
+        questions = self.coding_tests.get("questions", [])
+        if slot >= len(questions):
+            return None
+        entry = questions[slot]
+        return entry.get("question"), parse_test_cases(entry.get("test_cases"), self.coding_tests.get("max_cases"))
+
+    def _set_coding_question(self, text, test_cases=None):
+        """Make text the current coding question; hidden test cases are split off unless given"""
+        if test_cases is None:
+            text, test_cases = split_test_cases(text, self.coding_tests.get("max_cases"))
+        self.current_coding_question = text
+        self.current_test_cases = test_cases if self.coding_tests.get("enabled", True) else []
+        self.latest_test_report = None
+        return text
+
+    def new_coding_question(self, domain):
+        """Pick or generate the next coding question outside the interview loop (used by the API)"""
+        configured = self._configured_coding_question(self.coding_questions_asked)
+        if configured:
+            return self._set_coding_question(*configured)
+        return self._set_coding_question(self._generate_coding_question(domain))
+
+    def run_test_cases(self, language, code):
+        """Run the current question's hidden cases in parallel; None if it has none"""
+        if not self.current_test_cases or not code:
+            return None
+        report = run_test_cases(
+            self.executor, language, code, self.current_test_cases,
+            fail_fast=self.coding_tests.get("fail_fast", False),
+            timeout=self.coding_tests.get("timeout_seconds")
+        )
+        print(f"[Tests] {report.summary()}")
+        return report
+
+    def _prefetch_key(self, kind, slot):
+        """Identify what a prefetched question was generated for"""
+        return (kind, self.current_domain, getattr(self, 'years_experience', 0), slot)
+
+    def _prefetch_coding_question(self):
+        """Generate the coding problem for the next slot, if one will be asked and isn't configured"""
+        if (not self.interview_active or self.current_domain not in self.tech_domains or
+                self.coding_questions_asked >= self.max_coding_questions or
+                self._configured_coding_question(self.coding_questions_asked)):
+            return
+        self.prefetcher.schedule(
+            "coding_question",
+            self._prefetch_key("coding_question", self.coding_questions_asked),
+            self._generate_coding_question, self.current_domain
+        )
 
-        except subprocess.TimeoutExpired:
-            return "Error: Code execution timed out (10 seconds limit)"
-        except Exception as e:
-            return f"Runtime error: {str(e)}"
+    async def _take_prefetched(self, kind, slot):
+        """Use a prefetched question if the answers since haven't made it stale"""
+        return await self.prefetcher.atake(kind, self._prefetch_key(kind, slot))
+
+    def execute_code(self, language, code, stdin=None):
+        """Run candidate code on the shared sandboxed runner; returns the output as text"""
+        return self.executor.run(language, code, stdin).format()
+
+    async def aexecute_code(self, language, code, stdin=None):
+        return (await self.executor.arun(language, code, stdin)).format()
+
+    def stream_code(self, language, code, on_output, stdin=None):
+        """Start a run whose output is passed to on_output(stream, text) as it appears; returns a RunHandle"""
+        return self.executor.start(language, code, stdin, on_output=on_output)
 
     def _is_repeat_request(self, text):
         if not text:
@@ -608,69 +799,33 @@ class ExpertTechnicalInterviewer:
         ]
         return any(phrase in text.lower() for phrase in repeat_phrases)
 
-    def _run_interview_logic(self):
-        try:
-            self.interview_start_time = time.time()
-            
-            # Introduction Section
-            self._start_section("introduction")
-            self._conduct_introduction()
-            
-            # Background Section
-            self._start_section("background")
-            self._gather_background()
-            
-            # Determine interview type
-            is_tech_interview = self.current_domain in self.tech_domains
-            
-            # Technical/Professional Questions Section
-            self._start_section("technical_questions")
-            self._ask_client_questions()  # Ask client-provided questions first
-            
-            # Only proceed with generated questions if we have time
-            if not self._should_transition_to_next_section("technical_questions"):
-                self._conduct_question_phase(is_tech_interview)
-            
-            # Coding Challenge Section (tech interviews only)
-            if is_tech_interview and self.interview_active:
-                self._start_section("coding_challenge")
-                self._conduct_coding_challenge()
-            
-            # Doubt Clearing Section
-            if self.interview_active:
-                self._start_section("doubt_clearing")
-                self._conduct_doubt_clearing(is_tech_interview)
-            
-            # Closing Section
-            if self.interview_active:
-                self._start_section("closing")
-                self._conduct_closing(is_tech_interview)
-                
-        except Exception as e:
-            print(f"Interview error: {e}")
-            self.speak("We've encountered a technical issue, but thank you for your participation today!", interruptible=False)
-        finally:
-            self.interview_active = False
-            self.monitoring_active = False
-            docx_path = self._save_transcription_to_docx()
-            self._generate_feedback_from_docx(docx_path)
-            self._stop_camera()
-
-    def _conduct_introduction(self):
+    async def _afinish_interview(self):
+        """Shared teardown once the state machine leaves its last section (or fails)"""
+        self.interview_active = False
+        self.monitoring_active = False
+        self.prefetcher.invalidate()
+        self.focus_source.stop()
+        # Closing the microphone waits for a capture in progress; keep that off the event loop
+        await asyncio.to_thread(self._close_microphone)
+        docx_path = await asyncio.to_thread(self._save_transcription_to_docx)
+        await asyncio.to_thread(self._generate_feedback_from_docx, docx_path)
+        self._stop_camera()
+
+    async def _conduct_introduction(self):
         """Handle the introduction section"""
         intro_message = self.config.get("introduction_message","Hello! I am Gyani. Welcome to your interview session today. I'm excited to chat with you!. Before we begin how has your day been so far?")
-        self.speak(intro_message, interruptible=False)
-        day_response = self.listen()
+        await self.aspeak(intro_message, interruptible=False)
+        day_response = await self.alisten()
 
         if day_response:
-            save_to_conversation_history("user", day_response)
-            self.speak("That's great to hear! I appreciate you taking the time for this session.", interruptible=False)
+            save_to_conversation_history("user", day_response, self.session_state)
+            await self.aspeak("That's great to hear! I appreciate you taking the time for this session.", interruptible=False)
 
         name_question = self.config.get("name_question", 
                                       "Now, could you please tell me your name and a bit about yourself?")
-        self.speak(name_question, interruptible=False)
-        self.wait_after_speaking(name_question)
-        introduction = self.listen()
+        await self.aspeak(name_question, interruptible=False)
+        await self.wait_after_speaking(name_question)
+        introduction = await self.alisten()
 
         if introduction:
             self.current_domain = self._identify_tech_domain(introduction)
@@ -696,15 +851,15 @@ class ExpertTechnicalInterviewer:
                 
         return 0  # Default if no experience found
 
-    def _gather_background(self):
+    async def _gather_background(self):
         """Gather candidate background information"""
         is_tech_interview = self.current_domain in self.tech_domains
 
         # First ask about years of experience
         msg = "Could you tell me how many years of professional experience you have in this field?"
-        self.speak(msg, interruptible=False)
-        self.wait_after_speaking(msg)
-        experience_response = self.listen()
+        await self.aspeak(msg, interruptible=False)
+        await self.wait_after_speaking(msg)
+        experience_response = await self.alisten()
         
         # Extract years of experience from response
         self.years_experience = self._extract_years_experience(experience_response)
@@ -714,9 +869,9 @@ class ExpertTechnicalInterviewer:
         else:
             msg = "Nice to meet you! Could you tell me about your professional experience and the domains you've worked in?"
         
-        self.speak(msg, interruptible=False)
-        self.wait_after_speaking(msg)
-        background = self.listen()
+        await self.aspeak(msg, interruptible=False)
+        await self.wait_after_speaking(msg)
+        background = await self.alisten()
 
         if background:
             self.current_domain = self._identify_tech_domain(background)
@@ -747,11 +902,11 @@ class ExpertTechnicalInterviewer:
         except (ValueError, IndexError):
             return "closing"
 
-    def _ask_client_questions(self):
+    async def _ask_client_questions(self):
         """Ask client-provided questions or generate domain-specific ones"""
         if self.client_questions:
-            self.speak("I have some specific questions provided for this interview. Let's begin with those.", interruptible=False)
-            time.sleep(0.1)
+            await self.aspeak("I have some specific questions provided for this interview. Let's begin with those.", interruptible=False)
+            await asyncio.sleep(0.1)
             
             for question in self.client_questions[:]:
                 # Check if we should transition to next section
@@ -759,7 +914,7 @@ class ExpertTechnicalInterviewer:
                     return
                     
                 if question not in self.used_client_questions:
-                    self._ask_question_with_followup(question)
+                    await self._ask_question_with_followup(question)
                     self.used_client_questions.append(question)
                     self.client_questions.remove(question)
 
@@ -774,7 +929,7 @@ class ExpertTechnicalInterviewer:
             return "mid"
         return "junior"  # Default
 
-    def _ask_question_with_followup(self, question):
+    async def _ask_question_with_followup(self, question):
         """Ask a question and follow up based on response"""
         if question == self.last_question and not self.just_repeated:
             return
@@ -786,54 +941,54 @@ class ExpertTechnicalInterviewer:
 
         while not answer_received and repeat_attempts < max_repeats and self.interview_active:
             if not self.just_repeated:
-                self.speak(question)
-                self.wait_after_speaking(question)
+                await self.aspeak(question)
+                await self.wait_after_speaking(question)
             
-            answer = self.listen()
+            answer = await self.alisten()
             
             if answer and self._is_repeat_request(answer):
                 if repeat_attempts < max_repeats:
                     self.just_repeated = True
                     repeat_attempts += 1
-                    rephrased = self._rephrase_question(question)
-                    self.speak("Let me rephrase that: " + rephrased)
+                    rephrased = await self._rephrase_question(question)
+                    await self.aspeak("Let me rephrase that: " + rephrased)
                     self.last_question = rephrased
-                    self.wait_after_speaking(rephrased)
+                    await self.wait_after_speaking(rephrased)
                     continue
                 else:
                     placeholder = "[Requested repeat too many times]"
-                    save_to_conversation_history("user", placeholder)
+                    save_to_conversation_history("user", placeholder, self.session_state)
                     answer_received = True
 
             elif not answer or len(answer.split()) <= 3:
                 if repeat_attempts < max_repeats - 1:
-                    self.speak("Could you please elaborate on that?", interruptible=False)
+                    await self.aspeak("Could you please elaborate on that?", interruptible=False)
                 else:
                     placeholder = "[Unable to answer after multiple attempts]"
-                    save_to_conversation_history("user", placeholder)
+                    save_to_conversation_history("user", placeholder, self.session_state)
                     answer_received = True
             
             elif answer and len(answer.split()) > 4:
                 answer_received = True
                 
                 # Ask follow-up question based on answer
-                followup = self._generate_followup_question(question, answer)
+                followup = await self._generate_followup_question(question, answer)
                 if followup and self._check_time_remaining("technical_questions") > 60:
-                    self.speak(followup)
-                    self.wait_after_speaking(followup)
-                    followup_answer = self.listen()
+                    await self.aspeak(followup)
+                    await self.wait_after_speaking(followup)
+                    followup_answer = await self.alisten()
                     if followup_answer and len(followup_answer.split()) > 4:
-                        save_to_conversation_history("assistant", followup)
+                        save_to_conversation_history("assistant", followup, self.session_state)
                 
                 break
 
         if answer_received and not self.just_repeated:
             self.question_count += 1  # Increment only for original questions
-            save_to_conversation_history("assistant", question)
+            save_to_conversation_history("assistant", question, self.session_state)
             
             self.just_repeated = False
 
-    def _generate_followup_question(self, original_question, answer):
+    async def _generate_followup_question(self, original_question, answer):
             """Generate a relevant follow-up question based on the answer"""
             prompt = f"""Based on this interview exchange, generate relevant follow-up question:
         
@@ -849,7 +1004,7 @@ class ExpertTechnicalInterviewer:
         
         Return only the follow-up question."""
             
-            followup = self.query_openai(prompt)
+            followup = await self.aquery_openai(prompt, use_cache=False)
             
             if not followup:
                 # Fallback follow-up questions
@@ -864,15 +1019,15 @@ class ExpertTechnicalInterviewer:
             
             return followup.strip()
 
-    def _conduct_question_phase(self, is_tech_interview):
+    async def _conduct_question_phase(self, is_tech_interview):
         """Conduct the main question phase"""
         question_count = 0
         max_questions = 1  # Adjusted based on time constraints
         
         if is_tech_interview:
-            self.speak("Let's start with some technical questions to understand your experience better.", interruptible=False)
+            await self.aspeak("Let's start with some technical questions to understand your experience better.", interruptible=False)
         else:
-            self.speak("Let's discuss your professional experience in more detail.", interruptible=False)
+            await self.aspeak("Let's discuss your professional experience in more detail.", interruptible=False)
 
         while (question_count < max_questions and 
             self.interview_active and 
@@ -926,7 +1081,7 @@ class ExpertTechnicalInterviewer:
                 
                 Generate only the question in a friendly, conversational tone."""
 
-            response = self.query_openai(system_prompt)
+            response = await self.aquery_openai(system_prompt, use_cache=False)
             
             if response:
                 msg = response.strip()
@@ -942,107 +1097,147 @@ class ExpertTechnicalInterviewer:
 
                 while not answer_received and repeat_attempts < max_repeats:
                     if not self.just_repeated:
-                        self.speak(msg)
-                        self.wait_after_speaking(msg)
+                        await self.aspeak(msg)
+                        # The first coding problem is generated while the last question is answered
+                        if is_tech_interview and question_count + 1 >= max_questions:
+                            self._prefetch_coding_question()
+                        await self.wait_after_speaking(msg)
                     
-                    answer = self.listen()
+                    answer = await self.alisten()
                     
                     if answer and self._is_repeat_request(answer):
                         if repeat_attempts < max_repeats:
                             self.just_repeated = True
                             repeat_attempts += 1
-                            rephrased = self._rephrase_question(msg)
-                            self.speak("Let me rephrase that: " + rephrased)
+                            rephrased = await self._rephrase_question(msg)
+                            await self.aspeak("Let me rephrase that: " + rephrased)
                             self.last_question = rephrased
-                            self.wait_after_speaking(rephrased)
+                            await self.wait_after_speaking(rephrased)
                             continue
                         else:
                             placeholder = "[Requested repeat too many times]"
-                            save_to_conversation_history("user", placeholder)
+                            save_to_conversation_history("user", placeholder, self.session_state)
                             answer_received = True
 
                     elif not answer or len(answer.split()) <= 3:
                         if repeat_attempts < max_repeats - 1:
-                            self.speak("Could you please elaborate on that?", interruptible=False)
+                            await self.aspeak("Could you please elaborate on that?", interruptible=False)
                         else:
                             placeholder = "[Unable to answer after multiple attempts]"
-                            save_to_conversation_history("user", placeholder)
+                            save_to_conversation_history("user", placeholder, self.session_state)
                             answer_received = True
                     
                     elif answer and len(answer.split()) > 4:
                         answer_received = True
                         
                         # Ask follow-up question based on answer
-                        followup = self._generate_followup_question(msg, answer)
+                        followup = await self._generate_followup_question(msg, answer)
                         if followup and self._check_time_remaining("technical_questions") > 60:
-                            self.speak(followup)
-                            self.wait_after_speaking(followup)
-                            followup_answer = self.listen()
+                            await self.aspeak(followup)
+                            await self.wait_after_speaking(followup)
+                            followup_answer = await self.alisten()
                             if followup_answer and len(followup_answer.split()) > 4:
-                                save_to_conversation_history("assistant", followup)
+                                save_to_conversation_history("assistant", followup, self.session_state)
                         
                         break
 
                 if answer_received and not self.just_repeated:
                     self.question_count += 1  # Increment only for original questions
-                    save_to_conversation_history("assistant", msg)
+                    question_count += 1
+                    save_to_conversation_history("assistant", msg, self.session_state)
                     
                     self.just_repeated = False
 
-    def _conduct_coding_challenge(self):
+    async def _conduct_coding_challenge(self):
         """Conduct coding challenge section with time constraints"""
-        self.speak("Great discussion! Now I'd like to give you a couple of coding challenges to see your problem-solving skills in action.", interruptible=False)
-        time.sleep(0.1)
+        await self.aspeak("Great discussion! Now I'd like to give you a couple of coding challenges to see your problem-solving skills in action.", interruptible=False)
+        await asyncio.sleep(0.1)
 
         while (self.coding_questions_asked < self.max_coding_questions and 
             self.interview_active and 
             self._check_time_remaining("coding_challenge") > 120):
             
-            self.current_coding_question = self._generate_coding_question(self.current_domain or "python")
-            save_to_conversation_history("assistant", f"[Coding Challenge Question]\n{self.current_coding_question}")
-
-            self.speak("I've prepared a coding challenge for you. Here's the problem:", interruptible=False)
-            time.sleep(0.1)
-            print(f"\nCoding Challenge: {self.current_coding_question}")
-
-            self.coding_questions_asked += 1
-            hint_offered = False
-            start_time = time.time()
-
-            while (self._check_time_remaining("coding_challenge") > 60 and 
-                self.interview_active):
-                time.sleep(0.1)
+            domain = self.current_domain or "python"
+            configured = self._configured_coding_question(self.coding_questions_asked)
+            if configured:
+                self._set_coding_question(*configured)
+            else:
+                self._set_coding_question((
+                    await self._take_prefetched("coding_question", self.coding_questions_asked)
+                    if domain == self.current_domain else None
+                ) or await self._agenerate_coding_question(domain))
+            save_to_conversation_history("assistant", f"[Coding Challenge Question]\n{self.current_coding_question}", self.session_state)
+            with self._submission_lock:
+                # Until this question's discussion ends the stage owns every submission, including
+                # code sent while the problem or a hint is being spoken; the API stays out of it
+                self._coding_stage_active = True
+                submission_seq = self._submission_seq
+            try:
+                await self.aspeak("I've prepared a coding challenge for you. Here's the problem:", interruptible=False)
+                await asyncio.sleep(0.1)
+                print(f"\nCoding Challenge: {self.current_coding_question}")
+
+                self.coding_questions_asked += 1
+                self._prefetch_coding_question()  # The next problem, generated while this one is solved
+                hint_offered = False
+                hint_at = time.time() + 120
+                submitted = False
+
+                # Sleep until the code is submitted, the hint is due or time runs out
+                while (self._check_time_remaining("coding_challenge") > 60 and 
+                    self.interview_active):
+                    timeout = self._check_time_remaining("coding_challenge") - 60
+                    if not hint_offered:
+                        timeout = min(timeout, hint_at - time.time())
+                    if await self._await_code_submission(submission_seq, timeout):
+                        submitted = True
+                        break
                 
-                # Offer a hint after 2 minutes of inactivity
-                if not hint_offered and time.time() - start_time > 120:
-                    self.speak("Would you like a small hint to help you get started?", interruptible=False)
-                    time.sleep(0.1)
-                    response = self.listen()
-                    if response and "yes" in response.lower():
-                        self._give_small_hint(self.current_coding_question)
-                    hint_offered = True
-
-            if not self.interview_active:
-                break
-
-            # After code submission, ask follow-up questions
-            self.speak("Now let's discuss your solution.", interruptible=False)
-            followup = self._coding_followup(self.latest_code_submission, self._identify_language_from_code(self.latest_code_submission))
-            if followup:
-                self.speak(followup)
-                answer = self.listen()
-                if answer:
-                    # Ask additional follow-up if time permits
-                    if self._check_time_remaining("coding_challenge") > 60:
-                        second_followup = self._generate_followup_question(followup, answer)
-                        if second_followup:
-                            self.speak(second_followup)
-                            second_answer = self.listen()
-            time.sleep(0.1)
+                    # Offer a hint after 2 minutes of inactivity
+                    if not hint_offered and time.time() >= hint_at:
+                        await self.aspeak("Would you like a small hint to help you get started?", interruptible=False)
+                        await asyncio.sleep(0.1)
+                        response = await self.alisten()
+                        if response and "yes" in response.lower():
+                            await self._give_small_hint(self.current_coding_question)
+                        hint_offered = True
+
+                if not self.interview_active:
+                    break
+                if not submitted or not self.latest_code_submission:
+                    continue
 
-    def _coding_followup(self, code, language):
-        """Ask follow-up questions about the code submitted by the candidate."""
-        prompt = f"""You are an expert software engineer reviewing this {language} code:
+                # The API ran the hidden cases before waking us; otherwise run them here
+                report = self.latest_test_report
+                if report is None and self.current_test_cases:
+                    report = await asyncio.to_thread(
+                        self.run_test_cases, self._identify_language_from_code(self.latest_code_submission),
+                        self.latest_code_submission
+                    )
+                if report is not None:
+                    save_to_conversation_history("assistant", f"[Test Results] {report.summary()}", self.session_state)
+                    await self.aspeak(f"Your solution passed {report.passed} of {report.total} hidden test cases.", interruptible=False)
+
+                # After code submission, ask follow-up questions
+                await self.aspeak("Now let's discuss your solution.", interruptible=False)
+                followup = await self._acoding_followup(self.latest_code_submission, self._identify_language_from_code(self.latest_code_submission))
+                if followup:
+                    await self.aspeak(followup)
+                    answer = await self.alisten()
+                    if answer:
+                        # Ask additional follow-up if time permits
+                        if self._check_time_remaining("coding_challenge") > 60:
+                            second_followup = await self._generate_followup_question(followup, answer)
+                            if second_followup:
+                                await self.aspeak(second_followup)
+                                await self.alisten()  # Saved to the transcript by listen()
+                await asyncio.sleep(0.1)
+            finally:
+                with self._submission_lock:
+                    self._coding_stage_active = False
+
+    def _coding_followup_prompt(self, code, language):
+        return f"""You are an expert software engineer reviewing this {language} code:
         
         ```{code}```
         
@@ -1060,38 +1255,48 @@ class ExpertTechnicalInterviewer:
         - "How would you modify this to handle [specific scenario]?"
         
         Return only the question."""
-        
+
+    def _coding_followup(self, code, language):
+        """Ask follow-up questions about the code submitted by the candidate."""
         try:
-            response = self.query_openai(prompt)
+            response = self.query_openai(self._coding_followup_prompt(code, language))
             return response.strip() if response else "Can you walk me through your thought process for this solution?"
         except Exception as e:
             print(f"Error generating coding follow-up: {e}")
             return "Can you explain the time complexity of your solution?"
 
-    def _conduct_doubt_clearing(self, is_tech_interview):
+    async def _acoding_followup(self, code, language):
+        try:
+            response = await self.aquery_openai(self._coding_followup_prompt(code, language))
+            return response.strip() if response else "Can you walk me through your thought process for this solution?"
+        except Exception as e:
+            print(f"Error generating coding follow-up: {e}")
+            return "Can you explain the time complexity of your solution?"
+
+    async def _conduct_doubt_clearing(self, is_tech_interview):
         """Conduct doubt clearing session with time constraints"""
         if is_tech_interview:
-            self.speak("That was excellent! You've shown great technical knowledge and problem-solving skills.", interruptible=False)
-            time.sleep(0.1)
-
-            self.speak("Before we conclude, I'd like to offer you a chance to ask any technical questions you might have.", interruptible=False)
-            self.speak("This could be about:", interruptible=False)
-            self.speak("1. The coding problems we discussed", interruptible=False)
-            self.speak("2. Any of the technical concepts we covered", interruptible=False)
-            self.speak("3. Best practices in the field", interruptible=False)
-            self.speak("4. Or anything else technical you'd like to discuss", interruptible=False)
+            await self.aspeak("That was excellent! You've shown great technical knowledge and problem-solving skills.", interruptible=False)
+            await asyncio.sleep(0.1)
+
+            await self.aspeak("Before we conclude, I'd like to offer you a chance to ask any technical questions you might have.", interruptible=False)
+            await self.aspeak("This could be about:", interruptible=False)
+            await self.aspeak("1. The coding problems we discussed", interruptible=False)
+            await self.aspeak("2. Any of the technical concepts we covered", interruptible=False)
+            await self.aspeak("3. Best practices in the field", interruptible=False)
+            await self.aspeak("4. Or anything else technical you'd like to discuss", interruptible=False)
         else:
-            self.speak("That was excellent! You've shown great professional knowledge and problem-solving skills.", interruptible=False)
-            time.sleep(0.1)
-
-            self.speak("Before we conclude, I'd like to offer you a chance to ask any questions you might have about the role or industry.", interruptible=False)
-            self.speak("This could be about:", interruptible=False)
-            self.speak("1. The professional scenarios we discussed", interruptible=False)
-            self.speak("2. Any of the domain concepts we covered", interruptible=False)
-            self.speak("3. Industry best practices", interruptible=False)
-            self.speak("4. Or anything else you'd like to discuss", interruptible=False)
+            await self.aspeak("That was excellent! You've shown great professional knowledge and problem-solving skills.", interruptible=False)
+            await asyncio.sleep(0.1)
+
+            await self.aspeak("Before we conclude, I'd like to offer you a chance to ask any questions you might have about the role or industry.", interruptible=False)
+            await self.aspeak("This could be about:", interruptible=False)
+            await self.aspeak("1. The professional scenarios we discussed", interruptible=False)
+            await self.aspeak("2. Any of the domain concepts we covered", interruptible=False)
+            await self.aspeak("3. Industry best practices", interruptible=False)
+            await self.aspeak("4. Or anything else you'd like to discuss", interruptible=False)
         
-        self.speak("What would you like to ask?", interruptible=False)
+        await self.aspeak("What would you like to ask?", interruptible=False)
         
         questions_asked = 0
         max_questions = 3
@@ -1100,7 +1305,7 @@ class ExpertTechnicalInterviewer:
         while (questions_asked < max_questions and 
                self.interview_active and 
                time.time() < timeout):
-            question = self.listen()
+            question = await self.alisten()
             if question and len(question.split()) > 3:
                 questions_asked += 1
                 answer_prompt = f"""Provide a concise but helpful answer to this {'technical' if is_tech_interview else 'professional'} question:
@@ -1113,13 +1318,13 @@ class ExpertTechnicalInterviewer:
                 - End by asking if they'd like clarification
                 """
                 
-                answer = self.query_openai(answer_prompt)
+                # Speak each sentence as soon as it is generated
+                answer = await self.aspeak_streaming(self.aquery_openai_stream(answer_prompt), interruptible=False)
                 if answer:
-                    self.speak(answer, interruptible=False)
-                    self.wait_after_speaking(answer)
+                    await self.wait_after_speaking(answer)
                     
-                    self.speak("Does that answer your question, or would you like me to elaborate?", interruptible=False)
-                    followup = self.listen()
+                    await self.aspeak("Does that answer your question, or would you like me to elaborate?", interruptible=False)
+                    followup = await self.alisten()
                     
                     if followup and "elaborate" in followup.lower():
                         elaboration_prompt = f"""Provide more detailed explanation about:
@@ -1133,70 +1338,42 @@ class ExpertTechnicalInterviewer:
                         - Include examples
                         - Keep to 5-6 sentences max"""
                         
-                        elaboration = self.query_openai(elaboration_prompt)
+                        elaboration = await self.aspeak_streaming(self.aquery_openai_stream(elaboration_prompt), interruptible=False)
                         if elaboration:
-                            self.speak(elaboration, interruptible=False)
-                            self.wait_after_speaking(elaboration)
+                            await self.wait_after_speaking(elaboration)
                 
                 if questions_asked < max_questions:
-                    self.speak("Do you have any other questions?", interruptible=False)
+                    await self.aspeak("Do you have any other questions?", interruptible=False)
             elif "nothing" in question.lower() or "no questions" in question.lower():
                 break
 
-    def _conduct_closing(self, is_tech_interview):
+    async def _conduct_closing(self, is_tech_interview):
         """Conduct closing remarks"""
         closing_message = self.config.get("closing_message", "Thank you so much for your time today. It was a pleasure talking with you, and I wish you the best of luck!")
-        self.speak(closing_message, interruptible=False)
+        await self.aspeak(closing_message, interruptible=False)
 
     def _start_camera(self):
         """Start the camera for face detection"""
         if not self.camera_active:
             self.camera_active = True
 
+    def _close_microphone(self):
+        try:
+            self.microphone.close()
+        except Exception as e:
+            print(f"Error closing microphone: {e}")
+
     def _stop_camera(self):
         """Stop the camera"""
         if self.camera_active and self.cap is not None:
             self.cap.release()
             self.cap = None
             self.camera_active = False
-    def _monitor_tab_changes(self):
-        while not self.tab_monitor_ready:
-            time.sleep(0.5)
-        
-        try:
-            initial_window = gw.getActiveWindow()
-            initial_title = initial_window.title if initial_window else "Interview Window"
-        except:
-            initial_window = None
-            initial_title = "Interview Window"
-        
-        warning_given = False
-        
-        while self.monitoring_active and self.interview_active:
-            try:
-                current_window = gw.getActiveWindow()
-                current_title = current_window.title if current_window else initial_title
-                
-                # Only trigger if:
-                # 1. We have a valid window
-                # 2. The title has actually changed significantly
-                # 3. The new title doesn't contain system/keywords
-                if (current_window and initial_window and 
-                    current_title != initial_title and
-                    not any(x in current_title.lower() for x in ["notification", "system", "settings"])):
-                    
-                    if not warning_given:  # Only warn once per change
-                        self.tab_change_detected = True
-                        self._handle_cheating_attempt("tab_change")
-                        warning_given = True
-                else:
-                    warning_given = False
-                    
-                time.sleep(3)  # Longer delay between checks
-                
-            except Exception as e:
-                print(f"Window monitoring error: {e}")
-                time.sleep(3)
+    def _on_focus_lost(self, detail=None):
+        if not (self.monitoring_active and self.interview_active):
+            return
+        self.tab_change_detected = True
+        self._handle_cheating_attempt("tab_change")
 
     def _handle_cheating_attempt(self, cheat_type):
         """Handle all types of cheating attempts with a unified counter"""
@@ -1207,14 +1384,11 @@ class ExpertTechnicalInterviewer:
             self.interview_active = False
             return
             
-        responses = {
-            "tab_change": "Please stay focused on the interview window and avoid switching to other applications.",
-            "face_absence": "Please ensure your face is clearly visible in the camera.",
-            "gaze_absence": "Please maintain focus on the screen and avoid looking away."
-        }
-        
-        if cheat_type in responses:
-            self.speak(f"Gentle reminder: {responses[cheat_type]} This is notice {self.cheating_warnings} of {self.max_cheating_warnings}.", interruptible=False)
+        if cheat_type in self.CHEATING_RESPONSES:
+            self.speak(self._cheating_reminder(self.CHEATING_RESPONSES[cheat_type], self.cheating_warnings), interruptible=False)
+
+    def _cheating_reminder(self, response, notice):
+        return f"Gentle reminder: {response} This is notice {notice} of {self.max_cheating_warnings}."
 
     def __del__(self):
         """Clean up resources"""
@@ -1222,62 +1396,129 @@ class ExpertTechnicalInterviewer:
         self.monitoring_active = False
         if hasattr(self, 'camera_active') and hasattr(self, '_stop_camera'):
             self._stop_camera()
-        if hasattr(self, 'face_monitor_thread'):
-            self.face_monitor_thread.join(timeout=1)
-        if hasattr(self, 'tab_monitor_thread'):
-            self.tab_monitor_thread.join(timeout=1)
+        if hasattr(self, 'microphone'):
+            self._close_microphone()
+        if hasattr(self, 'focus_source'):
+            self.focus_source.stop()
 
 
-    def speak(self, text, interruptible=True):
+    def _enqueue_speech(self, text, interruptible, record_history):
+        """Queue text on the speech worker; returns the future, or None if speech was interrupted"""
         if self.interrupted:
             self.interrupted = False
-            return
+            return None
 
         print(f"Interviewer: {text}")
-        save_to_conversation_history("assistant", text)
-
+        if record_history:
+            save_to_conversation_history("assistant", text, self.session_state)
+        return self.speech.enqueue(text, owner=self, interruptible=interruptible)
+
+    def _speech_failed(self, text, error):
+        print(f"TTS error: {error}")
+        print("[TTS Failed] Audio could not be played")
+        # Fallback to just printing the text
+        print(f"[TEXT ONLY]: {text}")
+
+    def speak(self, text, interruptible=True, record_history=True, wait=True):
+        """Queue text on the speech worker; blocks until spoken unless wait=False (returns the future)"""
         try:
-            # Use Windows built-in TTS
-            import win32com.client
-            speaker = win32com.client.Dispatch("SAPI.SpVoice")
-            speaker.Speak(text)
+            future = self._enqueue_speech(text, interruptible, record_history)
+            if future is None or not wait:
+                return future
+            future.result()
             time.sleep(0.1)
 
         except Exception as e:
-            print(f"Windows TTS error: {e}")
-            print("[TTS Failed] Audio could not be played")
-            # Fallback to just printing the text
-            print(f"[TEXT ONLY]: {text}")
+            self._speech_failed(text, e)
+
+    async def aspeak(self, text, interruptible=True, record_history=True):
+        """speak() for the interview state machine: awaits the utterance without holding a thread"""
+        try:
+            future = self._enqueue_speech(text, interruptible, record_history)
+            if future is None:
+                return
+            await asyncio.wrap_future(future)
+            await asyncio.sleep(0.1)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._speech_failed(text, e)
+
+    def interrupt_speech(self, force=False):
+        """Barge-in: stop this interviewer's queued and current interruptible speech"""
+        return self.speech.cancel(owner=self, force=force)
+
+    def close_speech(self):
+        """Stop speaking and release the TTS engine once the session drops this interviewer"""
+        self.speech.shutdown()
+
+    def speak_streaming(self, chunks, interruptible=True):
+        """Speak streamed text sentence by sentence; history gets the assembled text once"""
+        spoken = []
+        for sentence in iter_sentences(chunks):
+            self.speak(sentence, interruptible=interruptible, record_history=False)
+            spoken.append(sentence)
+
+        text = " ".join(spoken).strip()
+        if text:
+            save_to_conversation_history("assistant", text, self.session_state)
+        return text
+
+    async def aspeak_streaming(self, chunks, interruptible=True):
+        """speak_streaming() over an async stream of text deltas"""
+        spoken = []
+        async for sentence in aiter_sentences(chunks):
+            await self.aspeak(sentence, interruptible=interruptible, record_history=False)
+            spoken.append(sentence)
+
+        text = " ".join(spoken).strip()
+        if text:
+            save_to_conversation_history("assistant", text, self.session_state)
+        return text
+
+    def _publish_partial(self, text):
+        """Expose the in-progress transcript to the UI while the candidate is still speaking"""
+        self.ai_state['partial_transcript'] = text
+        publish_ai_state(self.ai_state)  # Coalesced, so a burst of partials costs one event
+        for listener in list(self.partial_transcript_listeners):
+            try:
+                listener(text)
+            except Exception as e:
+                print(f"Partial transcript listener error: {e}")
 
     def listen(self, max_attempts=3):
         for attempt in range(max_attempts):
             try:
                 print("\nListening... (Speak now)")
                 
-                with sr.Microphone() as source:
-                    self.recognizer.adjust_for_ambient_noise(source)
-                    audio = self.recognizer.listen(source, timeout=10, phrase_time_limit=30)
+                if self.streaming_capture is not None:
+                    audio = self.streaming_capture.capture(timeout=10, phrase_time_limit=30)
+                else:
+                    audio = self.microphone.listen(timeout=10, phrase_time_limit=30)
                 
                 print("Processing your speech...")
                 
-                # Try Google Web Speech API first (fastest but requires internet)
                 try:
-                    text = self.recognizer.recognize_google(audio)
-                    print(f"Candidate: {text}")
+                    result = self.speech_recognizer.transcribe(audio)
+                    self.ai_state['partial_transcript'] = ''
+                    publish_ai_state(self.ai_state)
+                    text = result.text
+                    print(f"Candidate: {text} ({result.backend}, {result.latency:.2f}s)")
                     
                     # Process tone detection
                     tone = self._detect_tone(text)
                     if tone != "professional":
                         self.handle_improper_tone(tone)
                         placeholder = "[Response had non-professional tone]"
-                        save_to_conversation_history("user", placeholder)
+                        save_to_conversation_history("user", placeholder, self.session_state)
                         return placeholder
                     
-                    save_to_conversation_history("user", text)
+                    save_to_conversation_history("user", text, self.session_state)
                     return text
                     
                 except sr.UnknownValueError:
-                    print("Google Web Speech could not understand audio")
+                    print(f"{self.speech_recognizer.name} could not understand audio")
                     raise             
             except Exception as e:
                 print(f"Speech recognition error: {e}")
@@ -1286,11 +1527,15 @@ class ExpertTechnicalInterviewer:
                     time.sleep(0.1)
         
         placeholder = "[Response unclear after multiple attempts]"
-        save_to_conversation_history("user", placeholder)
+        save_to_conversation_history("user", placeholder, self.session_state)
         self.speak("Let's continue with the next part.", interruptible=False)
         return placeholder
 
-    def _rephrase_question(self, question):
+    async def alisten(self, max_attempts=3):
+        """Microphone capture is blocking device I/O; run it on the engine's bounded executor"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.listen, max_attempts)
+
+    async def _rephrase_question(self, question):
         """Rephrase the given question while keeping the same meaning"""
         prompt = f"""Rephrase this interview question to make it clearer while keeping the same meaning:
         Original: {question}
@@ -1304,7 +1549,8 @@ class ExpertTechnicalInterviewer:
         
         Return only the rephrased question."""
         
-        rephrased = self.query_openai(prompt)
+        # Uncached: a second repeat request should hear different wording, not the same rephrase
+        rephrased = await self.aquery_openai(prompt, use_cache=False)
         return rephrased.strip() if rephrased else question
 
     def _detect_tone(self, text):
@@ -1340,41 +1586,98 @@ class ExpertTechnicalInterviewer:
             self.speak("I appreciate your participation, but let's maintain a professional tone throughout our conversation.", interruptible=False)
             return
             
-        responses = {
-            "arrogant": [
-                "I appreciate your confidence! Let's channel that into demonstrating your technical knowledge.",
-                "Great confidence! Now let's see how you apply that expertise to solve problems.",
-            ],
-            "rude": [
-                "I understand technical interviews can be stressful. Let's take a moment and continue professionally.",
-                "No worries, let's refocus on showcasing your technical abilities.",
-            ]
-        }
-        
-        if tone in responses:
-            response = random.choice(responses[tone])
+        if tone in self.TONE_RESPONSES:
+            response = random.choice(self.TONE_RESPONSES[tone])
             self.speak(response, interruptible=False)
             time.sleep(0.1)
 
-    def query_openai(self, prompt):
+    def _prepare_query(self, prompt, use_cache, cache_variant, temperature):
+        """Build chat messages and look up the cache; returns (messages, cache_key, cached)"""
+        if "generate one engaging question" in prompt.lower():
+            prompt += "\n\nImportant: Do not repeat any questions already asked in this conversation."
+
+        cache_key, cached = None, None
+        if use_cache and self.response_cache is not None:
+            cache_key = make_cache_key(self.model, prompt, temperature, cache_variant)
+            cached = self.response_cache.get(cache_key)
+
+        messages = [
+            {"role": "system", "content": "You are an expert technical interviewer.Ask engaging questions. Do not repeat questions already asked . Do not ask same question in differnt way unless candidate asks to repeat the question.Should not be a reworded version of any earlier questions.next question should be related to the candidate's last answer. continue for whole technical discussion phase"},
+            {"role": "user", "content": prompt}
+        ]
+        return messages, cache_key, cached
+
+    def _store_query_result(self, cache_key, content):
+        # Only successful completions are cached, never the error fallback
+        if cache_key and content:
+            self.response_cache.set(cache_key, content)
+
+    def query_openai(self, prompt, use_cache=True, cache_variant=None, temperature=0.7, timeout=None):
+        """Send a prompt to the model. Pass use_cache=False for prompts that should stay creative."""
         try:
-            if "generate one engaging question" in prompt.lower():
-                prompt += "\n\nImportant: Do not repeat any questions already asked in this conversation."
-                
-            response = self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert technical interviewer.Ask engaging questions. Do not repeat questions already asked . Do not ask same question in differnt way unless candidate asks to repeat the question.Should not be a reworded version of any earlier questions.next question should be related to the candidate's last answer. continue for whole technical discussion phase"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
-            return response.choices[0].message.content
+            messages, cache_key, cached = self._prepare_query(prompt, use_cache, cache_variant, temperature)
+            if cached is not None:
+                return cached
+
+            content = self.llm.complete(self.model, messages, temperature=temperature, max_tokens=500, timeout=timeout)
+            self._store_query_result(cache_key, content)
+            return content
         except Exception as e:
             print(f"OpenAI API Error: {e}")
             return "Could you elaborate on your experience with that technology?"
 
+    async def aquery_openai(self, prompt, use_cache=True, cache_variant=None, temperature=0.7, timeout=None):
+        """Awaitable query_openai over the shared connection pool"""
+        try:
+            messages, cache_key, cached = self._prepare_query(prompt, use_cache, cache_variant, temperature)
+            if cached is not None:
+                return cached
+
+            content = await self.llm.acomplete(self.model, messages, temperature=temperature, max_tokens=500, timeout=timeout)
+            self._store_query_result(cache_key, content)
+            return content
+        except Exception as e:
+            print(f"OpenAI API Error: {e}")
+            return "Could you elaborate on your experience with that technology?"
+
+    def query_openai_stream(self, prompt, use_cache=True, temperature=0.7, timeout=None):
+        """Yield the completion as it arrives; a cached answer is yielded whole"""
+        messages, cache_key, cached = self._prepare_query(prompt, use_cache, None, temperature)
+        if cached is not None:
+            yield cached
+            return
+
+        received = []
+        try:
+            for chunk in self.llm.stream(self.model, messages, temperature=temperature, max_tokens=500, timeout=timeout):
+                received.append(chunk)
+                yield chunk
+        except Exception as e:
+            print(f"OpenAI API Error: {e}")
+            if not received:
+                yield "Could you elaborate on your experience with that technology?"
+            return
+        self._store_query_result(cache_key, "".join(received))
+
+    async def aquery_openai_stream(self, prompt, use_cache=True, temperature=0.7, timeout=None):
+        """Async query_openai_stream for coroutines"""
+        messages, cache_key, cached = self._prepare_query(prompt, use_cache, None, temperature)
+        if cached is not None:
+            yield cached
+            return
+
+        received = []
+        try:
+            async for chunk in self.llm.astream(self.model, messages, temperature=temperature, max_tokens=500, timeout=timeout):
+                received.append(chunk)
+                yield chunk
+        except Exception as e:
+            print(f"OpenAI API Error: {e}")
+            if not received:
+                yield "Could you elaborate on your experience with that technology?"
+            return
+        self._store_query_result(cache_key, "".join(received))
+
     def _identify_tech_domain(self, text):
         if not text:
             return None
@@ -1500,7 +1803,7 @@ class ExpertTechnicalInterviewer:
             {transcript_text}
             """
 
-            feedback = self.query_openai(prompt)
+            feedback = self.query_openai(prompt, use_cache=False)
             
             with open("final_interview_feedback.json", "w") as f:
                 f.write(feedback.strip())
@@ -1509,27 +1812,24 @@ class ExpertTechnicalInterviewer:
         except Exception as e:
             print(f"[ERROR] Feedback generation failed: {e}")
 
-    def start_interview(self):
-        # Start tab monitoring
-        def enable_tab_monitor():
-            time.sleep(3)
-            self.tab_monitor_ready = True
-
-        threading.Thread(target=enable_tab_monitor, daemon=True).start()
+    def start_interview(self, wait=True):
+        """Run the interview on the shared engine loop; returns at once if wait is False"""
+        # Start listening for window focus changes
+        self.focus_source.start(self._on_focus_lost)
 
         # Start the interview logic
-        interview_thread = threading.Thread(target=self._run_interview_logic)
-        interview_thread.daemon = True
-        interview_thread.start()
+        self.interview_future = get_interview_engine(self.config.get("engine")).start(self)
 
         # Keep the main thread alive while interview is active
-        while self.interview_active:
-            time.sleep(0.1)
+        if wait:
+            self._ended.wait()
+        return self.interview_future
 
 if __name__ == "__main__":
     try:
         interviewer = ExpertTechnicalInterviewer(
             config_file="interview_config.json",
+            focus_source="desktop"
         )
         interviewer.start_interview()
     except Exception as e:
@@ -0,0 +1,104 @@
+# benchmark_recognizers.py
+"""Compare speech recognition backends on recorded audio fixtures.
+
+Usage: python benchmark_recognizers.py fixtures/ --backends google vosk whisper
+
+Each fixture is a .wav file; an optional .txt file with the same name holds
+the reference transcript used to compute word error rate.
+"""
+
+import argparse
+import glob
+import json
+import os
+
+import speech_recognition as sr
+
+from recognizers import create_recognizer_backend
+
+
+def word_error_rate(reference, hypothesis):
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def load_fixtures(directory):
+    recognizer = sr.Recognizer()
+    fixtures = []
+    for wav_path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        with sr.AudioFile(wav_path) as source:
+            audio = recognizer.record(source)
+        reference = None
+        txt_path = os.path.splitext(wav_path)[0] + ".txt"
+        if os.path.exists(txt_path):
+            with open(txt_path) as f:
+                reference = f.read().strip()
+        fixtures.append((os.path.basename(wav_path), audio, reference))
+    return fixtures
+
+
+def benchmark(backend, fixtures):
+    rows = []
+    for name, audio, reference in fixtures:
+        try:
+            result = backend.transcribe(audio)
+            text, confidence, latency = result.text, result.confidence, result.latency
+        except sr.UnknownValueError:
+            text, confidence, latency = "", None, None
+        except Exception as e:
+            print(f"[{backend.name}] {name}: {e}")
+            text, confidence, latency = "", None, None
+        wer = word_error_rate(reference, text) if reference is not None else None
+        rows.append({"file": name, "text": text, "confidence": confidence, "latency": latency, "wer": wer})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixtures", help="directory of .wav fixtures (with optional .txt references)")
+    parser.add_argument("--backends", nargs="+", default=["google"])
+    parser.add_argument("--config", default="interview_config.json")
+    parser.add_argument("--json", action="store_true", help="print raw results as JSON")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        settings = json.load(f).get("speech_recognition", {})
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error(f"No .wav fixtures found in {args.fixtures}")
+
+    report = {}
+    for name in args.backends:
+        backend = create_recognizer_backend(sr.Recognizer(), settings, name=name)
+        rows = benchmark(backend, fixtures)
+        wers = [r["wer"] for r in rows if r["wer"] is not None]
+        report[name] = {
+            "metrics": backend.metrics(),
+            "avg_wer": sum(wers) / len(wers) if wers else None,
+            "files": rows
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'backend':<10} {'avg latency':>12} {'max latency':>12} {'confidence':>11} {'WER':>6} {'failures':>9}")
+    for name, result in report.items():
+        m = result["metrics"]
+        confidence = f"{m['avg_confidence']:.2f}" if m["avg_confidence"] is not None else "n/a"
+        wer = f"{result['avg_wer']:.2f}" if result["avg_wer"] is not None else "n/a"
+        print(f"{name:<10} {m['avg_latency']:>11.2f}s {m['max_latency']:>11.2f}s {confidence:>11} {wer:>6} {m['failures']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,720 @@
+# code_executor.py
+
+import asyncio
+import atexit
+import codecs
+import ctypes
+import os
+import re
+import select
+import selectors
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from compile_cache import get_compile_cache
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Warm workers, rlimits and process groups need fork/exec; elsewhere runs are plain subprocesses
+POSIX = os.name == "posix"
+
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+
+# Warm interpreters block reading the job from this pipe, so the candidate's stdin stays untouched
+SPEC_FD_ENV = "CODE_RUNNER_FD"
+
+_PYTHON_BOOT = (
+    "import os, runpy, sys\n"
+    "spec = os.fdopen(int(os.environ['CODE_RUNNER_FD'])).read().strip()\n"
+    "sys.argv = [spec]\n"
+    "sys.path.insert(0, os.getcwd())\n"
+    "runpy.run_path(spec, run_name='__main__')\n"
+)
+
+_NODE_BOOT = (
+    "const fs = require('fs'); const path = require('path');"
+    "const spec = path.resolve(fs.readFileSync(Number(process.env.CODE_RUNNER_FD), 'utf8').trim());"
+    "process.argv[1] = spec; require(spec);"
+)
+
+_JAVA_LAUNCHER = """import java.lang.reflect.InvocationTargetException;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.file.Files;
+import java.nio.file.Paths;
+
+public class WarmLauncher {
+    public static void main(String[] args) throws Throwable {
+        String mainClass = new String(Files.readAllBytes(Paths.get("/dev/fd/" + System.getenv("CODE_RUNNER_FD"))), "UTF-8").trim();
+        URLClassLoader loader = new URLClassLoader(new URL[]{Paths.get(".").toUri().toURL()});
+        try {
+            loader.loadClass(mainClass).getMethod("main", String[].class).invoke(null, (Object) new String[0]);
+        } catch (InvocationTargetException e) {
+            throw e.getCause();
+        }
+    }
+}
+"""
+
+LANGUAGE_ALIASES = {
+    "python": "python", "py": "python",
+    "javascript": "javascript", "js": "javascript", "node": "javascript",
+    "java": "java",
+    "c++": "cpp", "cpp": "cpp",
+}
+
+CPP_FLAGS = ["-O2", "-std=c++17"]
+
+
+def normalize_language(language):
+    """Map "Python", "python", "C++", "cpp", ... to the service's language keys; None if unsupported"""
+    return LANGUAGE_ALIASES.get((language or "").strip().lower())
+
+
+def java_main_class(code):
+    match = re.search(r"public\s+(?:final\s+)?class\s+(\w+)", code)
+    return match.group(1) if match else "Main"
+
+
+class _MeteredPopen(subprocess.Popen):
+    """Popen that keeps the child's resource usage (peak RSS, CPU time) when it is reaped"""
+
+    rusage = None
+
+    def _try_wait(self, wait_flags):
+        try:
+            pid, status, rusage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            return (self.pid, 0)
+        if pid == self.pid:
+            self.rusage = rusage
+        return (pid, status)
+
+
+class ExecutionResult:
+    """Outcome of one run; format() gives the text the interviewer has always returned"""
+
+    def __init__(self, language, stdout="", stderr="", returncode=None, timed_out=False,
+                 compile_error=None, error=None, duration=0.0, queued_for=0.0, timeout=None,
+                 cpu_time=None, max_rss_kb=None, cancelled=False):
+        self.language = language
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = returncode
+        self.timed_out = timed_out
+        self.compile_error = compile_error
+        self.error = error  # Could not run at all (unsupported language, queue full, ...)
+        self.duration = duration
+        self.queued_for = queued_for
+        self.timeout = timeout
+        self.cpu_time = cpu_time
+        self.max_rss_kb = max_rss_kb
+        self.cancelled = cancelled
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not (self.timed_out or self.cancelled or self.compile_error or self.error)
+
+    def format(self):
+        if self.error:
+            return self.error
+        if self.cancelled:
+            return "Run cancelled."
+        if self.compile_error is not None:
+            return f"Compile Error:\n{self.compile_error}"
+        if self.timed_out:
+            return f"Error: Code execution timed out ({self.timeout:g} seconds limit)"
+        output = ""
+        if self.stdout:
+            output += f"Output:\n{self.stdout}\n"
+        if self.stderr:
+            output += f"Errors:\n{self.stderr}\n"
+        return output if output else "Code executed successfully (no output)."
+
+    def to_dict(self):
+        return {
+            "language": self.language,
+            "ok": self.ok,
+            "stdout": self.stdout,
+            "stderr": self.stderr,
+            "returncode": self.returncode,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "compile_error": self.compile_error,
+            "error": self.error,
+            "duration": round(self.duration, 3),
+            "queued_for": round(self.queued_for, 3),
+            "cpu_time": round(self.cpu_time, 3) if self.cpu_time is not None else None,
+            "max_rss_kb": self.max_rss_kb
+        }
+
+
+class RunHandle:
+    """A queued or running job: future resolves to its ExecutionResult, cancel() stops it"""
+
+    def __init__(self, future=None):
+        self.future = future
+        self.process = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def _attach(self, process):
+        """Record the job's process; False if the job was cancelled before it started"""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.process = process
+            return True
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            process = self.process
+        if self.future is not None and self.future.cancel():
+            return  # Still queued; it will never start
+        if process is not None:
+            ExecutionService._kill(process)
+
+
+class _Worker:
+    """A sandbox directory, plus (for interpreted languages) an interpreter already started in it"""
+
+    def __init__(self, language, workdir, process=None, spec_fd=None):
+        self.language = language
+        self.workdir = workdir
+        self.process = process
+        self.spec_fd = spec_fd
+        self.created = time.time()
+
+    def alive(self):
+        return self.process is None or self.process.poll() is None
+
+
+class ExecutionService:
+    """Runs candidate code for every session in the process.
+
+    Python, JavaScript and (once the launcher is compiled) Java keep
+    warm_workers interpreters per language started in advance, each blocked
+    waiting for its job; a run takes one and a replacement is started in
+    the background. Every process is used once. Runs get their own
+    directory on tmpfs, CPU/memory/file rlimits, a new process group and,
+    where the kernel allows it, an empty network namespace. At most
+    max_concurrent runs execute at once; up to max_queue more wait their
+    turn and anything beyond that is turned away.
+
+    The sandbox is Linux-only (macOS keeps everything but the network
+    namespace). On Windows, for the desktop interviewer, every run starts
+    cold as a plain subprocess with only the timeout and output cap.
+    """
+
+    def __init__(self, max_concurrent=8, max_queue=200, warm_workers=2, timeout=10.0,
+                 cpu_seconds=5, memory_mb=256, max_output_bytes=64 * 1024, max_file_mb=16,
+                 compile_timeout=30.0, isolate_network=True, work_root=None, compile_cache=None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.warm_workers = warm_workers
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_output_bytes = max_output_bytes
+        self.max_file_mb = max_file_mb
+        self.compile_timeout = compile_timeout
+        self.compile_cache = compile_cache
+        if work_root is None:
+            work_root = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        self.root = tempfile.mkdtemp(prefix="code-exec-", dir=work_root)
+        os.chmod(self.root, 0o711)
+        # Looked up here, in the parent: the dlopen behind it can deadlock in a child forked from a threaded server
+        self._unshare = self._resolve_unshare() if isolate_network else None
+        self.isolate_network = isolate_network and self._probe_network_isolation()
+        if isolate_network and not self.isolate_network:
+            print("[Executor] Network namespaces unavailable; candidate code keeps network access")
+
+        self._lock = threading.Lock()
+        self._idle = {"python": deque(), "javascript": deque(), "java": deque()}
+        self._java_launcher = None  # Directory holding WarmLauncher.class, once compiled
+        self._jobs = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="code-exec")
+        self._refill_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="code-exec-warm")
+        self._closed = False
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.warm_hits = 0
+        self.cold_starts = 0
+        self.total_queue_wait = 0.0
+        self.total_run_time = 0.0
+        if POSIX:
+            for language in self._idle:
+                self._refill_pool.submit(self._refill, language)
+
+    @staticmethod
+    def _resolve_unshare():
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            return ctypes.CDLL(None, use_errno=True).unshare
+        except (OSError, AttributeError):
+            return None
+
+    @staticmethod
+    def _unshare_network(unshare):
+        """Runs in the child: only calls the already resolved libc function"""
+        if unshare(CLONE_NEWUSER | CLONE_NEWNET) != 0:
+            raise OSError(ctypes.get_errno(), "unshare failed")
+
+    def _probe_network_isolation(self):
+        unshare = self._unshare
+        if unshare is None:
+            return False
+        try:
+            subprocess.run(["true"], preexec_fn=lambda: self._unshare_network(unshare), check=True, timeout=5)
+            return True
+        except Exception:
+            return False
+
+    def _sandbox(self, cpu_seconds, memory_mb):
+        """preexec_fn applying the limits in the child, between fork and exec"""
+        unshare = self._unshare if self.isolate_network else None
+        file_bytes = self.max_file_mb * 1024 * 1024
+
+        def apply():
+            if unshare is not None:
+                self._unshare_network(unshare)
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+            if memory_mb:
+                memory = memory_mb * 1024 * 1024
+                resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+            resource.setrlimit(resource.RLIMIT_FSIZE, (file_bytes, file_bytes))
+            resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        return apply
+
+    def _sandbox_options(self, cpu_seconds, memory_mb):
+        """Popen arguments isolating a child: its own process group plus the rlimits (POSIX only)"""
+        if not POSIX:
+            return {}
+        return {"start_new_session": True, "preexec_fn": self._sandbox(cpu_seconds, memory_mb)}
+
+    def _env(self, workdir, spec_fd=None):
+        env = {
+            "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+            "HOME": workdir,
+            "TMPDIR": workdir,
+            "LANG": "C.UTF-8",
+            "PYTHONDONTWRITEBYTECODE": "1",
+            "PYTHONUNBUFFERED": "1",
+        }
+        if spec_fd is not None:
+            env[SPEC_FD_ENV] = str(spec_fd)
+        return env
+
+    def _make_workdir(self):
+        workdir = tempfile.mkdtemp(prefix="run-", dir=self.root)
+        # Sandboxed processes run as an unmapped user and only get the "other" bits
+        os.chmod(workdir, 0o777)
+        return workdir
+
+    def _warm_command(self, language):
+        if not POSIX:
+            return None  # The job is handed over on an inherited pipe fd
+        if language == "python":
+            return [sys.executable, "-I", "-c", _PYTHON_BOOT]
+        if language == "javascript" and shutil.which("node"):
+            return ["node", f"--max-old-space-size={self.memory_mb}", "-e", _NODE_BOOT]
+        if language == "java" and self._ensure_java_launcher():
+            return ["java", f"-Xmx{self.memory_mb}m", "-XX:+UseSerialGC", "-XX:TieredStopAtLevel=1",
+                    "-cp", self._java_launcher, "WarmLauncher"]
+        return None
+
+    def _memory_limit(self, language):
+        # The JVM and V8 reserve far more address space than they use; they get heap flags instead
+        return self.memory_mb if language in ("python", "cpp") else None
+
+    def _ensure_java_launcher(self):
+        if self._java_launcher is not None:
+            return bool(self._java_launcher)
+        launcher_dir = os.path.join(self.root, "java-launcher")
+        try:
+            if not shutil.which("javac") or not shutil.which("java"):
+                raise RuntimeError("javac/java not found")
+            os.makedirs(launcher_dir, exist_ok=True)
+            with open(os.path.join(launcher_dir, "WarmLauncher.java"), "w") as f:
+                f.write(_JAVA_LAUNCHER)
+            subprocess.run(["javac", "WarmLauncher.java"], cwd=launcher_dir, check=True,
+                           capture_output=True, timeout=self.compile_timeout)
+            os.chmod(launcher_dir, 0o755)
+            self._java_launcher = launcher_dir
+        except Exception as e:
+            print(f"[Executor] Java runs start cold: {e}")
+            self._java_launcher = ""
+        return bool(self._java_launcher)
+
+    def _spawn(self, language, command):
+        workdir = self._make_workdir()
+        read_fd, write_fd = os.pipe()
+        try:
+            process = _MeteredPopen(
+                command, cwd=workdir, env=self._env(workdir, read_fd), pass_fds=(read_fd,),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                **self._sandbox_options(self.cpu_seconds, self._memory_limit(language))
+            )
+        except Exception:
+            os.close(write_fd)
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
+        finally:
+            os.close(read_fd)
+        return _Worker(language, workdir, process, write_fd)
+
+    def _refill(self, language):
+        command = self._warm_command(language)
+        if command is None:
+            return
+        while not self._closed:
+            with self._lock:
+                idle = self._idle[language]
+                while idle and not idle[0].alive():
+                    self._discard(idle.popleft())
+                if len(idle) >= self.warm_workers:
+                    return
+            try:
+                worker = self._spawn(language, command)
+            except Exception as e:
+                print(f"[Executor] Could not start a warm {language} worker: {e}")
+                return
+            with self._lock:
+                if self._closed:
+                    self._discard(worker)
+                    return
+                self._idle[language].append(worker)
+
+    def _acquire(self, language):
+        """A warm worker if one is idle, else one started now (or a bare sandbox directory for C++)"""
+        if language in self._idle:
+            with self._lock:
+                idle = self._idle[language]
+                while idle:
+                    worker = idle.popleft()
+                    if worker.alive():
+                        self.warm_hits += 1
+                        self._refill_pool.submit(self._refill, language)
+                        return worker
+                    self._discard(worker)
+            command = self._warm_command(language)
+            if command is not None:
+                with self._lock:
+                    self.cold_starts += 1
+                self._refill_pool.submit(self._refill, language)
+                return self._spawn(language, command)
+        return _Worker(language, self._make_workdir())
+
+    def _discard(self, worker):
+        if worker.process is not None and worker.process.poll() is None:
+            self._kill(worker.process)
+            worker.process.communicate()
+        if worker.spec_fd is not None:
+            try:
+                os.close(worker.spec_fd)
+            except OSError:
+                pass
+            worker.spec_fd = None
+        shutil.rmtree(worker.workdir, ignore_errors=True)
+
+    @staticmethod
+    def _kill(process):
+        """Kill the run's whole process group (the code may have forked)"""
+        if not POSIX:
+            process.kill()
+            return
+        try:
+            os.killpg(process.pid, 9)
+        except (ProcessLookupError, PermissionError):
+            process.kill()
+
+    def _source_name(self, language, code):
+        return {
+            "python": "main.py",
+            "javascript": "main.js",
+            "java": f"{java_main_class(code)}.java",
+            "cpp": "main.cpp",
+        }[language]
+
+    def _compile(self, language, workdir, source_name, code):
+        """Compile in the sandbox directory; returns the compiler's errors, or None on success"""
+        if language == "java":
+            command = ["javac", "-encoding", "UTF-8", "-d", ".", source_name]
+        else:
+            command = ["g++", *CPP_FLAGS, source_name, "-o", "main"]
+        if not shutil.which(command[0]):
+            return f"{command[0]} is not installed on the server"
+        try:
+            if self.compile_cache is None:
+                return self._run_compiler(command, workdir)
+            # Unchanged re-runs and shared boilerplate reuse earlier artifacts instead of compiling
+            return self.compile_cache.compile(command, code, workdir, lambda: self._run_compiler(command, workdir))
+        except subprocess.TimeoutExpired:
+            return f"Compilation timed out ({self.compile_timeout:g} seconds limit)"
+
+    def _run_compiler(self, command, workdir):
+        result = subprocess.run(
+            command, cwd=workdir, env=self._env(workdir), capture_output=True, text=True,
+            timeout=self.compile_timeout, **self._sandbox_options(int(self.compile_timeout), None)
+        )
+        if result.returncode != 0:
+            return result.stderr or result.stdout or "Compilation failed"
+        return None
+
+    def _launch(self, worker, spec):
+        """Release a warm worker onto its job, or start the process for a cold run"""
+        if worker.process is not None:
+            os.write(worker.spec_fd, spec.encode())
+            os.close(worker.spec_fd)
+            worker.spec_fd = None
+            return worker.process
+        worker.process = _MeteredPopen(
+            self._cold_command(worker, spec), cwd=worker.workdir, env=self._env(worker.workdir),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            **self._sandbox_options(self.cpu_seconds, self._memory_limit(worker.language))
+        )
+        return worker.process
+
+    def _cold_command(self, worker, spec):
+        if worker.language == "python":
+            return [sys.executable, "-I", spec]
+        if worker.language == "javascript":
+            return ["node", f"--max-old-space-size={self.memory_mb}", spec]
+        if worker.language == "java":
+            return ["java", f"-Xmx{self.memory_mb}m", "-cp", ".", spec]
+        return [os.path.join(worker.workdir, spec)]  # g++ output; Windows finds main.exe
+
+    def _decode(self, data):
+        text = data[:self.max_output_bytes].decode(errors="replace")
+        if len(data) > self.max_output_bytes:
+            text += f"\n... output truncated at {self.max_output_bytes} bytes"
+        return text
+
+    def _collect(self, process, stdin, timeout, on_output=None):
+        """communicate() that also hands each chunk to on_output(stream, text) as soon as it is read.
+
+        One selector multiplexes stdin, stdout and stderr on the job's thread;
+        returns (stdout, stderr, timed_out) and leaves the process reaped.
+        Windows cannot select() on pipes, so there the output arrives in one piece at the end.
+        """
+        if not POSIX:
+            return self._communicate(process, stdin, timeout, on_output)
+        deadline = time.time() + timeout
+        pending = memoryview(stdin.encode()) if stdin else None
+        output = {"stdout": bytearray(), "stderr": bytearray()}
+        decoders = {name: codecs.getincrementaldecoder("utf-8")("replace") for name in output}
+        timed_out = False
+        with selectors.DefaultSelector() as selector:
+            if pending:
+                selector.register(process.stdin, selectors.EVENT_WRITE)
+            else:
+                process.stdin.close()
+            selector.register(process.stdout, selectors.EVENT_READ, "stdout")
+            selector.register(process.stderr, selectors.EVENT_READ, "stderr")
+            while selector.get_map():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    timed_out = True
+                    self._kill(process)
+                    break
+                for key, _ in selector.select(remaining):
+                    if key.fileobj is process.stdin:
+                        try:
+                            pending = pending[os.write(key.fd, pending[:select.PIPE_BUF]):]
+                        except BrokenPipeError:
+                            pending = None
+                        if not pending:
+                            selector.unregister(process.stdin)
+                            process.stdin.close()
+                        continue
+                    chunk = os.read(key.fd, 65536)
+                    if not chunk:
+                        selector.unregister(key.fileobj)
+                        continue
+                    buffer = output[key.data]
+                    # Past the limit the pipe is still drained so the program is never blocked on it
+                    if len(buffer) <= self.max_output_bytes:
+                        buffer += chunk
+                        text = decoders[key.data].decode(chunk)
+                        if text and on_output is not None:
+                            on_output(key.data, text)
+        process.wait()
+        return bytes(output["stdout"]), bytes(output["stderr"]), timed_out
+
+    def _communicate(self, process, stdin, timeout, on_output=None):
+        timed_out = False
+        try:
+            stdout, stderr = process.communicate(stdin.encode() if stdin else None, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            self._kill(process)
+            stdout, stderr = process.communicate()
+        if on_output is not None:
+            for name, data in (("stdout", stdout), ("stderr", stderr)):
+                if data:
+                    on_output(name, data[:self.max_output_bytes].decode(errors="replace"))
+        return stdout, stderr, timed_out
+
+    def _run(self, language, code, stdin, timeout, queued_at, handle, on_output=None):
+        started = time.time()
+        with self._lock:
+            self.waiting -= 1
+            self.running += 1
+            self.total_queue_wait += started - queued_at
+        result = ExecutionResult(language, queued_for=started - queued_at, timeout=timeout)
+        worker = None
+        try:
+            if handle.cancelled:
+                result.cancelled = True
+                return result
+            worker = self._acquire(language)
+            source_name = self._source_name(language, code)
+            source_path = os.path.join(worker.workdir, source_name)
+            with open(source_path, "w") as f:
+                f.write(code)
+            os.chmod(source_path, 0o644)
+
+            spec = source_name
+            if language in ("java", "cpp"):
+                result.compile_error = self._compile(language, worker.workdir, source_name, code)
+                if result.compile_error is not None:
+                    return result
+                spec = java_main_class(code) if language == "java" else "main"
+
+            process = self._launch(worker, spec)
+            if not handle._attach(process):
+                self._kill(process)
+            stdout, stderr, result.timed_out = self._collect(process, stdin, timeout, on_output)
+            result.cancelled = handle.cancelled
+            result.stdout = self._decode(stdout)
+            result.stderr = self._decode(stderr)
+            result.returncode = process.returncode
+            if process.rusage is not None:
+                result.cpu_time = process.rusage.ru_utime + process.rusage.ru_stime
+                result.max_rss_kb = process.rusage.ru_maxrss  # Kilobytes on Linux
+            return result
+        except Exception as e:
+            result.error = f"Runtime error: {str(e)}"
+            return result
+        finally:
+            if worker is not None:
+                self._discard(worker)
+            result.duration = time.time() - started
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.timed_out += 1 if result.timed_out else 0
+                self.total_run_time += result.duration
+
+    def start(self, language, code, stdin=None, timeout=None, on_output=None):
+        """Queue a run; returns its RunHandle. on_output(stream, text) receives output as it is produced,
+        on a worker thread."""
+        key = normalize_language(language)
+        timeout = timeout or self.timeout
+        if key is None:
+            return self._resolved(ExecutionResult(language, error="Unsupported language.", timeout=timeout))
+        with self._lock:
+            if self._closed or self.waiting + self.running >= self.max_concurrent + self.max_queue:
+                self.rejected += 1
+                return self._resolved(ExecutionResult(
+                    key, error="The code runner is busy right now. Please try again in a moment.", timeout=timeout
+                ))
+            self.waiting += 1
+        handle = RunHandle()
+        handle.future = self._jobs.submit(self._run, key, code, stdin, timeout, time.time(), handle, on_output)
+        handle.future.add_done_callback(self._on_done)
+        return handle
+
+    def submit(self, language, code, stdin=None, timeout=None):
+        """Queue a run; returns a concurrent.futures.Future of an ExecutionResult"""
+        return self.start(language, code, stdin, timeout).future
+
+    def _on_done(self, future):
+        # A run cancelled while queued never reaches _run to leave the queue
+        if future.cancelled():
+            with self._lock:
+                self.waiting -= 1
+
+    @staticmethod
+    def _resolved(result):
+        future = Future()
+        future.set_result(result)
+        return RunHandle(future)
+
+    def run(self, language, code, stdin=None, timeout=None):
+        return self.submit(language, code, stdin, timeout).result()
+
+    async def arun(self, language, code, stdin=None, timeout=None):
+        return await asyncio.wrap_future(self.submit(language, code, stdin, timeout))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "running": self.running,
+                "queued": self.waiting,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "warm_idle": {language: len(idle) for language, idle in self._idle.items()},
+                "warm_hits": self.warm_hits,
+                "cold_starts": self.cold_starts,
+                "network_isolated": self.isolate_network,
+                "compile_cache": self.compile_cache.stats() if self.compile_cache else None,
+                "avg_queue_wait": self.total_queue_wait / self.completed if self.completed else 0.0,
+                "avg_run_time": self.total_run_time / self.completed if self.completed else 0.0
+            }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            workers = [worker for idle in self._idle.values() for worker in idle]
+            for idle in self._idle.values():
+                idle.clear()
+        for worker in workers:
+            self._discard(worker)
+        self._refill_pool.shutdown(wait=False, cancel_futures=True)
+        self._jobs.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+
+def get_execution_service(settings=None):
+    """Process-wide code runner shared by every session"""
+    global _shared_service
+    with _shared_service_lock:
+        if _shared_service is None:
+            settings = settings or {}
+            _shared_service = ExecutionService(
+                max_concurrent=settings.get("max_concurrent", 8),
+                max_queue=settings.get("max_queue", 200),
+                warm_workers=settings.get("warm_workers", 2),
+                timeout=settings.get("timeout_seconds", 10.0),
+                cpu_seconds=settings.get("cpu_seconds", 5),
+                memory_mb=settings.get("memory_mb", 256),
+                max_output_bytes=settings.get("max_output_bytes", 64 * 1024),
+                compile_timeout=settings.get("compile_timeout", 30.0),
+                isolate_network=settings.get("isolate_network", True),
+                work_root=settings.get("work_root"),
+                compile_cache=get_compile_cache(settings.get("compile_cache"))
+            )
+            # Idle warm workers and the tmpfs directory would otherwise outlive the server
+            atexit.register(_shared_service.shutdown)
+        return _shared_service
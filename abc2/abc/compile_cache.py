@@ -0,0 +1,210 @@
+# compile_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+
+def compiler_version(compiler):
+    """First line of the compiler's version banner (javac prints it on stderr)"""
+    flag = "-version" if os.path.basename(compiler) == "javac" else "--version"
+    try:
+        result = subprocess.run([compiler, flag], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return "unknown"
+    banner = (result.stdout or result.stderr).strip()
+    return banner.splitlines()[0] if banner else "unknown"
+
+
+class CompileCache:
+    """On-disk cache of compiler output keyed by source, compiler version and command line.
+
+    Each entry is a directory holding the artifacts (the C++ binary, the
+    Java .class files) or the compiler's error text. Entries are built in a
+    temporary directory and renamed into place, so several processes can
+    share one cache directory. A hit refreshes the entry's mtime; once the
+    cache grows past max_bytes the least recently used entries are removed.
+    Concurrent compiles of the same source in this process run the compiler once.
+    """
+
+    ERROR_FILE = ".compile-error"
+
+    def __init__(self, cache_dir=None, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "abc-compile-cache")
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._building = {}  # key -> Event set when the compile finishes
+        self._versions = {}
+        self._size = self._disk_usage()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # Compiles that waited for an identical one already running
+        self.evictions = 0
+
+    def key(self, command, source):
+        compiler = command[0]
+        with self._lock:
+            version = self._versions.get(compiler)
+        if version is None:
+            version = compiler_version(compiler)
+            with self._lock:
+                self._versions[compiler] = version
+        raw = json.dumps([version, command, source])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def compile(self, command, source, workdir, build):
+        """Put command's output for source into workdir, running build() only on a miss.
+
+        build() compiles in workdir and returns the compiler's errors or None.
+        Returns the same. Exceptions from build() (e.g. a timeout) are not cached.
+        """
+        key = self.key(command, source)
+        entry = os.path.join(self.cache_dir, key)
+        while True:
+            found, error = self._restore(entry, workdir)
+            if found:
+                with self._lock:
+                    self.hits += 1
+                return error
+            with self._lock:
+                pending = self._building.get(key)
+                if pending is None:
+                    self._building[key] = threading.Event()
+                    self.misses += 1
+                    break
+                self.shared += 1
+            pending.wait()
+            # Usually a hit now; if that compile failed to store, build it here instead
+
+        try:
+            before = set(os.listdir(workdir))
+            error = build()
+            self._store(entry, workdir, before, error)
+            return error
+        finally:
+            with self._lock:
+                self._building.pop(key).set()
+
+    def _restore(self, entry, workdir):
+        copied = []
+        try:
+            names = os.listdir(entry)
+            if self.ERROR_FILE in names:
+                with open(os.path.join(entry, self.ERROR_FILE)) as f:
+                    error = f.read()
+            else:
+                error = None
+                for name in names:
+                    # Copied, not hard-linked: a run that opens Main.class for writing must not
+                    # truncate the cached artifact other runs (and sibling test cases) use
+                    shutil.copy2(os.path.join(entry, name), os.path.join(workdir, name))
+                    copied.append(name)
+            os.utime(entry)
+        except FileNotFoundError:
+            # Not cached, or evicted while we were reading it
+            for name in copied:
+                os.remove(os.path.join(workdir, name))
+            return False, None
+        return True, error
+
+    def _store(self, entry, workdir, before, error):
+        tmp_entry = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir)
+        try:
+            if error is not None:
+                with open(os.path.join(tmp_entry, self.ERROR_FILE), "w") as f:
+                    f.write(error)
+            else:
+                for name in os.listdir(workdir):
+                    if name not in before:
+                        shutil.copy2(os.path.join(workdir, name), os.path.join(tmp_entry, name))
+            size = self._entry_size(tmp_entry)
+            os.rename(tmp_entry, entry)
+        except OSError as e:
+            # Another process stored the same entry first, or the disk is full
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            if not os.path.isdir(entry):
+                print(f"[Compile Cache] Could not store entry: {e}")
+            return
+        with self._lock:
+            self._size += size
+            over = self._size > self.max_bytes
+        if over:
+            self._evict()
+
+    @staticmethod
+    def _entry_size(path):
+        total = 0
+        for name in os.listdir(path):
+            try:
+                total += os.path.getsize(os.path.join(path, name))
+            except OSError:
+                pass
+        return total
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(".tmp-"):
+                continue
+            try:
+                entries.append((os.path.getmtime(path), self._entry_size(path), path))
+            except OSError:
+                pass
+        return entries
+
+    def _disk_usage(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_bytes"""
+        entries = sorted(self._entries())  # Rescan: other processes may share the directory
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._size = total
+            self.evictions += evicted
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_compiles": self.shared,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_compile_cache(settings=None):
+    """Process-wide compile cache; None when disabled in config"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            settings = settings or {}
+            if not settings.get("enabled", True):
+                return None
+            _shared_cache = CompileCache(
+                cache_dir=settings.get("dir"),
+                max_bytes=int(settings.get("max_mb", 512) * 1024 * 1024)
+            )
+        return _shared_cache
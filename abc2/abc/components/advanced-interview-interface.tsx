@@ -14,11 +14,27 @@ declare global {
   }
 }
  interface Message {
+    seq?: number
     speaker: "AI" | "User"
     message: string
     timestamp: number
   }
 
+const formatWarning = (w: any) => {
+  switch (w.type) {
+    case "face_absence":
+      return "⚠️ Face not visible in camera";
+    case "gaze_absence":
+      return "⚠️ Looking away from screen detected";
+    case "camera_off":
+      return "⚠️ Camera turned off";
+    case "tab_switch":
+      return "⚠️ Tab switch detected";
+    default:
+      return `⚠️ ${w.message || "Unknown warning"}`;
+  }
+}
+
 
 export default function GoogleMeetInterview() {
   const [isMuted, setIsMuted] = useState(false)
@@ -41,6 +57,7 @@ export default function GoogleMeetInterview() {
   const [gotResponse, setGotResponse] = useState(false)
   const [interviewEndedHandled, setInterviewEndedHandled] = useState(false)
   const [interviewTerminated, setInterviewTerminated] = useState(false)
+  const [eventsReady, setEventsReady] = useState(false)
   
 
 
@@ -75,42 +92,45 @@ export default function GoogleMeetInterview() {
   const fetchInterviewStatus = async () => {
     try {
       const res = await fetch("http://localhost:5000/api/interview-status")
-      const data = await res.json()
-      console.log(" Interview Status:", data)
-      setInterviewStatus(data)
+      applyInterviewStatus(await res.json())
+    } catch (error) {
+      console.error("Failed to fetch interview status:", error)
+    }
+  }
 
-      // ✅ Handle forced termination or conclusion
-      if (!data.active || data.stage === 'terminated_due_to_violations' || data.stage === 'concluded') {
-        console.log(" Interview ended. Showing popup and resetting UI.")
+  // Normally fed by "status" events from /api/events
+  const applyInterviewStatus = (data: any) => {
+    console.log(" Interview Status:", data)
+    setInterviewStatus(data)
 
-        // Stop video/audio stream
-        if (mediaStreamRef.current) {
-          mediaStreamRef.current.getTracks().forEach(track => track.stop())
-          mediaStreamRef.current = null
-        }
+    // ✅ Handle forced termination or conclusion
+    if (!data.active || data.stage === 'terminated_due_to_violations' || data.stage === 'concluded') {
+      console.log(" Interview ended. Showing popup and resetting UI.")
 
-        if (videoRef.current) {
-          videoRef.current.srcObject = null
-        }
+      // Stop video/audio stream
+      if (mediaStreamRef.current) {
+        mediaStreamRef.current.getTracks().forEach(track => track.stop())
+        mediaStreamRef.current = null
+      }
 
-        // Show popup and reset state
-        setShowEndPopup(true)
-        setInterviewStarted(false)
-        setShowCodeEditor(false)
-        setIsAISpeaking(false)
-        setWarnings([])
-        return
+      if (videoRef.current) {
+        videoRef.current.srcObject = null
       }
 
+      // Show popup and reset state
+      setShowEndPopup(true)
+      setInterviewStarted(false)
+      setShowCodeEditor(false)
+      setIsAISpeaking(false)
+      setWarnings([])
+      return
+    }
 
-      // Auto-open code editor if in coding stage
-      if (data.stage === 'coding_challenges' && !showCodeEditor && data.current_question) {
-        setQuestion(data.current_question)
-        setShowCodeEditor(true)
-      }
 
-    } catch (error) {
-      console.error("Failed to fetch interview status:", error)
+    // Auto-open code editor if in coding stage
+    if (data.stage === 'coding_challenges' && !showCodeEditor && data.current_question) {
+      setQuestion(data.current_question)
+      setShowCodeEditor(true)
     }
   }
 
@@ -212,11 +232,14 @@ export default function GoogleMeetInterview() {
   // Start Interview
   useEffect(() => {
     if (interviewStarted && !showCodeEditor) {
+      setEventsReady(false)
       fetch("http://localhost:5000/api/start-interview", { method: "POST" })
         .then(res => res.json())
         .then(data => {
           if (data?.message) console.log("Interview started:", data.message)
           fetchInterviewStatus()
+          // Subscribe only once the session is live, or the stream's first status reads as "ended"
+          setEventsReady(true)
         })
         .catch(() => console.error("❌ Failed to start interview"))
     }
@@ -270,51 +293,82 @@ export default function GoogleMeetInterview() {
   }, [interviewStarted]);
 
 
-  useEffect(() => {
-    const fetchTranscript = async () => {
-      try {
-        console.log("🔍 Fetching transcript...")
-        const res = await fetch("http://localhost:5000/api/transcript")
-
-        if (!res.ok) {
-          console.error("❌ Transcript fetch failed:", res.status, res.statusText)
-          return
-        }
-
-        const data = await res.json()
-        console.log("📝 Raw transcript data:", data)
+  const fetchTranscript = async () => {
+    try {
+      console.log("🔍 Fetching transcript...")
+      const res = await fetch("http://localhost:5000/api/transcript")
 
-        if (data.transcript && data.transcript.length > 0) {
-          console.log("✅ Setting transcript with", data.transcript.length, "entries")
-          setTranscript(data.transcript)
-        } else {
-          console.log("📭 No transcript entries found")
-        }
-      } catch (err) {
-        console.error("❌ Failed to fetch transcript:", err)
+      if (!res.ok) {
+        console.error("❌ Transcript fetch failed:", res.status, res.statusText)
+        return
       }
-    }
 
-    if (interviewStarted) {
-      // Fetch immediately
-      fetchTranscript()
+      const data = await res.json()
+      console.log("📝 Raw transcript data:", data)
 
-      // Then fetch every 3 seconds
-      const interval = setInterval(fetchTranscript, 3000)
-      return () => clearInterval(interval)
+      if (data.transcript && data.transcript.length > 0) {
+        console.log("✅ Setting transcript with", data.transcript.length, "entries")
+        setTranscript(data.transcript)
+      } else {
+        console.log("📭 No transcript entries found")
+      }
+    } catch (err) {
+      console.error("❌ Failed to fetch transcript:", err)
     }
-  }, [interviewStarted])
+  }
 
+  const fetchWarnings = () => {
+    fetch("http://localhost:5000/api/get-warnings")
+      .then(res => res.json())
+      .then(data => {
+        console.log("🚨 Fetched warnings:", data); // Debug log
+        if (data?.warnings) {
+          setWarnings(data.warnings.map(formatWarning));
+          setInterviewTerminated(data.stage === "terminated_due_to_violations")
+        }
+      })
+      .catch(error => {
+        console.error("❌ Error fetching warnings:", error);
+      });
+  }
+
+  // One Server-Sent Events stream replaces polling ai-state, interview-status, get-warnings and transcript
   useEffect(() => {
-    if (interviewStarted) {
-      // Fetch immediately
-      fetchAiState()
+    if (!interviewStarted || !eventsReady) return
 
-      // Then poll every 500ms for responsive UI
-      const interval = setInterval(fetchAiState, 500)
-      return () => clearInterval(interval)
+    const events = new EventSource("http://localhost:5000/api/events")
+    const parse = (e: Event) => JSON.parse((e as MessageEvent).data)
+
+    // The stream opens with the current ai_state and status; catch up on what it does not replay
+    events.onopen = () => {
+      fetchTranscript()
+      fetchWarnings()
     }
-  }, [interviewStarted])
+    events.addEventListener("ai_state", (e) => {
+      const data = parse(e)
+      setAiState(data)
+      setIsAISpeaking(data.is_speaking)
+    })
+    events.addEventListener("status", (e) => applyInterviewStatus(parse(e)))
+    events.addEventListener("warning", (e) => {
+      const data = parse(e)
+      setWarnings(prev => [...prev, formatWarning(data)])
+      setInterviewTerminated(data.count >= 3)
+    })
+    events.addEventListener("transcript", (e) => {
+      const entry = parse(e)
+      setTranscript(prev => prev.some(m => m.seq === entry.seq) ? prev : [...prev, entry])
+    })
+    // Events were dropped for a slow connection; refetch everything once
+    events.addEventListener("resync", () => {
+      fetchAiState()
+      fetchInterviewStatus()
+      fetchTranscript()
+      fetchWarnings()
+    })
+
+    return () => events.close()
+  }, [interviewStarted, eventsReady])
 
   // Also add this debug useEffect to monitor transcript changes:
   useEffect(() => {
@@ -419,80 +473,6 @@ export default function GoogleMeetInterview() {
     }
   }
 
-  useEffect(() => {
-    if (!interviewStarted) return;
-
-    const interval = setInterval(() => {
-      fetch("http://localhost:5000/api/get-warnings")
-        .then(res => res.json())
-        .then(data => {
-          const newWarnings = data.warnings?.map((w: any) => `⚠️ ${w.message}`) || []
-          setWarnings(newWarnings)
-          setInterviewTerminated(data.stage === "terminated_due_to_violations")
-        })
-        .catch(console.error)
-    }, 3000)
-
-    return () => clearInterval(interval)
-  }, [interviewStarted])
-
-  // Poll interview status
-  useEffect(() => {
-    if (interviewStarted) {
-      const interval = setInterval(fetchInterviewStatus, 3000)
-      return () => clearInterval(interval)
-    }
-  }, [interviewStarted])
-
-  // Poll tab/camera warnings
-  // Replace the existing warning polling useEffect with this:
-  useEffect(() => {
-    if (!interviewStarted) return;
-
-    const pollWarnings = () => {
-      fetch("http://localhost:5000/api/get-warnings")
-        .then(res => res.json())
-        .then(data => {
-          console.log("🚨 Fetched warnings:", data); // Debug log
-
-          if (data?.warnings) {
-            const formattedWarnings = data.warnings.map((w: any) => {
-              switch (w.type) {
-                case "face_absence":
-                  return "⚠️ Face not visible in camera";
-                case "gaze_absence":
-                  return "⚠️ Looking away from screen detected";
-                case "camera_off":
-                  return "⚠️ Camera turned off";
-                case "tab_switch":
-                  return "⚠️ Tab switch detected";
-                default:
-                  return `⚠️ ${w.message || "Unknown warning"}`;
-              }
-            });
-
-            console.log("📋 Setting warnings:", formattedWarnings); // Debug log
-            setWarnings(formattedWarnings);
-
-            // Check for termination
-            if (data.warnings.length >= 3) {
-              console.log("🔴 3+ violations detected, fetching status...");
-              fetchInterviewStatus();
-            }
-          }
-        })
-        .catch(error => {
-          console.error("❌ Error fetching warnings:", error);
-        });
-    };
-
-    // Poll immediately, then every 3 seconds
-    pollWarnings();
-    const interval = setInterval(pollWarnings, 3000);
-
-    return () => clearInterval(interval);
-  }, [interviewStarted]); // Only depend on interviewStarted
-
   useEffect(() => {
     if (
       !interviewEndedHandled &&
@@ -0,0 +1,238 @@
+# event_log.py
+
+import atexit
+import base64
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class EventLog:
+    """Append-only JSONL log of one session's conversation.
+
+    Appends go to a small in-process buffer; the store's flusher writes and
+    fsyncs every dirty log in one pass per flush_interval, so a burst of
+    turns costs one fsync. Only the last tail_size events stay in memory;
+    anything older is read back from disk by byte offset. Reopening a log
+    after a crash drops a half-written last line and carries on.
+    """
+
+    def __init__(self, path, tail_size=50, flush_bytes=64 * 1024):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self._tail = deque(maxlen=tail_size)
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._synced = True
+        self.count = 0
+        self.size = 0  # Bytes in the log, including the unwritten buffer
+        self._recover()
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        # Identifies this file in cursors, so a cursor into an archived log is never reused
+        self.file_id = os.fstat(self._fd).st_ino
+
+    def _recover(self):
+        if not os.path.exists(self.path):
+            return
+        good = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break
+                good += len(line)
+                self.count += 1
+                self._tail.append(event)
+        if good != os.path.getsize(self.path):
+            print(f"[Event Log] Dropping a partial record at the end of {self.path}")
+            os.truncate(self.path, good)
+        self.size = good
+
+    def append(self, event):
+        """Add an event; returns the byte offset it was written at (None once the log is closed)"""
+        record = self.append_record(event)
+        return record[1] if record else None
+
+    def append_record(self, event):
+        """Add an event; returns (stored event with seq, offset, next offset), None once closed"""
+        with self._lock:
+            if self._fd is None:
+                return None  # A replaced interview still winding down
+            event = dict(event, seq=self.count)
+            line = (json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+            offset = self.size
+            self._buffer += line
+            self.size += len(line)
+            self.count += 1
+            self._synced = False
+            self._tail.append(event)
+            if len(self._buffer) >= self.flush_bytes:
+                self._write_locked()
+            return event, offset, self.size
+
+    def _write_locked(self):
+        if self._buffer and self._fd is not None:
+            os.write(self._fd, self._buffer)
+            self._buffer.clear()
+
+    def flush(self, sync=True):
+        with self._lock:
+            self._write_locked()
+            fd = self._fd if sync and not self._synced else None
+            if fd is not None:
+                self._synced = True
+        # Appends carry on into the buffer while the disk catches up
+        if fd is not None:
+            os.fsync(fd)
+
+    @property
+    def dirty(self):
+        return not self._synced
+
+    def tail(self, n=None):
+        """The most recent events, from memory"""
+        with self._lock:
+            events = list(self._tail)
+        return events[-n:] if n else events
+
+    def read(self, offset=0, limit=None):
+        """Events from byte offset on, read from disk; returns (events, next_offset)"""
+        with self._lock:
+            self._write_locked()  # Readers see everything appended so far, synced or not
+            end = self.size
+        events = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while f.tell() < end and (limit is None or len(events) < limit):
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                events.append(json.loads(line))
+            return events, f.tell()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def cursor(self, offset=None):
+        """Opaque position for clients: the file's identity plus a byte offset"""
+        return f"{self.file_id}-{self.size if offset is None else offset}"
+
+    def parse_cursor(self, cursor):
+        """Byte offset for a cursor from cursor(); 0 if it belongs to another file, is malformed
+        or does not fall between two records"""
+        try:
+            file_id, offset = (int(part) for part in str(cursor).split("-", 1))
+        except ValueError:
+            return 0
+        if file_id != self.file_id or not self._at_record_boundary(offset):
+            return 0
+        return offset
+
+    def _at_record_boundary(self, offset):
+        # JSON escapes newlines inside strings, so a record starts exactly where a newline ends
+        with self._lock:
+            if offset == 0 or offset == self.size:
+                return True
+            if not 0 < offset < self.size:
+                return False
+            self._write_locked()
+        with open(self.path, "rb") as f:
+            f.seek(offset - 1)
+            return f.read(1) == b"\n"
+
+    def __len__(self):
+        return self.count
+
+
+class EventLogStore:
+    """Opens session logs under one directory and runs the shared fsync flusher"""
+
+    def __init__(self, log_dir="session_logs", tail_size=50, flush_interval=0.5, flush_bytes=64 * 1024):
+        self.log_dir = log_dir
+        self.tail_size = tail_size
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        os.makedirs(log_dir, exist_ok=True)
+        self._logs = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="event-log-flush", daemon=True)
+        self._flusher.start()
+
+    def path(self, log_id):
+        # Reversible, so distinct ids never share a file ("a.b" and "ab" used to)
+        safe_id = base64.urlsafe_b64encode(log_id.encode("utf-8")).decode("ascii").rstrip("=")
+        return os.path.join(self.log_dir, f"{safe_id}.jsonl")
+
+    def open(self, log_id):
+        with self._lock:
+            log = self._logs.get(log_id)
+            if log is None:
+                log = EventLog(self.path(log_id), tail_size=self.tail_size, flush_bytes=self.flush_bytes)
+                self._logs[log_id] = log
+            return log
+
+    def close(self, log_id, archive=False):
+        """Close a log; archive renames the file aside so the id starts a fresh log"""
+        with self._lock:
+            log = self._logs.pop(log_id, None)
+        if log is not None:
+            log.close()
+        path = self.path(log_id)
+        if archive and os.path.exists(path):
+            os.replace(path, f"{path[:-len('.jsonl')]}.{int(time.time() * 1000)}.jsonl")
+
+    def _flush_loop(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush_all()
+
+    def flush_all(self):
+        with self._lock:
+            logs = list(self._logs.values())
+        for log in logs:
+            if log.dirty:
+                try:
+                    log.flush()
+                except OSError as e:
+                    print(f"[Event Log] Flush failed for {log.path}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {"open_logs": len(self._logs), "log_dir": self.log_dir}
+
+    def shutdown(self):
+        self._stopped.set()
+        with self._lock:
+            logs = list(self._logs.values())
+            self._logs.clear()
+        for log in logs:
+            log.close()
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_event_log_store(settings=None):
+    """Process-wide store; settings come from the "event_log" config section"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            settings = settings or {}
+            _shared_store = EventLogStore(
+                log_dir=settings.get("dir", "session_logs"),
+                tail_size=settings.get("tail_size", 50),
+                flush_interval=settings.get("flush_interval", 0.5),
+                flush_bytes=settings.get("flush_bytes", 64 * 1024)
+            )
+            atexit.register(_shared_store.shutdown)
+        return _shared_store
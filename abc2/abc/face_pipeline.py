@@ -0,0 +1,120 @@
+# face_pipeline.py
+
+import cv2
+import numpy as np
+
+
+class FaceObservation:
+    """Result of one pipeline pass; presence and gaze are both read from it"""
+
+    def __init__(self, face=None, eyes=(), tracked=False):
+        self.face = face      # (x, y, w, h) in full-frame coordinates, or None
+        self.eyes = eyes      # eye boxes relative to the face's upper half
+        self.tracked = tracked  # True if found by searching around the last face only
+
+    @property
+    def face_present(self):
+        # Eyes inside the face box reduce false positives from face-like patterns
+        return self.face is not None and len(self.eyes) > 0
+
+    def gaze_away(self):
+        """True if looking away, False if looking at the screen, None if undetermined"""
+        if self.face is None:
+            return False
+        if len(self.eyes) < 2:
+            return None
+
+        x, y, w, h = self.face
+        eyes = sorted(self.eyes, key=lambda e: e[0])[:2]
+        eye_centers = [(x + ex + ew // 2, y + ey + eh // 2) for (ex, ey, ew, eh) in eyes]
+
+        # If eyes are not horizontally aligned (looking left/right)
+        dx = eye_centers[1][0] - eye_centers[0][0]
+        dy = eye_centers[1][1] - eye_centers[0][1]
+        if abs(np.degrees(np.arctan2(dy, dx))) > 15:
+            return True
+
+        # If eyes are significantly off-center (20% of face width)
+        avg_eye_x = (eye_centers[0][0] + eye_centers[1][0]) / 2
+        return abs(avg_eye_x - (x + w // 2)) > w * 0.2
+
+
+class FacePipeline:
+    """Single-pass face and eye detection for one camera feed.
+
+    The frame is converted to gray once and the face cascade runs on a
+    downscaled copy. Between full detections only the area around the last
+    face is searched. The eye cascade runs once, on the upper half of the face.
+    """
+
+    def __init__(self, face_detector, eye_detector, detect_width=320, full_detect_every=5, roi_margin=0.3):
+        self.face_detector = face_detector
+        self.eye_detector = eye_detector
+        self.detect_width = detect_width
+        self.full_detect_every = full_detect_every
+        self.roi_margin = roi_margin
+        self._last_face = None  # Last face box, in full-frame coordinates
+        self._since_full = 0
+        self.full_detections = 0
+        self.tracked_detections = 0
+
+    def reset(self):
+        self._last_face = None
+        self._since_full = 0
+
+    def snapshot(self):
+        """Tracking state, so another process can continue where this pipeline left off"""
+        return (self._last_face, self._since_full)
+
+    def restore(self, state):
+        self._last_face, self._since_full = state or (None, 0)
+
+    def analyze(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # One scale for the whole frame, so a tracked region is searched at the same resolution
+        scale = min(1.0, self.detect_width / gray.shape[1])
+
+        face, tracked = None, False
+        if self._last_face is not None and self._since_full < self.full_detect_every:
+            face = self._detect_near(gray, self._last_face, scale)
+            tracked = face is not None
+        if face is None:
+            face = self._detect_full(gray, scale)
+
+        self._last_face = face
+        if face is None:
+            return FaceObservation()
+
+        x, y, w, h = face
+        eyes = self.eye_detector.detectMultiScale(gray[y:y + h // 2, x:x + w], 1.1, 4)
+        return FaceObservation(face, tuple(tuple(int(v) for v in e) for e in eyes), tracked)
+
+    def _detect_full(self, gray, scale):
+        self._since_full = 0
+        self.full_detections += 1
+        return self._detect(gray, scale, 0, 0)
+
+    def _detect_near(self, gray, face, scale):
+        self._since_full += 1
+        self.tracked_detections += 1
+        x, y, w, h = face
+        mx, my = int(w * self.roi_margin), int(h * self.roi_margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(gray.shape[1], x + w + mx), min(gray.shape[0], y + h + my)
+        return self._detect(gray[y0:y1, x0:x1], scale, x0, y0)
+
+    def _detect(self, gray, scale, offset_x, offset_y):
+        """Run the face cascade on a downscaled copy of gray; return the largest face in full-frame coordinates"""
+        height, width = gray.shape[:2]
+        if int(width * scale) < 24 or int(height * scale) < 24:
+            return None  # Smaller than the cascade window
+        small = gray if scale == 1.0 else cv2.resize(gray, (int(width * scale), int(height * scale)),
+                                                     interpolation=cv2.INTER_AREA)
+        faces = self.face_detector.detectMultiScale(small, 1.1, 4)
+        if len(faces) == 0:
+            return None
+        fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+        return (offset_x + int(fx / scale), offset_y + int(fy / scale), int(fw / scale), int(fh / scale))
+
+    def stats(self):
+        return {"full_detections": self.full_detections, "tracked_detections": self.tracked_detections}
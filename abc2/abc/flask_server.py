@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 
 from datetime import datetime, timedelta
@@ -10,34 +10,65 @@ import threading
 import random
 
 from backend import ExpertTechnicalInterviewer
-from shared_state import interview_state, save_to_conversation_history, ai_state
+from shared_state import (ai_state, save_to_conversation_history, conversation_log, public_state,
+                          status_snapshot, transcript_entry, publish_ai_state, publish_status, set_stage, add_warning)
+from session_registry import SessionRegistry, SessionLimitError, SessionNotFoundError, resolve_session_id
+from vision_models import get_vision_registry
+from frame_ingest import decode_frame, FrameDecodeError
+from focus_events import LOST_EVENTS, REGAINED_EVENTS
+from event_log import get_event_log_store
+from interview_engine import get_interview_engine
+from code_executor import get_execution_service
+from ui_events import get_ui_event_bus
 
 
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Session-Id'])
 
 # Global variables
-interviewer = None
+# One InterviewSession per candidate; idle sessions are evicted after the TTL
+sessions = SessionRegistry(ttl_seconds=30 * 60, max_sessions=200)
+# Interview links are issued per process, not per session
+interview_links = {}
 interview_thread = None
 interview_stop_event = threading.Event()
 
-# Initialize violation state tracking in interview_state
-if 'current_violation_state' not in interview_state:
-    interview_state['current_violation_state'] = {
-        'face_absent_since': None,
-        'gaze_away_since': None,
-        'last_violation_type': None
-    }
-
-# Initialize warnings list if not exists
-if 'warnings' not in interview_state:
-    interview_state['warnings'] = []
-
-def initialize_interviewer():
-    global interviewer
+# Load the face/eye cascades at startup so /api/start-interview never waits on them
+try:
+    with open("interview_config.json") as f:
+        startup_config = json.load(f)
+    get_event_log_store(startup_config.get("event_log"))
+    get_ui_event_bus(startup_config.get("ui_events"))
+    get_vision_registry(startup_config.get("vision")).warm()
+except Exception as e:
+    print(f"[Vision] Could not preload models: {e}")
+
+def current_session(create=False):
+    """Resolve the session for the current request.
+
+    Only /api/start-interview creates sessions; anywhere else an unknown id is a 404,
+    so arbitrary ids cannot fill the session cap.
+    """
+    session_id = resolve_session_id(request)
+    if create:
+        return sessions.get_or_create(session_id)
+    session = sessions.get(session_id)
+    if session is None:
+        raise SessionNotFoundError(f"No interview session {session_id}")
+    return session
+
+@app.errorhandler(SessionLimitError)
+def session_limit_reached(e):
+    return jsonify({'error': str(e)}), 503
+
+@app.errorhandler(SessionNotFoundError)
+def session_not_found(e):
+    return jsonify({'error': str(e)}), 404
+
+def initialize_interviewer(session):
     try:
-        interviewer = ExpertTechnicalInterviewer(accent="indian")
+        session.interviewer = ExpertTechnicalInterviewer(accent="indian", session_state=session.state, ai_state=session.ai_state)
         return True
     except Exception as e:
         print(f"Failed to initialize interviewer: {e}")
@@ -45,116 +76,113 @@ def initialize_interviewer():
 
 @app.route('/api/start-interview', methods=['POST'])
 def start_interview():
-    global interviewer, interview_state
+    session = current_session(create=True)
 
-    if not initialize_interviewer():
+    # Restarting a session replaces only that session's interview
+    session.reset(stage='greeting')
+
+    if not initialize_interviewer(session):
         return jsonify({'error': 'Failed to initialize interviewer'}), 500
 
     # Reset interview state
-    interview_state.update({
-        'active': True,
-        'stage': 'greeting',
-        'conversation_history': [],
-        'skill_questions_asked': 0,
-        'coding_questions_asked': 0,
-        'warnings': [],
-        'personal_info_collected': False,
-        'tech_background_collected': False,
-        'skills_collected': '',
-        'current_domain': None,
-        'current_question': None,
-        'interview_links': {}
-    })
+    session.state['active'] = True
+    publish_status(session.state)
 
-   
     try:
-        import threading
-        threading.Thread(target=interviewer.start_interview, daemon=True).start()
+        # Runs on the shared interview engine loop; no thread per interview
+        session.interviewer.start_interview(wait=False)
     except Exception as e:
         print(f"🔥 Interview launch error: {e}")
         return jsonify({'error': 'Failed to launch interview thread'}), 500
 
-    return jsonify({
+    response = jsonify({
         'status': 'started',
+        'session_id': session.session_id,
         'interview_active': True,
         'stage': 'greeting'
     })
+    response.headers['X-Session-Id'] = session.session_id
+    return response
 
 
 
 
 
 # In your process_speech function, replace the conversation history saving with:
-def save_to_conversation_history(role, content):
-    """Helper function to save messages with proper timestamps"""
-    interview_state["conversation_history"].append({
-        "role": role,
-        "content": content,
-        "timestamp": datetime.utcnow().isoformat()
-    })
-from datetime import datetime
-
-def complete_interview_reset():
+def complete_interview_reset(session):
     """Complete cleanup when interview ends"""
-    global interviewer, interview_thread, interview_stop_event
-    
-    print("🧹 COMPLETE INTERVIEW CLEANUP STARTING...")
+    print(f"🧹 COMPLETE INTERVIEW CLEANUP STARTING ({session.session_id})...")
     
-    # Reset interview state completely
-    interview_state.clear()
-    interview_state.update({
-        'active': False,
-        'stage': 'not_started',
-        'conversation_history': [],
-        'skill_questions_asked': 0,
-        'coding_questions_asked': 0,
-        'warnings': [],
-        'personal_info_collected': False,
-        'tech_background_collected': False,
-        'skills_collected': '',
-        'current_domain': None,
-        'current_question': None,
-        'interview_links': {},
+    # Reset interview state, AI state and interviewer for this session only
+    session.reset()
+    session.state.update({
         'latest_code': '',
         'language': ''
     })
-    
-    # Reset AI state completely
-    ai_state.clear()
-    ai_state.update({
-        'is_speaking': False,
-        'is_listening': False,
-        'current_message': '',
-        'last_speech_start': None,
-        'last_speech_end': None
-    })
-    
-    # Stop and reset interviewer
-    if interviewer:
-        interviewer = None
-    
-    # Stop threads
-    interview_stop_event.set()
-    if interview_thread:
-        interview_thread = None
-    interview_stop_event.clear()
+    publish_status(session.state)
     
     print("✅ COMPLETE CLEANUP FINISHED - Ready for new interview")
 
 @app.route('/api/transcript', methods=['GET'])
 def get_transcript():
-    history = interview_state.get("conversation_history", [])
-
-    transcript = []
-    for entry in history:
-        if entry.get("role") in ["user", "assistant"]:
-            transcript.append({
-                "speaker": "User" if entry["role"] == "user" else "AI",
-                "message": entry["content"],
-                "timestamp": int(datetime.fromisoformat(entry["timestamp"]).timestamp() * 1000)
-            })
+    """Transcript entries after the `since` cursor (all of them without one); poll with the returned cursor.
 
-    return jsonify({ "transcript": transcript })
+    The ETag is the cursor range, so a poll with nothing new is answered
+    with 304 before the log is touched.
+    """
+    log = conversation_log(current_session().state)
+    since = request.args.get('since')
+    offset = log.parse_cursor(since) if since else 0
+    if request.if_none_match.contains(f"{log.cursor(offset)}:{log.size}"):
+        return '', 304
+
+    history, next_offset = log.read(offset)
+    transcript = [transcript_entry(entry) for entry in history if entry.get("role") in ["user", "assistant"]]
+    response = jsonify({
+        "transcript": transcript,
+        "cursor": log.cursor(next_offset),
+        # The cursor was for an earlier log (the session was reset); this is the full transcript
+        "reset": bool(since) and offset == 0 and since != log.cursor(0)
+    })
+    response.set_etag(f"{log.cursor(offset)}:{next_offset}")
+    return response
+
+def sse_message(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """Server-Sent Events for one session, replacing the ai-state/status/warnings/transcript polls.
+
+    Events: ai_state, status, warning, transcript (with the cursor for
+    /api/transcript?since=) and resync (events were dropped; refetch).
+    EventSource cannot set headers, so pass ?session_id=. The first events
+    are the current ai_state and status.
+    """
+    session = current_session()
+    bus = get_ui_event_bus()
+    subscription = bus.subscribe(session.session_id)
+    initial = [("ai_state", dict(session.ai_state)), ("status", status_snapshot(session.state))]
+
+    def generate():
+        try:
+            for event_type, data in initial:
+                yield sse_message(event_type, data)
+            while not subscription.closed:
+                events = subscription.next_batch(timeout=bus.heartbeat_seconds, window=bus.coalesce_window)
+                session.touch()  # An open stream keeps the session from idling out
+                if not events:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield "".join(sse_message(event["type"], event["data"]) for event in events)
+        finally:
+            subscription.close()
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Let events through nginx unbuffered
+    response.headers['X-Session-Id'] = session.session_id
+    return response
 
 
 @app.route('/api/problems/random', methods=['GET'])
@@ -170,7 +198,9 @@ def get_random_problem():
 
 @app.route('/api/process-speech', methods=['POST'])
 def process_speech():
-    global interviewer, interview_state
+    session = current_session()
+    interviewer = session.interviewer
+    interview_state = session.state
 
     data = request.json
     user_input = data.get('text', '').strip()
@@ -187,21 +217,21 @@ def process_speech():
 
     # ✅ Handle coding start
     if user_input.lower() == "ready_for_coding":
-        interview_state['stage'] = 'coding_challenges'
         interview_state['coding_questions_asked'] = 1
-        coding_question = interviewer._generate_coding_question(
+        coding_question = interviewer.new_coding_question(
             interview_state.get("current_domain", "python")
         )
         interview_state['current_question'] = coding_question
+        set_stage(interview_state, 'coding_challenges')
         response = "✅ Great! Now let's move to the coding challenge."
 
         print("🤖 AI (coding intro):", response)
         try:
-            speak_with_state_tracking(interviewer, response)
+            speak_with_state_tracking(interviewer, response, session.ai_state)
         except Exception as e:
             print("TTS error:", e)
 
-        save_to_conversation_history("assistant", response)
+        save_to_conversation_history("assistant", response, interview_state)
 
         return jsonify({
             "response": response,
@@ -212,15 +242,15 @@ def process_speech():
     # ✅ Handle coding done
     if user_input.lower() == "done_coding":
         response = "Thanks for your submission. Let's move on to any questions you might have."
-        interview_state['stage'] = 'doubt_clearing'
+        set_stage(interview_state, 'doubt_clearing')
 
         print("🤖 AI (done coding):", response)
         try:
-            speak_with_state_tracking(interviewer, response)
+            speak_with_state_tracking(interviewer, response, session.ai_state)
         except Exception as e:
             print("TTS error:", e)
 
-        save_to_conversation_history("assistant", response)
+        save_to_conversation_history("assistant", response, interview_state)
 
         return jsonify({
             "response": response,
@@ -231,10 +261,10 @@ def process_speech():
     try:
         if interview_state['stage'] == 'greeting':
             response = "Thanks for the intro! Tell me more about your technical background."
-            interview_state['stage'] = 'tech_background'
+            set_stage(interview_state, 'tech_background')
 
         elif interview_state['stage'] == 'tech_background':
-            interview_state['stage'] = 'skill_questions'
+            set_stage(interview_state, 'skill_questions')
             followup = interviewer._add_domain_specific_followup(
                 interview_state.get("current_domain", "general")
             )
@@ -251,11 +281,11 @@ def process_speech():
 
         print("🤖 AI says:", response)
         try:
-            speak_with_state_tracking(interviewer, response)
+            speak_with_state_tracking(interviewer, response, session.ai_state)
         except Exception as e:
             print("TTS error:", e)
 
-        save_to_conversation_history("assistant", response)
+        save_to_conversation_history("assistant", response, interview_state)
 
         return jsonify({
             "response": response,
@@ -266,18 +296,14 @@ def process_speech():
         print("❌ Error during process_speech:", e)
         return jsonify({"error": str(e)}), 500
 
-def speak_with_state_tracking(interviewer, text):
-    from shared_state import ai_state
-    from datetime import datetime
-    import threading
-    import time
-
+def speak_with_state_tracking(interviewer, text, ai_state=ai_state):
     print("🧠 [DEBUG] speak_with_state_tracking CALLED")
     
     ai_state['is_speaking'] = True
     ai_state['is_listening'] = False
     ai_state['current_message'] = text
     ai_state['last_speech_start'] = datetime.utcnow().isoformat()
+    publish_ai_state(ai_state)
 
     print("🎙️ AI STARTED SPEAKING:", ai_state)
 
@@ -288,22 +314,16 @@ def speak_with_state_tracking(interviewer, text):
     except Exception as e:
         print("❌ Error during interviewer.speak():", e)
 
-    def delayed_reset():
-        print("🕒 Waiting to reset AI state...")
-        time.sleep(2.5)
-        mark_ai_finished_speaking()
-
-    threading.Thread(target=delayed_reset).start()
+    print("🕒 Waiting to reset AI state...")
+    get_interview_engine().call_later(2.5, mark_ai_finished_speaking, ai_state)
 
 
 
-def mark_ai_finished_speaking():
-    from shared_state import ai_state
-    from datetime import datetime
-
+def mark_ai_finished_speaking(ai_state=ai_state):
     ai_state['is_speaking'] = False
     ai_state['is_listening'] = True
     ai_state['last_speech_end'] = datetime.utcnow().isoformat()
+    publish_ai_state(ai_state)
 
     print("🔕 AI FINISHED SPEAKING:", ai_state)
 
@@ -321,60 +341,44 @@ def stop_interview_thread():
     interview_thread = None
     interview_stop_event.clear()
     
-def save_to_conversation_history(role, content):
-    entry = {
-        "role": role,
-        "content": content,
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    interview_state["conversation_history"].append(entry)
-    print(f"💾 SAVED TO HISTORY: [{role.upper()}] {content}")
-    print(f"🧠 Last 2 messages:")
-    for msg in interview_state["conversation_history"][-2:]:
-        print(f"  - {msg['role']}: {msg['content']}")
-
-def reset_backend_state():
-    interview_state.clear()
-    interview_state.update({
-        'active': False,
-        'stage': 'not_started',
-        'skill_questions_asked': 0,
-        'coding_questions_asked': 0,
-        'current_domain': 'unknown',
-        'current_question': None
-    })
-    Warning.clear()
-    # tab_warning.clear()  # Removed because tab_warning is not defined
-    interview_stop_event.clear()
+def reset_backend_state(session):
+    session.reset()
+    session.state['current_domain'] = 'unknown'
 
 
 @app.route('/api/reset-interview', methods=['POST'])
 def reset_interview():
     """Manual reset for new interview"""
-    complete_interview_reset()
+    complete_interview_reset(current_session())
     return jsonify({'status': 'reset_complete', 'ready_for_new_interview': True})
 
 @app.route('/api/log-warning', methods=['POST'])
 def log_warning():
-    global interviewer 
+    session = current_session()
+    interviewer = session.interviewer
+    interview_state = session.state
     data = request.json
     warning_type = data.get('type')
     timestamp = data.get('timestamp')
     message = data.get('message')
+
+    # Browser focus events drive the interviewer's focus source (replaces window polling)
+    focus_source = getattr(interviewer, 'focus_source', None)
+    if warning_type in REGAINED_EVENTS:
+        if focus_source is not None and hasattr(focus_source, 'push'):
+            focus_source.push(warning_type)
+        return jsonify({'status': 'ok', 'stage': interview_state['stage']})
+    if warning_type in LOST_EVENTS and focus_source is not None and hasattr(focus_source, 'push'):
+        # The spoken reminder must not hold up the request
+        threading.Thread(target=focus_source.push, args=(warning_type, message), daemon=True).start()
     
-    # Add to interview state
-    if 'warnings' not in interview_state:
-        interview_state['warnings'] = []
-    
-    # Add the warning
-    interview_state['warnings'].append({
+    # Add the warning (pushed to the session's event streams)
+    violation_count = add_warning(interview_state, {
         'type': warning_type,
         'timestamp': timestamp,
         'message': message,
         'stage': interview_state.get('stage', 'unknown')
     })
-    
-    violation_count = len(interview_state['warnings'])
     print(f"🚨 WARNING LOGGED: {warning_type} - {message} (Violation #{violation_count})")
     
     # Optional: Add escalating responses
@@ -382,7 +386,7 @@ def log_warning():
         print("🔴 CRITICAL: Multiple violations detected!")
         # You could end the interview here or send additional warnings
         interview_state['active'] = False
-        interview_state['stage'] = 'terminated_due_to_violations'
+        set_stage(interview_state, 'terminated_due_to_violations')
         if interviewer:
             try:
                 # ✅ Properly stop AI interviewer
@@ -390,8 +394,7 @@ def log_warning():
                 print("📄 Transcript and feedback saved.")
             except Exception as e:
                 print(f"❌ Error during interview termination: {e}") # Stop the thread
-        interviewer = None
-        reset_backend_state()
+        reset_backend_state(session)
         print("✅ Interview fully terminated due to violations")
     
     return jsonify({
@@ -405,7 +408,8 @@ def log_warning():
 
 @app.route('/api/get-warnings', methods=['GET'])
 def get_warnings():
-    # Get warnings from interview_state instead of interviewer
+    # Get warnings from the session state instead of interviewer
+    interview_state = current_session().state
     warnings = interview_state.get('warnings', [])
     
     print(f"📋 Returning {len(warnings)} warnings to frontend")
@@ -423,17 +427,18 @@ def get_warnings():
 @app.route('/api/debug-transcript', methods=['GET'])
 def debug_transcript():
     """Debug endpoint to check raw conversation history"""
+    log = conversation_log(current_session().state)
+    recent = log.tail()
     return jsonify({
-        "raw_history": interview_state.get("conversation_history", []),
-        "history_length": len(interview_state.get("conversation_history", [])),
-        "last_entry": interview_state.get("conversation_history", [])[-1] if interview_state.get("conversation_history") else None
+        "raw_history": recent,
+        "history_length": len(log),
+        "last_entry": recent[-1] if recent else None
     })
 
 
 @app.route('/api/ai-state', methods=['GET'])
-def get_ai_state():  # 
-    ai_state['is_speaking'] = True 
-    return jsonify(ai_state)
+def get_ai_state():
+    return jsonify(current_session().ai_state)
 
 @app.route('/api/generate-interview-link', methods=['POST'])
 def generate_interview_link():
@@ -447,7 +452,7 @@ def generate_interview_link():
     
     expiration_date = datetime.datetime.now() + timedelta(days=7)
     
-    interview_state['interview_links'][token] = {
+    interview_links[token] = {
         'email': recipient_email,
         'expires_at': expiration_date.isoformat(),
         'used': False,
@@ -499,10 +504,10 @@ def send_interview_link_email(recipient, link, expires_at):
 @app.route('/api/validate-interview-link/<token>', methods=['GET'])
 def validate_interview_link(token):
     """Endpoint to validate an interview link"""
-    if token not in interview_state['interview_links']:
+    if token not in interview_links:
         return jsonify({'valid': False, 'reason': 'Invalid token'}), 404
     
-    link_data = interview_state['interview_links'][token]
+    link_data = interview_links[token]
     expiration_date = datetime.datetime.fromisoformat(link_data['expires_at'])
     
     if datetime.datetime.now() > expiration_date:
@@ -520,31 +525,55 @@ def validate_interview_link(token):
 @app.route('/api/mark-link-used/<token>', methods=['POST'])
 def mark_link_used(token):
     """Mark an interview link as used"""
-    if token not in interview_state['interview_links']:
+    if token not in interview_links:
         return jsonify({'error': 'Invalid token'}), 404
     
-    interview_state['interview_links'][token]['used'] = True
+    interview_links[token]['used'] = True
     return jsonify({'status': 'success'})
 
 
 @app.route('/api/interview-status', methods=['GET'])
 def get_interview_status():
     """Get current interview status and progress"""
+    return jsonify(status_snapshot(current_session().state))
+
+
+@app.route('/api/frame', methods=['POST'])
+def ingest_frame():
+    """Raw JPEG/WebP camera frame in the request body (not base64 JSON); detection runs server-side"""
+    session = current_session()
+    interviewer = session.interviewer
+    if not interviewer:
+        return jsonify({'error': 'No interviewer session active'}), 400
+
+    frame_settings = interviewer.config.get("frames", {})
+    try:
+        frame = decode_frame(
+            request.get_data(cache=False),
+            scale=frame_settings.get("decode_scale", 1),
+            max_bytes=frame_settings.get("max_bytes", 512 * 1024)
+        )
+    except FrameDecodeError as e:
+        return jsonify({'error': str(e)}), 400
+
+    accepted = interviewer.submit_frame(frame)
     return jsonify({
-        'active': interview_state['active'],
-        'stage': interview_state['stage'],
-        'skill_questions_asked': interview_state['skill_questions_asked'],
-        'coding_questions_asked': interview_state['coding_questions_asked'],
-        'total_skill_questions': 3,
-        'total_coding_questions': 2,
-        'current_domain': interview_state.get('current_domain', 'unknown'),
-        'current_question': interview_state.get('current_question')
-    })
+        'accepted': accepted,
+        'sample_interval_ms': interviewer.frame_sample_interval_ms()
+    }), 202
 
+@app.route('/api/proctoring-status', methods=['GET'])
+def proctoring_status():
+    interviewer = current_session().interviewer
+    if not interviewer:
+        return jsonify({'error': 'No interviewer session active'}), 400
+    return jsonify(interviewer.proctoring_status())
 
 @app.route('/api/face-status', methods=['POST'])
 def face_status():
-    global interviewer
+    session = current_session()
+    interviewer = session.interviewer
+    interview_state = session.state
     try:
         data = request.json
         if not data:
@@ -581,7 +610,7 @@ def face_status():
                 violation_state['last_violation_type'] = 'face_absence'
                 
                 # Log as new violation
-                interview_state['warnings'].append({
+                add_warning(interview_state, {
                     'type': 'face_absence',
                     'timestamp': current_time.isoformat(),
                     'message': 'Face not visible in camera',
@@ -618,7 +647,7 @@ def face_status():
                     violation_state['last_violation_type'] = 'gaze_absence'
                     
                     # Log as new violation
-                    interview_state['warnings'].append({
+                    add_warning(interview_state, {
                         'type': 'gaze_absence',
                         'timestamp': current_time.isoformat(),
                         'message': 'Looking away from screen detected',
@@ -666,9 +695,9 @@ def face_status():
             
             # Update state before termination
             interview_state['active'] = False
-            interview_state['stage'] = 'terminated_due_to_violations'
             interview_state['termination_reason'] = 'Multiple face/gaze violation events'
             interview_state['terminated_at'] = current_time.isoformat()
+            set_stage(interview_state, 'terminated_due_to_violations')
             
             # Terminate interview
             try:
@@ -679,8 +708,7 @@ def face_status():
             except Exception as e:
                 print(f"❌ Error during interview termination: {e}")
             finally:
-                interviewer = None
-                reset_backend_state()
+                reset_backend_state(session)
                 print("✅ Interview terminated due to violation events")
         
         return jsonify({
@@ -711,12 +739,13 @@ def face_status():
 @app.route('/api/end-interview', methods=['POST'])
 def end_interview():
     """Manually end the interview"""
-    global interviewer
-    global interview_state
+    session = current_session()
+    interviewer = session.interviewer
+    interview_state = session.state
 
-    print("🛑 Ending interview manually...")
+    print(f"🛑 Ending interview manually ({session.session_id})...")
     interview_state['active'] = False
-    interview_state['stage'] = 'concluded'
+    set_stage(interview_state, 'concluded')
 
     # Stop interviewer instance and generate outputs
     docx_path, feedback_path = None, None
@@ -725,9 +754,8 @@ def end_interview():
             docx_path, feedback_path = interviewer.end_interview()  # Proper stop
         except Exception as e:
             print(f"⚠️ Failed to end interview gracefully: {e}")
-        interviewer = None  # Kill the object
 
-    reset_backend_state()  # Clear global state, warnings, etc.
+    reset_backend_state(session)  # Clear session state, warnings, interviewer
 
     return jsonify({
         'status': 'ended',
@@ -741,6 +769,7 @@ def end_interview():
 @app.route('/api/export-transcript', methods=['POST'])
 def export_transcript():
     """Export conversation history to DOCX"""
+    interviewer = current_session().interviewer
     try:
         # Use the method from backend.py
         docx_path = interviewer._save_transcription_to_docx()
@@ -758,6 +787,7 @@ def export_transcript():
 @app.route('/api/generate-feedback', methods=['POST'])
 def generate_feedback():
     """Generate feedback from transcript"""
+    interviewer = current_session().interviewer
     try:
         # First ensure we have a transcript
         if not interviewer.conversation_history:
@@ -791,6 +821,9 @@ def download_feedback():
 
 @app.route('/api/current-coding-question', methods=['GET'])
 def get_current_coding_question():
+    session = current_session()
+    interviewer = session.interviewer
+    interview_state = session.state
     if interview_state['stage'] != 'coding_challenges':
         return jsonify({
             'question': None, 
@@ -801,7 +834,7 @@ def get_current_coding_question():
     if not current_question:
         # Generate a fallback question if none exists
         try:
-            current_question = interviewer._generate_coding_question(
+            current_question = interviewer.new_coding_question(
                 interview_state.get("current_domain", "python")
             )
             interview_state['current_question'] = current_question
@@ -817,25 +850,46 @@ def get_current_coding_question():
 
 @app.route('/api/submit-code', methods=['POST'])
 def submit_code():
+    session = current_session()
+    interviewer = session.interviewer
+    interview_state = session.state
     data = request.get_json()
     user_code = data.get("code", "")
     language = data.get("language", "python")
 
-    # Save code and language in global state
+    # Save code and language in session state
     interview_state['latest_code'] = user_code
     interview_state['language'] = language
 
+    # Hidden test cases run in parallel on the shared worker pool
+    report = interviewer.run_test_cases(language, user_code) if interviewer else None
+    tests = report.to_dict() if report else None
+
+    # Wake the coding stage if it is waiting; it then leads the discussion itself
+    if interviewer and interviewer.record_code_submission(user_code, report):
+        try:
+            output = submission_output(interviewer, language, user_code, report)
+            success = True
+        except Exception:
+            output = ""
+            success = False
+        return jsonify({
+            "success": success,
+            "output": output,
+            "tests": tests,
+            "followup_question": None
+        })
+
     try:
     
-        output = interviewer._execute_code(language, user_code)
+        output = submission_output(interviewer, language, user_code, report)
 
    
         followup = interviewer._coding_followup(user_code, language)
 
         if followup:
             try:
-                from flask_server import speak_with_state_tracking  # import if not already
-                speak_with_state_tracking(interviewer, followup)
+                speak_with_state_tracking(interviewer, followup, session.ai_state)
             except Exception as e:
                 print(f"❌ Error while speaking follow-up: {e}")
 
@@ -848,20 +902,29 @@ def submit_code():
     return jsonify({
         "success": success,
         "output": output,
+        "tests": tests,
         "followup_question": followup
     })
 
 
 
+def submission_output(interviewer, language, code, report):
+    """Output to show for a submission: the first hidden case's run if the tests ran, else a plain run"""
+    first = report.results[0].result if report and report.results else None
+    if first is not None:
+        return first.format()
+    return interviewer.execute_code(language, code)
+
+
 @app.route("/api/generate-coding-question", methods=["POST"])
 def api_generate_coding_question():
     data = request.get_json()
     domain = data.get("domain", "python")
-    session_id = data.get("session_id", "default")
+    interviewer = current_session().interviewer
 
     try:
-        question = interviewer._generate_coding_question(domain)
-        return jsonify({"question": question})
+        question = interviewer.new_coding_question(domain)
+        return jsonify({"question": question, "test_cases": len(interviewer.current_test_cases)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -869,7 +932,8 @@ def api_generate_coding_question():
 @app.route('/api/debug-state', methods=['GET'])
 def debug_state():
     """Debug endpoint to inspect current interview state"""
-    return jsonify(interview_state)
+    session = current_session()
+    return jsonify({**public_state(session.state), 'session_id': session.session_id, 'active_sessions': len(sessions)})
 
 @app.route('/api/interview-config', methods=['GET', 'POST'])
 def handle_interview_config():
@@ -974,5 +1038,13 @@ def handle_section_timing():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/vision-stats', methods=['GET'])
+def vision_stats():
+    return jsonify(get_vision_registry().stats())
+
+@app.route('/api/executor-stats', methods=['GET'])
+def executor_stats():
+    return jsonify(get_execution_service().stats())
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000,extra_files=['your_app_files'])
\ No newline at end of file
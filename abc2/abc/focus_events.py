@@ -0,0 +1,128 @@
+# focus_events.py
+
+import threading
+import time
+
+LOST_EVENTS = ("tab_switch", "hidden", "blur", "focus_lost")
+REGAINED_EVENTS = ("visible", "focus", "focus_regained")
+
+
+class FocusEventSource:
+    """Tells the interviewer when the candidate leaves the interview window"""
+
+    name = "base"
+
+    def __init__(self):
+        self.on_focus_lost = None
+        self.events = 0
+
+    def start(self, on_focus_lost):
+        self.on_focus_lost = on_focus_lost
+
+    def stop(self):
+        self.on_focus_lost = None
+
+    def _emit(self, detail=None):
+        self.events += 1
+        callback = self.on_focus_lost
+        if callback is not None:
+            callback(detail)
+
+
+class BrowserFocusSource(FocusEventSource):
+    """Focus changes pushed by the browser (visibilitychange / blur) via /api/log-warning or the websocket.
+
+    No thread: nothing happens until the client reports an event. A single
+    switch often fires both blur and visibilitychange, so losses within
+    debounce_seconds of each other count once unless focus was regained between them.
+    """
+
+    name = "browser"
+
+    def __init__(self, debounce_seconds=2.0):
+        super().__init__()
+        self.debounce_seconds = debounce_seconds
+        self._last_lost = None
+        self._lock = threading.Lock()
+
+    def push(self, event, detail=None):
+        """Feed one client event; returns True if it was reported as a new focus loss"""
+        with self._lock:
+            if event in REGAINED_EVENTS:
+                self._last_lost = None
+                return False
+            if event not in LOST_EVENTS:
+                return False
+            now = time.time()
+            if self._last_lost is not None and now - self._last_lost < self.debounce_seconds:
+                return False
+            self._last_lost = now
+        self._emit(detail)
+        return True
+
+
+class DesktopFocusSource(FocusEventSource):
+    """Active-window polling for running the interviewer locally (python backend.py).
+
+    pygetwindow only works on a desktop session, so it is imported when the
+    source starts, never on a server.
+    """
+
+    name = "desktop"
+    IGNORED_TITLES = ("notification", "system", "settings")
+
+    def __init__(self, poll_interval=3.0, start_delay=3.0):
+        super().__init__()
+        self.poll_interval = poll_interval
+        self.start_delay = start_delay
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self, on_focus_lost):
+        super().start(on_focus_lost)
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="desktop-focus", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        super().stop()
+        self._stopped.set()
+
+    def _run(self):
+        import pygetwindow as gw
+
+        if self._stopped.wait(self.start_delay):
+            return
+        try:
+            initial_window = gw.getActiveWindow()
+            initial_title = initial_window.title if initial_window else "Interview Window"
+        except Exception:
+            initial_window = None
+            initial_title = "Interview Window"
+
+        warning_given = False
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                current_window = gw.getActiveWindow()
+                current_title = current_window.title if current_window else initial_title
+                if (current_window and initial_window and current_title != initial_title and
+                        not any(x in current_title.lower() for x in self.IGNORED_TITLES)):
+                    if not warning_given:  # Only warn once per change
+                        self._emit(current_title)
+                        warning_given = True
+                else:
+                    warning_given = False
+            except Exception as e:
+                print(f"Window monitoring error: {e}")
+
+
+def create_focus_source(settings=None, name=None):
+    """Build the source named in the "focus_monitor" config section"""
+    settings = settings or {}
+    name = name or settings.get("source", "browser")
+    if name == "browser":
+        return BrowserFocusSource(debounce_seconds=settings.get("debounce_seconds", 2.0))
+    if name == "desktop":
+        return DesktopFocusSource(poll_interval=settings.get("poll_interval", 3.0),
+                                  start_delay=settings.get("start_delay", 3.0))
+    raise ValueError(f"Unknown focus monitor source: {name}")
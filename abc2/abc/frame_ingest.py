@@ -0,0 +1,43 @@
+# frame_ingest.py
+
+import cv2
+import numpy as np
+
+# Grayscale is all the detectors need; the reduced modes let libjpeg skip work while decoding
+_DECODE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+class FrameDecodeError(ValueError):
+    pass
+
+
+def frame_format(data):
+    """Return "jpeg" or "webp" from the magic bytes, or None"""
+    if data[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def decode_frame(data, scale=1, max_bytes=512 * 1024):
+    """Decode a JPEG/WebP camera frame to a grayscale numpy array.
+
+    np.frombuffer wraps the request body without copying it; imdecode then
+    writes straight into the output image.
+    """
+    if not data:
+        raise FrameDecodeError("Empty frame")
+    if len(data) > max_bytes:
+        raise FrameDecodeError(f"Frame is {len(data)} bytes; the limit is {max_bytes}")
+    if frame_format(data) is None:
+        raise FrameDecodeError("Frames must be JPEG or WebP")
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), _DECODE_FLAGS.get(scale, cv2.IMREAD_GRAYSCALE))
+    if frame is None:
+        raise FrameDecodeError("Could not decode frame")
+    return frame
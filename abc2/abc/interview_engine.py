@@ -0,0 +1,138 @@
+# interview_engine.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+INTRODUCTION = "introduction"
+BACKGROUND = "background"
+TECHNICAL_QUESTIONS = "technical_questions"
+CODING_CHALLENGE = "coding_challenge"
+DOUBT_CLEARING = "doubt_clearing"
+CLOSING = "closing"
+DONE = "done"
+
+
+class InterviewStateMachine:
+    """One interview as explicit states; each handler runs a section and returns the next state"""
+
+    def __init__(self, interviewer):
+        self.interviewer = interviewer
+        self.state = INTRODUCTION
+        self.is_tech_interview = False
+        self.handlers = {
+            INTRODUCTION: self._introduction,
+            BACKGROUND: self._background,
+            TECHNICAL_QUESTIONS: self._technical_questions,
+            CODING_CHALLENGE: self._coding_challenge,
+            DOUBT_CLEARING: self._doubt_clearing,
+            CLOSING: self._closing,
+        }
+
+    async def run(self):
+        interviewer = self.interviewer
+        try:
+            interviewer.interview_start_time = time.time()
+            while self.state != DONE:
+                # Later sections are skipped once the interview has been ended
+                if self.state not in (INTRODUCTION, BACKGROUND) and not interviewer.interview_active:
+                    break
+                interviewer._start_section(self.state)
+                self.state = await self.handlers[self.state]()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Interview error: {e}")
+            await interviewer.aspeak("We've encountered a technical issue, but thank you for your participation today!", interruptible=False)
+        finally:
+            await interviewer._afinish_interview()
+
+    async def _introduction(self):
+        await self.interviewer._conduct_introduction()
+        return BACKGROUND
+
+    async def _background(self):
+        await self.interviewer._gather_background()
+        self.is_tech_interview = self.interviewer.current_domain in self.interviewer.tech_domains
+        return TECHNICAL_QUESTIONS
+
+    async def _technical_questions(self):
+        interviewer = self.interviewer
+        await interviewer._ask_client_questions()  # Ask client-provided questions first
+
+        # Only proceed with generated questions if we have time
+        if not interviewer._should_transition_to_next_section(TECHNICAL_QUESTIONS):
+            await interviewer._conduct_question_phase(self.is_tech_interview)
+        # Coding Challenge Section (tech interviews only)
+        return CODING_CHALLENGE if self.is_tech_interview else DOUBT_CLEARING
+
+    async def _coding_challenge(self):
+        await self.interviewer._conduct_coding_challenge()
+        return DOUBT_CLEARING
+
+    async def _doubt_clearing(self):
+        await self.interviewer._conduct_doubt_clearing(self.is_tech_interview)
+        return CLOSING
+
+    async def _closing(self):
+        await self.interviewer._conduct_closing(self.is_tech_interview)
+        return DONE
+
+
+class InterviewEngine:
+    """Single event loop thread that drives every interview in the process.
+
+    Speech, LLM calls, prefetched questions and code submissions are awaited
+    on this loop. Only microphone capture, which is blocking device I/O, is
+    handed to a bounded executor while a candidate is answering.
+    """
+
+    def __init__(self, max_blocking_workers=64):
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=max_blocking_workers, thread_name_prefix="interview-io")
+        )
+        self._machines = {}
+        self._thread = threading.Thread(target=self._run_loop, name="interview-engine", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def start(self, interviewer):
+        """Begin an interview; returns a concurrent.futures.Future that resolves when it ends"""
+        machine = InterviewStateMachine(interviewer)
+        future = asyncio.run_coroutine_threadsafe(machine.run(), self._loop)
+        self._machines[id(interviewer)] = machine
+        future.add_done_callback(lambda f: self._machines.pop(id(interviewer), None))
+        return future
+
+    def call_later(self, delay, fn, *args):
+        """Run a plain callable on the engine loop after delay seconds (no thread per timer)"""
+        self._loop.call_soon_threadsafe(self._loop.call_later, delay, fn, *args)
+
+    def stats(self):
+        states = {}
+        for machine in list(self._machines.values()):
+            states[machine.state] = states.get(machine.state, 0) + 1
+        return {"interviews": len(self._machines), "states": states}
+
+
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+
+def get_interview_engine(settings=None):
+    """Process-wide engine; every session's interview runs on its loop"""
+    global _shared_engine
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            settings = settings or {}
+            _shared_engine = InterviewEngine(max_blocking_workers=settings.get("max_blocking_workers", 64))
+        return _shared_engine
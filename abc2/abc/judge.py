@@ -0,0 +1,158 @@
+# judge.py
+
+import json
+import re
+import threading
+
+from concurrent.futures import CancelledError
+
+TEST_CASES_MARKER = re.compile(r"^\s*Test Cases\s*:?", re.IGNORECASE | re.MULTILINE)
+
+PASSED = "passed"
+WRONG_ANSWER = "wrong_answer"
+RUNTIME_ERROR = "runtime_error"
+TIMEOUT = "timeout"
+COMPILE_ERROR = "compile_error"
+ERROR = "error"
+SKIPPED = "skipped"
+
+
+class TestCase:
+    """One hidden case: stdin for the program and the stdout it must print"""
+
+    def __init__(self, input="", expected="", name=None):
+        self.input = input
+        self.expected = expected
+        self.name = name
+
+    @classmethod
+    def from_dict(cls, data, index=0):
+        expected = data.get("output", data.get("expected", ""))
+        return cls(
+            input=str(data.get("input", "")),
+            expected=expected if isinstance(expected, str) else json.dumps(expected),
+            name=data.get("name") or f"case {index + 1}"
+        )
+
+
+def parse_test_cases(data, max_cases=None):
+    cases = [TestCase.from_dict(item, i) for i, item in enumerate(data or []) if isinstance(item, dict)]
+    return cases[:max_cases] if max_cases else cases
+
+
+def split_test_cases(text, max_cases=None):
+    """Separate the hidden "Test Cases:" JSON block from a generated question; returns (question, cases)"""
+    if not text:
+        return text, []
+    match = TEST_CASES_MARKER.search(text)
+    if not match:
+        return text, []
+    question = text[:match.start()].rstrip()
+    block = text[match.end():].strip()
+    block = re.sub(r"^```(?:json)?|```$", "", block).strip()
+    start, end = block.find("["), block.rfind("]")
+    try:
+        cases = parse_test_cases(json.loads(block[start:end + 1]), max_cases) if start != -1 else []
+    except ValueError:
+        print("[Tests] Could not parse the generated test cases")
+        cases = []
+    return question, cases
+
+
+def outputs_match(actual, expected):
+    """Compare ignoring trailing whitespace on each line and trailing blank lines"""
+    normalize = lambda text: "\n".join(line.rstrip() for line in (text or "").strip("\n").splitlines()).rstrip()
+    return normalize(actual) == normalize(expected)
+
+
+class CaseResult:
+    def __init__(self, case, verdict, result=None):
+        self.case = case
+        self.verdict = verdict
+        self.result = result  # ExecutionResult, None if the case never ran
+
+    def to_dict(self):
+        result = self.result
+        return {
+            "name": self.case.name,
+            "verdict": self.verdict,
+            "time_ms": round(result.duration * 1000, 1) if result else None,
+            "cpu_ms": round(result.cpu_time * 1000, 1) if result and result.cpu_time is not None else None,
+            "memory_kb": result.max_rss_kb if result else None,
+            # Only failures show output, and never the expected answer
+            "stderr": result.stderr[-2000:] if result and self.verdict != PASSED else None
+        }
+
+
+class TestReport:
+    def __init__(self, language, results):
+        self.language = language
+        self.results = results
+
+    @property
+    def passed(self):
+        return sum(1 for r in self.results if r.verdict == PASSED)
+
+    @property
+    def total(self):
+        return len(self.results)
+
+    @property
+    def all_passed(self):
+        return self.total > 0 and self.passed == self.total
+
+    def summary(self):
+        return f"{self.passed}/{self.total} hidden test cases passed"
+
+    def to_dict(self):
+        return {
+            "language": self.language,
+            "passed": self.passed,
+            "total": self.total,
+            "score": self.passed / self.total if self.total else 0.0,
+            "cases": [r.to_dict() for r in self.results]
+        }
+
+
+def _verdict(case, result):
+    if result.compile_error is not None:
+        return COMPILE_ERROR
+    if result.timed_out:
+        return TIMEOUT
+    if result.error:
+        return ERROR
+    if result.returncode != 0:
+        return RUNTIME_ERROR
+    return PASSED if outputs_match(result.stdout, case.expected) else WRONG_ANSWER
+
+
+def run_test_cases(executor, language, code, cases, fail_fast=False, timeout=None):
+    """Run every case at once on the execution service and collect verdicts.
+
+    With fail_fast, the first failing case cancels those still queued;
+    they are reported as skipped.
+    """
+    futures = [executor.submit(language, code, stdin=case.input, timeout=timeout) for case in cases]
+    verdicts = [None] * len(cases)
+    failed = threading.Event()
+    done = threading.Semaphore(0)
+
+    def collect(index, future):
+        try:
+            result = future.result()
+        except CancelledError:
+            verdicts[index] = CaseResult(cases[index], SKIPPED)
+        else:
+            verdict = _verdict(cases[index], result)
+            verdicts[index] = CaseResult(cases[index], verdict, result)
+            if verdict != PASSED and fail_fast and not failed.is_set():
+                failed.set()
+                for other in futures:
+                    other.cancel()
+        done.release()
+
+    for index, future in enumerate(futures):
+        future.add_done_callback(lambda f, index=index: collect(index, f))
+    for _ in futures:
+        done.acquire()
+    return TestReport(language, verdicts)
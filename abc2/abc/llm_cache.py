@@ -0,0 +1,137 @@
+# llm_cache.py
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so re-indented prompts share a cache entry"""
+    return re.sub(r'\s+', ' ', prompt or '').strip()
+
+
+def make_cache_key(model, prompt, temperature, variant=None):
+    raw = json.dumps([model, normalize_prompt(prompt), round(float(temperature), 3), variant])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Prompt -> completion cache: in-memory LRU tier plus optional on-disk tier, both with TTL"""
+
+    def __init__(self, max_entries=512, ttl_seconds=24 * 60 * 60, disk_dir=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def _expired(self, stored_at, now):
+        return self.ttl_seconds is not None and now - stored_at > self.ttl_seconds
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        value = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, value, now)
+        return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+        self._write_disk(key, value, now)
+
+    def _store(self, key, value, stored_at):
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, key, now):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(data.get("stored_at", 0), now):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return data.get("value")
+
+    def _write_disk(self, key, value, stored_at):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"stored_at": stored_at, "value": value}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[LLM Cache] Disk write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache(settings=None):
+    """Process-wide cache shared by every interviewer; settings come from interview_config.json"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            settings = settings or {}
+            if not settings.get("enabled", True):
+                return None
+            _shared_cache = ResponseCache(
+                max_entries=settings.get("max_entries", 512),
+                ttl_seconds=settings.get("ttl_seconds", 24 * 60 * 60),
+                disk_dir=settings.get("disk_dir")
+            )
+        return _shared_cache
@@ -0,0 +1,202 @@
+# llm_client.py
+
+import asyncio
+import os
+import queue
+import re
+import threading
+
+import httpx
+from openai import AsyncOpenAI
+
+
+class LLMClient:
+    """One pooled AsyncOpenAI client per process, driven by a background event loop.
+
+    Coroutines always run on the client's own loop (the HTTP pool is bound to it);
+    complete() is the blocking facade for thread-based callers and acomplete()
+    can be awaited from any other event loop.
+    """
+
+    def __init__(self, api_key=None, max_connections=8, max_concurrency=16, request_timeout=30.0, max_retries=2):
+        self.request_timeout = request_timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="llm-client-loop", daemon=True)
+        self._thread.start()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(request_timeout)
+        )
+        self._client = AsyncOpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            http_client=self._http_client,
+            max_retries=max_retries
+        )
+        self.in_flight = 0
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    @property
+    def loop(self):
+        return self._loop
+
+    async def _complete(self, model, messages, temperature, max_tokens, timeout):
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                response = await self._client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=timeout or self.request_timeout
+                )
+            finally:
+                self.in_flight -= 1
+        return response.choices[0].message.content
+
+    async def _pump_stream(self, model, messages, temperature, max_tokens, timeout, emit):
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                stream = await self._client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=timeout or self.request_timeout,
+                    stream=True
+                )
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        emit(chunk.choices[0].delta.content)
+            finally:
+                self.in_flight -= 1
+
+    def submit(self, coro):
+        """Schedule a coroutine on the client loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def complete(self, model, messages, temperature=0.7, max_tokens=500, timeout=None):
+        """Blocking facade for code running on ordinary threads"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("complete() would deadlock on the LLM loop; await acomplete() instead")
+        future = self.submit(self._complete(model, messages, temperature, max_tokens, timeout))
+        # Allow for the SDK's own retries on top of the per-request timeout
+        return future.result(timeout=(timeout or self.request_timeout) * 3)
+
+    def stream(self, model, messages, temperature=0.7, max_tokens=500, timeout=None):
+        """Blocking generator of text deltas as the model produces them"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("stream() would deadlock on the LLM loop; use astream() instead")
+        chunks = queue.Queue()
+        done = object()
+        future = self.submit(self._pump_stream(model, messages, temperature, max_tokens, timeout, chunks.put))
+        future.add_done_callback(lambda f: chunks.put(done))
+        try:
+            while True:
+                try:
+                    item = chunks.get(timeout=timeout or self.request_timeout)
+                except queue.Empty:
+                    raise TimeoutError("LLM stream stalled")
+                if item is done:
+                    break
+                yield item
+            future.result()  # Surface API errors raised mid-stream
+        finally:
+            if not future.done():
+                future.cancel()
+
+    async def astream(self, model, messages, temperature=0.7, max_tokens=500, timeout=None):
+        """Async generator of text deltas, usable from any event loop"""
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        done = object()
+        emit = lambda text: loop.call_soon_threadsafe(chunks.put_nowait, text)
+        future = self.submit(self._pump_stream(model, messages, temperature, max_tokens, timeout, emit))
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(chunks.put_nowait, done))
+        try:
+            while True:
+                item = await asyncio.wait_for(chunks.get(), timeout or self.request_timeout)
+                if item is done:
+                    break
+                yield item
+            future.result()
+        finally:
+            if not future.done():
+                future.cancel()
+
+    async def acomplete(self, model, messages, temperature=0.7, max_tokens=500, timeout=None):
+        """Awaitable from any event loop, including the client's own"""
+        coro = self._complete(model, messages, temperature, max_tokens, timeout)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def close(self):
+        self.submit(self._client.close()).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_SENTENCE_END = re.compile(r'[.!?]["\')\]]*\s+|\n+')
+
+
+def _split_sentences(buffer, min_chars):
+    """Return (complete sentences, unfinished remainder) for the text received so far"""
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(buffer):
+        # Short fragments ("1.", "e.g. ") are held back and merged with what follows
+        if match.end() - start >= min_chars:
+            sentence = buffer[start:match.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+    return sentences, buffer[start:]
+
+
+def iter_sentences(chunks, min_chars=20):
+    """Regroup streamed text deltas into whole sentences as soon as each one ends"""
+    buffer = ""
+    for chunk in chunks:
+        sentences, buffer = _split_sentences(buffer + chunk, min_chars)
+        yield from sentences
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def aiter_sentences(chunks, min_chars=20):
+    """iter_sentences for an async stream of text deltas"""
+    buffer = ""
+    async for chunk in chunks:
+        sentences, buffer = _split_sentences(buffer + chunk, min_chars)
+        for sentence in sentences:
+            yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_llm_client(settings=None):
+    """Process-wide client shared by every session; settings come from interview_config.json"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            settings = settings or {}
+            _shared_client = LLMClient(
+                max_connections=settings.get("max_connections", 8),
+                max_concurrency=settings.get("max_concurrency", 16),
+                request_timeout=settings.get("request_timeout", 30.0),
+                max_retries=settings.get("max_retries", 2)
+            )
+        return _shared_client
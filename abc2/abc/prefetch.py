@@ -0,0 +1,112 @@
+# prefetch.py
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _shared_executor(max_workers=8):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        return _executor
+
+
+class QuestionPrefetcher:
+    """Generates upcoming questions in the background while the candidate is answering.
+
+    Each kind (e.g. "coding_question") holds at most one speculative
+    result tagged with the key (domain, experience, slot) it was generated for.
+    take() only hands it out if the caller's current key still matches; anything
+    else is stale and gets cancelled or discarded.
+    """
+
+    def __init__(self, executor=None):
+        self._executor = executor or _shared_executor()
+        self._pending = {}  # kind -> (key, future)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def schedule(self, kind, key, fn, *args):
+        with self._lock:
+            current = self._pending.get(kind)
+            if current and current[0] == key and not current[1].cancelled():
+                return current[1]  # Already generating for this slot
+            if current:
+                current[1].cancel()
+            future = self._executor.submit(fn, *args)
+            self._pending[kind] = (key, future)
+            return future
+
+    def _claim(self, kind, key):
+        """Remove and return the pending future for key, or None if missing or stale"""
+        with self._lock:
+            pending = self._pending.pop(kind, None)
+        if pending is None:
+            self.misses += 1
+            return None
+
+        pending_key, future = pending
+        if pending_key != key:
+            future.cancel()
+            self.stale += 1
+            print(f"[Prefetch] Discarding stale {kind} for {pending_key}")
+            return None
+        return future
+
+    def _accept(self, result):
+        if not result:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def take(self, kind, key, wait=5.0):
+        """Return the prefetched result for key, or None if missing, stale or failed"""
+        future = self._claim(kind, key)
+        if future is None:
+            return None
+        try:
+            # A generation already in flight is still closer to done than a fresh request
+            result = future.result(timeout=wait)
+        except FutureTimeout:
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"[Prefetch] {kind} generation failed: {e}")
+            self.misses += 1
+            return None
+        return self._accept(result)
+
+    async def atake(self, kind, key, wait=5.0):
+        """take() for coroutines: waits on the generation without blocking the event loop"""
+        future = self._claim(kind, key)
+        if future is None:
+            return None
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), wait)
+        except asyncio.TimeoutError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"[Prefetch] {kind} generation failed: {e}")
+            self.misses += 1
+            return None
+        return self._accept(result)
+
+    def invalidate(self, kind=None):
+        with self._lock:
+            kinds = [kind] if kind else list(self._pending)
+            for k in kinds:
+                pending = self._pending.pop(k, None)
+                if pending:
+                    pending[1].cancel()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "stale": self.stale}
@@ -0,0 +1,273 @@
+# proctoring.py
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from face_pipeline import FacePipeline
+from vision_models import get_vision_registry
+
+# Set in each pool process by _init_worker
+_worker_registry = None
+
+
+def _init_worker(vision_settings):
+    global _worker_registry
+    _worker_registry = get_vision_registry(vision_settings)
+    _worker_registry.warm()
+
+
+def _analyze_batch(items, pipeline_settings):
+    """Runs in a pool process: one detection pass per (session_id, frame, tracking state)"""
+    face = _worker_registry.detector("face")
+    eye = _worker_registry.detector("eye")
+    results = []
+    for session_id, frame, track in items:
+        pipeline = FacePipeline(face, eye, **pipeline_settings)
+        pipeline.restore(track)
+        try:
+            observation = pipeline.analyze(frame)
+            results.append((session_id, observation, pipeline.snapshot(), None))
+        except Exception as e:
+            results.append((session_id, None, track, str(e)))
+    return results
+
+
+class ProctoringService:
+    """Face/gaze detection for every session in the process, run on a process pool.
+
+    Sessions submit frames with a callback. At most one frame per session is
+    waiting (a newer frame replaces it) and one is being analysed, so
+    observations reach each session in order. When more than max_pending
+    sessions are waiting, the oldest waiting frame is dropped.
+    """
+
+    def __init__(self, workers=None, batch_size=8, max_pending=256, vision_settings=None):
+        vision_settings = vision_settings or {}
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.pipeline_settings = {
+            "detect_width": vision_settings.get("detect_width", 320),
+            "full_detect_every": vision_settings.get("full_detect_every", 5)
+        }
+        # Spawned, not forked: forking the multi-threaded server can copy a held lock into the child
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(vision_settings,),
+                                         mp_context=multiprocessing.get_context("spawn"))
+        # Callbacks speak warnings and may block; keep them off the pool's result thread
+        self._callback_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="proctoring-callback")
+        self._pending = OrderedDict()  # session_id -> (frame, callback, submitted_at)
+        self._in_flight = set()
+        self._tracks = {}  # session_id -> FacePipeline tracking state
+        self._cond = threading.Condition()
+        self._batch_slots = threading.Semaphore(self.workers * 2)
+        self._closed = False
+        self.submitted = 0
+        self.dropped = 0
+        self.processed = 0
+        self.errors = 0
+        self.batches = 0
+        self.total_latency = 0.0
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="proctoring-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, session_id, frame, callback):
+        """Queue a frame; callback(observation) runs once it has been analysed"""
+        with self._cond:
+            if self._closed:
+                return False
+            self.submitted += 1
+            if session_id in self._pending:
+                # Only the latest frame matters; the one still waiting is stale
+                del self._pending[session_id]
+                self.dropped += 1
+            elif len(self._pending) >= self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._pending[session_id] = (frame, callback, time.time())
+            self._cond.notify()
+        return True
+
+    def forget(self, session_id):
+        with self._cond:
+            self._pending.pop(session_id, None)
+            self._tracks.pop(session_id, None)
+
+    def _take_batch_locked(self):
+        batch = []
+        for session_id in list(self._pending):
+            if session_id in self._in_flight:
+                continue
+            frame, callback, submitted_at = self._pending.pop(session_id)
+            self._in_flight.add(session_id)
+            batch.append((session_id, frame, callback, submitted_at, self._tracks.get(session_id)))
+            if len(batch) >= self.batch_size:
+                break
+        return batch
+
+    def _dispatch_loop(self):
+        while True:
+            self._batch_slots.acquire()
+            with self._cond:
+                batch = []
+                while not self._closed:
+                    batch = self._take_batch_locked()
+                    if batch:
+                        break
+                    self._cond.wait()
+                if self._closed:
+                    self._batch_slots.release()
+                    return
+                self.batches += 1
+
+            items = [(session_id, frame, track) for session_id, frame, _, _, track in batch]
+            try:
+                future = self._pool.submit(_analyze_batch, items, self.pipeline_settings)
+            except Exception as e:
+                print(f"[Proctoring] Could not submit batch: {e}")
+                self._finish(batch, None)
+                continue
+            future.add_done_callback(lambda f, batch=batch: self._finish(batch, f))
+
+    def _finish(self, batch, future):
+        callbacks = {session_id: (callback, submitted_at) for session_id, _, callback, submitted_at, _ in batch}
+        try:
+            results = future.result() if future is not None else []
+        except Exception as e:
+            print(f"[Proctoring] Batch failed: {e}")
+            results = []
+
+        ready = []
+        with self._cond:
+            for session_id, observation, track, error in results:
+                if error:
+                    self.errors += 1
+                    print(f"[Proctoring] Detection error for {session_id}: {error}")
+                    continue
+                callback, submitted_at = callbacks[session_id]
+                self._tracks[session_id] = track
+                self.processed += 1
+                self.total_latency += time.time() - submitted_at
+                ready.append((callback, observation))
+            self.errors += len(batch) - len(results)
+            self._in_flight.difference_update(callbacks)
+            self._cond.notify()
+        self._batch_slots.release()
+
+        for callback, observation in ready:
+            self._callback_pool.submit(self._run_callback, callback, observation)
+
+    @staticmethod
+    def _run_callback(callback, observation):
+        try:
+            callback(observation)
+        except Exception as e:
+            print(f"[Proctoring] Callback error: {e}")
+
+    def load(self):
+        """Queued and running frames relative to what the pool can take at once (1.0 = saturated)"""
+        with self._cond:
+            return (len(self._pending) + len(self._in_flight)) / float(self.workers * self.batch_size)
+
+    def sample_interval_ms(self, base_ms=1000, max_ms=5000):
+        """How often clients should send frames: slower as the pool falls behind"""
+        load = self.load()
+        if load <= 0.5:
+            return base_ms
+        return int(min(max_ms, base_ms * load * 2))
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "pending": len(self._pending),
+                "in_flight": len(self._in_flight),
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "batches": self.batches,
+                "avg_latency": self.total_latency / self.processed if self.processed else 0.0
+            }
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._cond.notify_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._callback_pool.shutdown(wait=False)
+
+
+class AdaptiveSampler:
+    """Per-session interval between camera samples.
+
+    Each unchanged result stretches the interval by backoff (up to
+    max_interval); any change drops it back to min_interval. While an
+    absence timer is running the interval is capped so that at least two
+    samples land before the violation deadline.
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=5.0, backoff=1.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.stable_count = 0
+        self.samples = 0
+        self._last_state = None
+        self._lock = threading.Lock()
+
+    def observe(self, state, deadline_in=None):
+        """Record one result; state is any comparable summary, deadline_in the seconds until a violation fires"""
+        with self._lock:
+            self.samples += 1
+            if state != self._last_state:
+                self.stable_count = 0
+                interval = self.min_interval
+            else:
+                self.stable_count += 1
+                interval = min(self.max_interval, self.interval * self.backoff)
+            if deadline_in is not None:
+                interval = min(interval, max(self.min_interval, deadline_in / 2))
+            self._last_state = state
+            self.interval = interval
+            return interval
+
+    def reset(self):
+        with self._lock:
+            self._last_state = None
+            self.stable_count = 0
+            self.interval = self.min_interval
+
+    def stats(self):
+        with self._lock:
+            return {
+                "interval_seconds": round(self.interval, 3),
+                "rate_hz": round(1.0 / self.interval, 3) if self.interval else None,
+                "stable_count": self.stable_count,
+                "samples": self.samples
+            }
+
+
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+
+def get_proctoring_service(settings=None, vision_settings=None):
+    """Process-wide proctoring service shared by every interviewer"""
+    global _shared_service
+    with _shared_service_lock:
+        if _shared_service is None:
+            settings = settings or {}
+            _shared_service = ProctoringService(
+                workers=settings.get("workers"),
+                batch_size=settings.get("batch_size", 8),
+                max_pending=settings.get("max_pending", 256),
+                vision_settings=vision_settings
+            )
+        return _shared_service
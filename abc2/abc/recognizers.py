@@ -0,0 +1,200 @@
+# recognizers.py
+
+import json
+import math
+import threading
+import time
+
+import speech_recognition as sr
+
+
+class RecognitionResult:
+    def __init__(self, text, confidence=None, latency=0.0, backend=None):
+        self.text = text
+        self.confidence = confidence
+        self.latency = latency
+        self.backend = backend
+
+    def to_dict(self):
+        return {"text": self.text, "confidence": self.confidence, "latency": self.latency, "backend": self.backend}
+
+
+class RecognizerBackend:
+    """Speech-to-text engine behind listen(); tracks latency and confidence per call"""
+
+    name = "base"
+    offline = False
+    supports_streaming = False  # True if start_stream() can decode audio incrementally
+
+    def __init__(self, recognizer, language="en-US"):
+        self.recognizer = recognizer
+        self.language = language
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
+
+    def _recognize(self, audio):
+        """Return (text, confidence or None); raise sr.UnknownValueError if nothing was understood"""
+        raise NotImplementedError
+
+    def transcribe(self, audio):
+        start = time.perf_counter()
+        try:
+            text, confidence = self._recognize(audio)
+        except Exception:
+            self._record(time.perf_counter() - start, None, failed=True)
+            raise
+        latency = time.perf_counter() - start
+        self._record(latency, confidence)
+        return RecognitionResult(text, confidence, latency, self.name)
+
+    def start_stream(self, sample_rate, sample_width):
+        """Return an object whose accept(frame) yields the partial transcript so far"""
+        raise NotImplementedError
+
+    def _record(self, latency, confidence, failed=False):
+        with self._lock:
+            self.calls += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if failed:
+                self.failures += 1
+            if confidence is not None:
+                self.confidence_sum += confidence
+                self.confidence_count += 1
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "backend": self.name,
+                "offline": self.offline,
+                "calls": self.calls,
+                "failures": self.failures,
+                "avg_latency": self.total_latency / self.calls if self.calls else 0.0,
+                "max_latency": self.max_latency,
+                "avg_confidence": self.confidence_sum / self.confidence_count if self.confidence_count else None
+            }
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API (network round-trip per utterance)"""
+
+    name = "google"
+
+    def _recognize(self, audio):
+        response = self.recognizer.recognize_google(audio, language=self.language, show_all=True)
+        alternatives = response.get("alternative", []) if isinstance(response, dict) else []
+        if not alternatives:
+            raise sr.UnknownValueError()
+        best = alternatives[0]
+        return best["transcript"], best.get("confidence")
+
+
+_vosk_models = {}
+_vosk_models_lock = threading.Lock()
+
+
+class VoskBackend(RecognizerBackend):
+    """Local Kaldi/Vosk model; no network needed"""
+
+    name = "vosk"
+    offline = True
+    supports_streaming = True
+    SAMPLE_RATE = 16000
+
+    def __init__(self, recognizer, language="en-US", model_path=None):
+        super().__init__(recognizer, language)
+        import vosk
+        self._vosk = vosk
+        if not model_path:
+            raise ValueError("speech_recognition.vosk_model_path is required for the vosk backend")
+        # Models are large; load each one once per process
+        with _vosk_models_lock:
+            if model_path not in _vosk_models:
+                _vosk_models[model_path] = vosk.Model(model_path)
+            self.model = _vosk_models[model_path]
+
+    def _recognize(self, audio):
+        kaldi = self._vosk.KaldiRecognizer(self.model, self.SAMPLE_RATE)
+        kaldi.SetWords(True)
+        kaldi.AcceptWaveform(audio.get_raw_data(convert_rate=self.SAMPLE_RATE, convert_width=2))
+        result = json.loads(kaldi.FinalResult())
+        text = result.get("text", "").strip()
+        if not text:
+            raise sr.UnknownValueError()
+        words = result.get("result", [])
+        confidence = sum(w.get("conf", 0.0) for w in words) / len(words) if words else None
+        return text, confidence
+
+    def start_stream(self, sample_rate, sample_width):
+        # sr.Microphone always records 16-bit PCM, which is what Kaldi expects
+        return _VoskStream(self._vosk.KaldiRecognizer(self.model, sample_rate))
+
+
+class _VoskStream:
+    """Incremental Kaldi decoding of microphone frames for partial transcripts"""
+
+    def __init__(self, kaldi):
+        self.kaldi = kaldi
+        self.committed = []
+
+    def accept(self, frame):
+        if self.kaldi.AcceptWaveform(frame):
+            # Kaldi finalised an utterance segment; keep it and start a new partial
+            segment = json.loads(self.kaldi.Result()).get("text", "").strip()
+            if segment:
+                self.committed.append(segment)
+            partial = ""
+        else:
+            partial = json.loads(self.kaldi.PartialResult()).get("partial", "").strip()
+        return " ".join(self.committed + ([partial] if partial else []))
+
+
+class WhisperBackend(RecognizerBackend):
+    """Local Whisper model through speech_recognition; no network needed"""
+
+    name = "whisper"
+    offline = True
+
+    def __init__(self, recognizer, language="en-US", model="base"):
+        super().__init__(recognizer, language)
+        self.model = model
+
+    def _recognize(self, audio):
+        result = self.recognizer.recognize_whisper(
+            audio, model=self.model, language=self.language.split("-")[0].lower() or None, show_dict=True
+        )
+        text = (result.get("text") or "").strip()
+        if not text:
+            raise sr.UnknownValueError()
+        segments = result.get("segments") or []
+        confidence = None
+        if segments:
+            # avg_logprob is a per-token log probability; map the mean back to 0..1
+            confidence = math.exp(sum(seg.get("avg_logprob", 0.0) for seg in segments) / len(segments))
+        return text, confidence
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "vosk": VoskBackend,
+    "whisper": WhisperBackend,
+}
+
+
+def create_recognizer_backend(recognizer, settings=None, name=None):
+    """Build the backend named in the "speech_recognition" config section"""
+    settings = settings or {}
+    name = name or settings.get("backend", "google")
+    language = settings.get("language", "en-US")
+    if name == "vosk":
+        return VoskBackend(recognizer, language, model_path=settings.get("vosk_model_path"))
+    if name == "whisper":
+        return WhisperBackend(recognizer, language, model=settings.get("whisper_model", "base"))
+    if name in BACKENDS:
+        return BACKENDS[name](recognizer, language)
+    raise ValueError(f"Unknown speech recognition backend: {name}")
@@ -0,0 +1,145 @@
+# session_registry.py
+
+import threading
+import time
+import uuid
+
+from shared_state import new_interview_state, new_ai_state, close_conversation_log, publish_ai_state
+from ui_events import get_ui_event_bus
+
+DEFAULT_SESSION_ID = "default"
+SESSION_HEADER = "X-Session-Id"
+TOKEN_HEADER = "X-Interview-Token"
+
+
+class SessionLimitError(RuntimeError):
+    pass
+
+
+class SessionNotFoundError(LookupError):
+    pass
+
+
+class InterviewSession:
+    """Everything one candidate's interview owns: interviewer, state, warnings"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.interviewer = None
+        # The log is named after the session, so a restarted server picks the conversation back up
+        self.state = new_interview_state(session_id=session_id)
+        self.ai_state = new_ai_state(session_id=session_id)
+        self.created_at = time.time()
+        self.last_seen = self.created_at
+        self.lock = threading.RLock()
+
+    def touch(self):
+        self.last_seen = time.time()
+
+    def idle_seconds(self, now=None):
+        return (now or time.time()) - self.last_seen
+
+    def reset(self, stage='not_started'):
+        """Drop the interviewer and start from a clean state"""
+        with self.lock:
+            self.stop_interviewer()
+            close_conversation_log(self.state, archive=True)
+            self.state = new_interview_state(session_id=self.session_id)
+            self.state['stage'] = stage
+            self.ai_state = new_ai_state(session_id=self.session_id)
+            self.ai_state['is_listening'] = False
+        # Open streams outlive the reset and should not keep showing the old speech state
+        publish_ai_state(self.ai_state)
+
+    def stop_interviewer(self):
+        """Stop the interviewer's loops without generating outputs"""
+        interviewer = self.interviewer
+        self.interviewer = None
+        if interviewer is None:
+            return
+        interviewer.interview_active = False
+        interviewer.monitoring_active = False
+        try:
+            interviewer._stop_camera()
+        except Exception as e:
+            print(f"[Sessions] Error stopping camera for {self.session_id}: {e}")
+        interviewer.close_speech()
+
+
+class SessionRegistry:
+    """Thread-safe map of session id -> InterviewSession with idle TTL eviction"""
+
+    def __init__(self, ttl_seconds=30 * 60, max_sessions=200):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def new_session_id(self):
+        return uuid.uuid4().hex
+
+    def get(self, session_id):
+        """Return an existing session (refreshing its TTL) or None"""
+        self.evict_idle()
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session:
+            session.touch()
+        return session
+
+    def get_or_create(self, session_id=None):
+        """Return the session for session_id, creating it if needed"""
+        self.evict_idle()
+        session_id = session_id or self.new_session_id()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                if len(self._sessions) >= self.max_sessions:
+                    raise SessionLimitError(f"Session limit reached ({self.max_sessions})")
+                session = InterviewSession(session_id)
+                self._sessions[session_id] = session
+                print(f"[Sessions] Created session {session_id} ({len(self._sessions)} active)")
+        session.touch()
+        return session
+
+    def remove(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session:
+            session.stop_interviewer()
+            close_conversation_log(session.state)
+            get_ui_event_bus().close_session(session_id)
+        return session
+
+    def evict_idle(self):
+        """Drop sessions that have not been touched within the TTL"""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, s in self._sessions.items() if s.idle_seconds(now) > self.ttl_seconds]
+            evicted = [self._sessions.pop(sid) for sid in expired]
+        for session in evicted:
+            print(f"[Sessions] Evicting idle session {session.session_id}")
+            session.stop_interviewer()
+            close_conversation_log(session.state)
+            get_ui_event_bus().close_session(session.session_id)
+        return len(evicted)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def session_ids(self):
+        with self._lock:
+            return list(self._sessions)
+
+
+def resolve_session_id(request):
+    """Find the session id on a Flask request: header, token, query or JSON body"""
+    session_id = (request.headers.get(SESSION_HEADER)
+                  or request.headers.get(TOKEN_HEADER)
+                  or request.args.get('session_id'))
+    if not session_id and request.is_json:
+        body = request.get_json(silent=True) or {}
+        if isinstance(body, dict):
+            session_id = body.get('session_id')
+    return session_id or DEFAULT_SESSION_ID
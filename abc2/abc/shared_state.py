@@ -1,31 +1,135 @@
 # shared_state.py
 
+import threading
+import time
 from datetime import datetime
 
-interview_state = {
-    'active': False,
-    'stage': 'greeting',
-    'current_question': None,
-    'conversation_history': [],
-    'skill_questions_asked': 0,
-    'coding_questions_asked': 0,
-    'personal_info_collected': False,
-    'tech_background_collected': False,
-    'skills_collected': '',
-    'current_domain': None,
-    'interview_links': {}
-}
-ai_state = {
-    'is_speaking': False,
-    'is_listening': True,
-    'current_message': '',
-    'last_speech_start': None,
-    'last_speech_end': None
-}
-def save_to_conversation_history(role, content):
+from event_log import get_event_log_store
+from ui_events import get_ui_event_bus
+
+_log_open_lock = threading.Lock()
+
+def new_interview_state(session_id="default"):
+    """Fresh per-session interview state; the conversation lives in the session's event log on disk"""
+    return {
+        'session_id': session_id,
+        'active': False,
+        'stage': 'greeting',
+        'current_question': None,
+        'conversation_log': None,
+        'skill_questions_asked': 0,
+        'coding_questions_asked': 0,
+        'personal_info_collected': False,
+        'tech_background_collected': False,
+        'skills_collected': '',
+        'current_domain': None,
+        'warnings': [],
+        'current_violation_state': {
+            'face_absent_since': None,
+            'gaze_away_since': None,
+            'last_violation_type': None
+        }
+    }
+
+def new_ai_state(session_id="default"):
+    """Fresh per-session AI speaking state"""
+    return {
+        'session_id': session_id,
+        'is_speaking': False,
+        'is_listening': True,
+        'current_message': '',
+        'last_speech_start': None,
+        'last_speech_end': None,
+        'partial_transcript': ''
+    }
+
+interview_state = new_interview_state()
+ai_state = new_ai_state()
+
+def conversation_log(state=None):
+    """The state's EventLog, opened (and recovered from disk) on first use"""
+    if state is None:
+        state = interview_state
+    log = state.get("conversation_log")
+    if log is None:
+        with _log_open_lock:
+            log = state.get("conversation_log")
+            if log is None:
+                log = state["conversation_log"] = get_event_log_store().open(state.get("session_id", "default"))
+    return log
+
+def close_conversation_log(state, archive=False):
+    """Release the state's log; archive moves the file aside so the session starts a new one"""
+    if state.get("conversation_log") is not None or archive:
+        get_event_log_store().close(state.get("session_id", "default"), archive=archive)
+    state["conversation_log"] = None
+
+def public_state(state):
+    """The state without the log handle, for JSON responses"""
+    return {key: value for key, value in state.items() if key != 'conversation_log'}
+
+def status_snapshot(state):
+    """What /api/interview-status reports and "status" events carry"""
+    return {
+        'session_id': state.get('session_id', 'default'),
+        'active': state['active'],
+        'stage': state['stage'],
+        'skill_questions_asked': state['skill_questions_asked'],
+        'coding_questions_asked': state['coding_questions_asked'],
+        'total_skill_questions': 3,
+        'total_coding_questions': 2,
+        'current_domain': state.get('current_domain', 'unknown'),
+        'current_question': state.get('current_question')
+    }
+
+def transcript_entry(entry):
+    timestamp = entry.get("ts")
+    if timestamp is None:  # Logged before entries carried epoch ms
+        timestamp = int(datetime.fromisoformat(entry["timestamp"]).timestamp() * 1000)
+    return {
+        "seq": entry.get("seq"),
+        "speaker": "User" if entry["role"] == "user" else "AI",
+        "message": entry["content"],
+        "timestamp": timestamp
+    }
+
+def publish_event(state, event_type, data):
+    """Push an event to the UI streams subscribed to the state's session"""
+    get_ui_event_bus().publish(state.get('session_id', 'default'), event_type, data)
+
+def publish_ai_state(state):
+    """Push a snapshot of an ai_state dict (speaking/listening, partial transcript)"""
+    publish_event(state, "ai_state", dict(state))
+
+def publish_status(state=None, **extra):
+    if state is None:
+        state = interview_state
+    publish_event(state, "status", dict(status_snapshot(state), **extra))
+
+def set_stage(state, stage):
+    """Change the interview stage and tell subscribed clients"""
+    state['stage'] = stage
+    publish_status(state)
+
+def add_warning(state, warning):
+    """Record a proctoring warning and push it; returns the violation count"""
+    warnings = state.setdefault('warnings', [])
+    warnings.append(warning)
+    publish_event(state, "warning", dict(warning, count=len(warnings)))
+    return len(warnings)
+
+def save_to_conversation_history(role, content, state=None):
+    now = time.time()
     entry = {
         "role": role,
         "content": content,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcfromtimestamp(now).isoformat(),
+        "ts": int(now * 1000)  # Epoch ms, so readers never parse the ISO string
     }
-    interview_state["conversation_history"].append(entry)
+    log = conversation_log(state)
+    record = log.append_record(entry)
+    if record is not None and role in ("user", "assistant"):
+        stored, _, next_offset = record
+        event = transcript_entry(stored)
+        event["cursor"] = log.cursor(next_offset)  # Resume /api/transcript?since= after this entry
+        publish_event(state if state is not None else interview_state, "transcript", event)
@@ -0,0 +1,376 @@
+# tts.py
+
+import collections
+import io
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import wave
+from concurrent.futures import Future
+
+from audio_cache import AudioCache, audio_cache_key
+
+
+class TTSBackend:
+    """Text-to-speech engine. open/speak/close always run on the speech worker thread."""
+
+    name = "base"
+    supports_synthesis = False  # True if synthesize()/play() can render to and play from a buffer
+
+    def __init__(self, voice=None, rate=None):
+        self.voice = voice
+        self.rate = rate
+        self._stop_requested = threading.Event()
+
+    def open(self):
+        pass
+
+    def speak(self, text):
+        """Block until text has been spoken; return False if stopped part-way"""
+        raise NotImplementedError
+
+    def synthesize(self, text):
+        """Render text to WAV bytes without playing it"""
+        raise NotImplementedError
+
+    def play(self, audio):
+        """Play WAV bytes; return False if stopped part-way"""
+        raise NotImplementedError
+
+    def stop(self):
+        """Barge-in: ask the current utterance to stop (called from any thread)"""
+        self._stop_requested.set()
+
+    def close(self):
+        pass
+
+
+class ConsoleBackend(TTSBackend):
+    """No audio device: print the text instead"""
+
+    name = "console"
+
+    def speak(self, text):
+        print(f"[TEXT ONLY]: {text}")
+        return True
+
+
+class SapiBackend(TTSBackend):
+    """Windows SAPI5 voice, dispatched once per process"""
+
+    name = "sapi"
+    supports_synthesis = True
+    SVSF_ASYNC = 1
+    SVSF_PURGE_BEFORE_SPEAK = 2
+    SAFT_22KHZ_16BIT_MONO = 22
+
+    def open(self):
+        import pythoncom
+        import win32com.client
+        pythoncom.CoInitialize()  # COM objects live on the thread that created them
+        self._client = win32com.client
+        self._voice = win32com.client.Dispatch("SAPI.SpVoice")
+        self._default_output = self._voice.AudioOutputStream
+        if self.rate is not None:
+            self._voice.Rate = int(self.rate)
+        if self.voice:
+            for token in self._voice.GetVoices():
+                if self.voice.lower() in token.GetDescription().lower():
+                    self._voice.Voice = token
+                    break
+
+    def speak(self, text):
+        self._stop_requested.clear()
+        self._voice.Speak(text, self.SVSF_ASYNC)
+        while not self._voice.WaitUntilDone(100):
+            if self._stop_requested.is_set():
+                self._voice.Speak("", self.SVSF_ASYNC | self.SVSF_PURGE_BEFORE_SPEAK)
+                return False
+        return True
+
+    def synthesize(self, text):
+        stream = self._client.Dispatch("SAPI.SpMemoryStream")
+        stream.Format.Type = self.SAFT_22KHZ_16BIT_MONO
+        self._voice.AudioOutputStream = stream
+        try:
+            self._voice.Speak(text)
+        finally:
+            self._voice.AudioOutputStream = self._default_output
+        return pcm_to_wav(bytes(stream.GetData()), sample_rate=22050)
+
+    def play(self, audio):
+        # winsound cannot play from memory asynchronously, so the voice plays the cached PCM
+        # and is polled for barge-in exactly like speak()
+        self._stop_requested.clear()
+        stream = self._client.Dispatch("SAPI.SpMemoryStream")
+        stream.Format.Type = self.SAFT_22KHZ_16BIT_MONO
+        stream.SetData(wav_to_pcm(audio))
+        self._voice.SpeakStream(stream, self.SVSF_ASYNC)
+        while not self._voice.WaitUntilDone(100):
+            if self._stop_requested.is_set():
+                self._voice.Speak("", self.SVSF_ASYNC | self.SVSF_PURGE_BEFORE_SPEAK)
+                return False
+        return True
+
+    def close(self):
+        import pythoncom
+        self._voice = None
+        pythoncom.CoUninitialize()
+
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng / espeak command line synthesizer (Linux servers)"""
+
+    name = "espeak"
+
+    def __init__(self, voice=None, rate=None):
+        super().__init__(voice, rate)
+        self.executable = shutil.which("espeak-ng") or shutil.which("espeak")
+        self.player = shutil.which("aplay") or shutil.which("paplay")
+        self.supports_synthesis = bool(self.player)
+        self._process = None
+
+    def open(self):
+        if not self.executable:
+            raise RuntimeError("espeak-ng / espeak not found on PATH")
+
+    def _command(self, text):
+        command = [self.executable]
+        if self.voice:
+            command += ["-v", self.voice]
+        if self.rate is not None:
+            command += ["-s", str(self.rate)]
+        return command + ["--", text]
+
+    def speak(self, text):
+        self._stop_requested.clear()
+        self._process = subprocess.Popen(self._command(text), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return self._wait_or_stop()
+
+    def synthesize(self, text):
+        command = self._command(text)
+        command.insert(1, "--stdout")
+        return subprocess.run(command, capture_output=True, check=True).stdout
+
+    def play(self, audio):
+        # Cached audio is just written to the player's stdin; no synthesis involved
+        self._stop_requested.clear()
+        self._process = subprocess.Popen([self.player, "-q", "-"] if self.player.endswith("aplay") else [self.player],
+                                         stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            self._process.stdin.write(audio)
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        return self._wait_or_stop()
+
+    def _wait_or_stop(self):
+        try:
+            while True:
+                try:
+                    self._process.wait(timeout=0.1)
+                    return True
+                except subprocess.TimeoutExpired:
+                    if self._stop_requested.is_set():
+                        self._process.terminate()
+                        self._process.wait()
+                        return False
+        finally:
+            self._process = None
+
+
+def pcm_to_wav(pcm, sample_rate=22050, channels=1, sample_width=2):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def wav_to_pcm(audio):
+    with wave.open(io.BytesIO(audio), "rb") as wav:
+        return wav.readframes(wav.getnframes())
+
+
+def create_backend(settings=None):
+    """Pick a backend from the "tts" config section ("auto" prefers SAPI on Windows, espeak elsewhere)"""
+    settings = settings or {}
+    name = settings.get("backend", "auto")
+    voice = settings.get("voice")
+    rate = settings.get("rate")
+    if name == "auto":
+        if sys.platform == "win32":
+            name = "sapi"
+        elif shutil.which("espeak-ng") or shutil.which("espeak"):
+            name = "espeak"
+        else:
+            name = "console"
+    backends = {"sapi": SapiBackend, "espeak": EspeakBackend, "console": ConsoleBackend}
+    if name not in backends:
+        raise ValueError(f"Unknown TTS backend: {name}")
+    return backends[name](voice=voice, rate=rate)
+
+
+class _SpeechJob:
+    def __init__(self, text, owner, interruptible, play=True):
+        self.text = text
+        self.owner = owner
+        self.interruptible = interruptible
+        self.play = play  # False: only render into the audio cache
+        self.future = Future()
+
+
+class SpeechWorker:
+    """Thread that owns one interviewer's TTS engine and speaks its queued utterances in order"""
+
+    def __init__(self, backend, audio_cache=None):
+        self.backend = backend
+        self.audio_cache = audio_cache
+        self._queue = queue.Queue()
+        self._render_queue = collections.deque()  # Pre-render jobs, only run while nothing is waiting to be spoken
+        self._current = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="speech-worker", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=10)
+
+    def _open_backend(self):
+        try:
+            self.backend.open()
+        except Exception as e:
+            print(f"[TTS] {self.backend.name} backend unavailable ({e}); falling back to text only")
+            self.backend = ConsoleBackend()
+        print(f"[TTS] Using {self.backend.name} backend")
+
+    def _run(self):
+        self._open_backend()
+        self._ready.set()
+        while True:
+            try:
+                job = self._queue.get(timeout=0.05 if self._render_queue else 0.5)
+            except queue.Empty:
+                if not self._render_queue:
+                    continue
+                job = self._render_queue.popleft()
+            if job is None:
+                break
+            if not job.future.set_running_or_notify_cancel():
+                continue  # Cancelled while queued
+            with self._lock:
+                self._current = job
+            try:
+                job.future.set_result(self._perform(job))
+            except Exception as e:
+                print(f"[TTS] Speech error: {e}")
+                job.future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._current = None
+        self.backend.close()
+
+    def _cache_key(self, text):
+        # Only what the backend actually renders with; the voice is chosen per process, not per accent
+        return audio_cache_key(text, self.backend.voice, self.backend.name, self.backend.rate)
+
+    def _perform(self, job):
+        if self.audio_cache is None or not self.backend.supports_synthesis:
+            return self.backend.speak(job.text) if job.play else False
+
+        key = self._cache_key(job.text)
+        audio = self.audio_cache.get(key)
+        if audio is None:
+            audio = self.backend.synthesize(job.text)
+            self.audio_cache.put(key, audio)
+        return self.backend.play(audio) if job.play else True
+
+    def enqueue(self, text, owner=None, interruptible=True):
+        """Queue text without blocking; the returned future resolves when it has been spoken"""
+        job = _SpeechJob(text, owner, interruptible)
+        with self._lock:
+            if self._closed:
+                job.future.set_result(False)  # Shut down with its interviewer; nothing will play it
+                return job.future
+            self._queue.put(job)
+        return job.future
+
+    def prerender(self, phrases):
+        """Render phrases into the audio cache in the background so later playback skips synthesis"""
+        if self.audio_cache is None or not self.backend.supports_synthesis:
+            return []
+        futures = []
+        for text in phrases:
+            if self._cache_key(text) in self.audio_cache:
+                continue
+            job = _SpeechJob(text, None, True, play=False)
+            self._render_queue.append(job)
+            futures.append(job.future)
+        return futures
+
+    def say(self, text, owner=None, interruptible=True, timeout=None):
+        """Speak and wait for completion; returns False if the utterance was cut off"""
+        return self.enqueue(text, owner, interruptible).result(timeout=timeout)
+
+    def is_speaking(self, owner=None):
+        with self._lock:
+            current = self._current
+        return current is not None and current.play and (owner is None or current.owner is owner)
+
+    def cancel(self, owner=None, force=False):
+        """Barge-in: drop queued utterances for owner and stop the one playing.
+        Non-interruptible utterances are left alone unless force is set."""
+        def matches(job):
+            return (owner is None or job.owner is owner) and (force or job.interruptible)
+
+        cancelled = 0
+        with self._queue.mutex:
+            for job in list(self._queue.queue):
+                if job is not None and matches(job) and job.future.cancel():
+                    cancelled += 1
+        with self._lock:
+            current = self._current
+        if current is not None and matches(current):
+            self.backend.stop()
+            cancelled += 1
+        return cancelled
+
+    def shutdown(self):
+        """Drop whatever is still queued, stop the current utterance and close the engine"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._render_queue.clear()
+        self.cancel(force=True)
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+_shared_audio_cache = None
+_shared_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache(settings=None):
+    """Process-wide audio cache, or None when disabled; settings come from the "tts.audio_cache" config"""
+    global _shared_audio_cache
+    settings = settings or {}
+    if not settings.get("enabled", True):
+        return None
+    with _shared_audio_cache_lock:
+        if _shared_audio_cache is None:
+            _shared_audio_cache = AudioCache(
+                max_bytes=settings.get("max_megabytes", 64) * 1024 * 1024,
+                disk_dir=settings.get("disk_dir")
+            )
+        return _shared_audio_cache
+
+
+def create_speech_worker(settings=None):
+    """A speech worker with its own TTS engine, so sessions speak concurrently; rendered audio is shared"""
+    settings = settings or {}
+    return SpeechWorker(create_backend(settings), get_audio_cache(settings.get("audio_cache")))
@@ -0,0 +1,144 @@
+# ui_events.py
+
+import threading
+import time
+from collections import OrderedDict
+
+# Only the latest of these matters to the UI; a newer one replaces one still undelivered
+COALESCED_EVENTS = ("ai_state", "status")
+
+
+class Subscription:
+    """One client's queue of pending events for a session.
+
+    ai_state and status events coalesce (a queued one is replaced by the
+    newer snapshot); transcript and warning events are all delivered, in
+    order. If a slow client lets more than max_pending pile up, the oldest
+    are dropped and the next batch starts with a "resync" event telling it
+    to refetch.
+    """
+
+    def __init__(self, bus, session_id, max_pending=200):
+        self.bus = bus
+        self.session_id = session_id
+        self.max_pending = max_pending
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._counter = 0
+        self._overflowed = False
+        self.closed = False
+
+    def offer(self, event_type, data):
+        with self._cond:
+            if self.closed:
+                return
+            if event_type in COALESCED_EVENTS:
+                key = event_type
+                self._pending.pop(key, None)  # Re-queued at the end, after anything it follows
+            else:
+                self._counter += 1
+                key = (event_type, self._counter)
+            self._pending[key] = {"type": event_type, "data": data}
+            if len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+                self._overflowed = True
+            self._cond.notify()
+
+    def next_batch(self, timeout=None, window=0.0):
+        """Pending events, waiting up to timeout for the first; [] on timeout or close.
+
+        Once something arrives, waits a further window seconds so a burst
+        (speech starting, a partial transcript every few hundred ms)
+        goes out as one batch with each snapshot coalesced.
+        """
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(timeout)
+            if not self._pending:
+                return []
+            deadline = time.monotonic() + window
+            while not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            events = list(self._pending.values())
+            self._pending.clear()
+            if self._overflowed:
+                self._overflowed = False
+                events.insert(0, {"type": "resync", "data": {}})
+            return events
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self.bus.unsubscribe(self)
+
+
+class UIEventBus:
+    """Per-session publish/subscribe of the state the interview UI displays"""
+
+    def __init__(self, coalesce_window=0.1, heartbeat_seconds=15, max_pending=200):
+        self.coalesce_window = coalesce_window
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_pending = max_pending
+        self._subscribers = {}  # session id -> set of Subscription
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, session_id):
+        subscription = Subscription(self, session_id, max_pending=self.max_pending)
+        with self._lock:
+            self._subscribers.setdefault(session_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.session_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.session_id]
+
+    def publish(self, session_id, event_type, data):
+        """Queue an event for every subscriber of the session; free when nobody is listening"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(session_id, ()))
+            if subscribers:
+                self.published += 1
+        for subscription in subscribers:
+            subscription.offer(event_type, data)
+
+    def close_session(self, session_id):
+        """End every stream open on a session (it was removed or evicted)"""
+        with self._lock:
+            subscribers = list(self._subscribers.pop(session_id, ()))
+        for subscription in subscribers:
+            subscription.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._subscribers),
+                "subscribers": sum(len(s) for s in self._subscribers.values()),
+                "published": self.published
+            }
+
+
+_shared_bus = None
+_shared_bus_lock = threading.Lock()
+
+
+def get_ui_event_bus(settings=None):
+    """Process-wide bus; settings come from the "ui_events" config section"""
+    global _shared_bus
+    with _shared_bus_lock:
+        if _shared_bus is None:
+            settings = settings or {}
+            _shared_bus = UIEventBus(
+                coalesce_window=settings.get("coalesce_ms", 100) / 1000,
+                heartbeat_seconds=settings.get("heartbeat_seconds", 15),
+                max_pending=settings.get("max_pending", 200)
+            )
+        return _shared_bus
@@ -0,0 +1,118 @@
+# vision_models.py
+
+import os
+import threading
+import time
+
+import cv2
+
+HAAR_CASCADES = {
+    "face": "haarcascade_frontalface_default.xml",
+    "eye": "haarcascade_eye.xml",
+}
+
+
+class CascadeHandle:
+    """Thread-safe stand-in for cv2.CascadeClassifier.
+
+    detectMultiScale is not safe to call concurrently on one classifier, so each
+    thread gets its own clone, deserialized from the in-memory XML the registry
+    read once (no disk access after the first load).
+    """
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+        self._local = threading.local()
+
+    def _classifier(self):
+        classifier = getattr(self._local, "classifier", None)
+        if classifier is None:
+            classifier = self.registry.clone(self.name)
+            self._local.classifier = classifier
+        return classifier
+
+    def detectMultiScale(self, image, *args, **kwargs):
+        return self._classifier().detectMultiScale(image, *args, **kwargs)
+
+    def empty(self):
+        return self._classifier().empty()
+
+
+class VisionModelRegistry:
+    """Loads each vision model once per process and hands out shared detector handles"""
+
+    def __init__(self, cascades=None, cascade_dir=None):
+        self.cascades = dict(HAAR_CASCADES if cascades is None else cascades)
+        self.cascade_dir = cascade_dir or cv2.data.haarcascades
+        self._xml = {}      # name -> cascade XML text
+        self._handles = {}  # name -> CascadeHandle
+        self._lock = threading.Lock()
+        self.load_seconds = {}
+        self.clones = 0
+
+    def _load_locked(self, name):
+        if name in self._xml:
+            return
+        if name not in self.cascades:
+            raise KeyError(f"Unknown vision model: {name}")
+        start = time.perf_counter()
+        with open(os.path.join(self.cascade_dir, self.cascades[name])) as f:
+            xml = f.read()
+        # Parse once up front so a bad file fails here rather than on a monitor thread
+        if self._parse(xml).empty():
+            raise RuntimeError(f"Could not load cascade {self.cascades[name]}")
+        self._xml[name] = xml
+        self.load_seconds[name] = time.perf_counter() - start
+        print(f"[Vision] Loaded {name} cascade in {self.load_seconds[name] * 1000:.1f} ms")
+
+    @staticmethod
+    def _parse(xml):
+        storage = cv2.FileStorage(xml, cv2.FILE_STORAGE_READ | cv2.FILE_STORAGE_MEMORY)
+        classifier = cv2.CascadeClassifier()
+        classifier.read(storage.getFirstTopLevelNode())
+        storage.release()
+        return classifier
+
+    def warm(self, names=None):
+        """Load models ahead of time (e.g. at server start) so sessions never pay for it"""
+        with self._lock:
+            for name in names or self.cascades:
+                self._load_locked(name)
+
+    def clone(self, name):
+        """Fresh classifier for one thread, built from the cached XML"""
+        with self._lock:
+            self._load_locked(name)
+            xml = self._xml[name]
+            self.clones += 1
+        return self._parse(xml)
+
+    def detector(self, name):
+        with self._lock:
+            self._load_locked(name)
+            if name not in self._handles:
+                self._handles[name] = CascadeHandle(self, name)
+            return self._handles[name]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": sorted(self._xml),
+                "load_ms": {name: round(seconds * 1000, 2) for name, seconds in self.load_seconds.items()},
+                "clones": self.clones
+            }
+
+
+_shared_registry = None
+_shared_registry_lock = threading.Lock()
+
+
+def get_vision_registry(settings=None):
+    """Process-wide registry: cascade files are read once and shared by every interviewer"""
+    global _shared_registry
+    with _shared_registry_lock:
+        if _shared_registry is None:
+            settings = settings or {}
+            _shared_registry = VisionModelRegistry(cascade_dir=settings.get("cascade_dir"))
+        return _shared_registry
@@ -2,45 +2,87 @@ import asyncio
 import websockets
 import json
 import threading
+import uuid
 from backend import ExpertTechnicalInterviewer
+from frame_ingest import decode_frame, FrameDecodeError
 
 class WebSocketInterviewServer:
     def __init__(self):
         self.interviewer = None
         self.connected_clients = set()
+        self.runs = {}  # run_id -> (websocket, RunHandle)
         
     async def handle_client(self, websocket, path):
         self.connected_clients.add(websocket)
         try:
             async for message in websocket:
+                if isinstance(message, bytes):
+                    # Binary messages are camera frames (JPEG/WebP)
+                    await self.handle_frame(websocket, message)
+                    continue
                 data = json.loads(message)
                 await self.handle_message(websocket, data)
         except websockets.exceptions.ConnectionClosed:
             pass
         finally:
             self.connected_clients.remove(websocket)
+            # Nobody is left to read the output
+            self.cancel_runs(websocket)
     
+    async def handle_frame(self, websocket, payload):
+        if not self.interviewer:
+            await self.send_message(websocket, {'type': 'error', 'error': 'No interviewer session active'})
+            return
+        frame_settings = self.interviewer.config.get("frames", {})
+        try:
+            frame = decode_frame(
+                payload,
+                scale=frame_settings.get("decode_scale", 1),
+                max_bytes=frame_settings.get("max_bytes", 512 * 1024)
+            )
+        except FrameDecodeError as e:
+            await self.send_message(websocket, {'type': 'error', 'error': str(e)})
+            return
+        accepted = self.interviewer.submit_frame(frame)
+        await self.send_message(websocket, {
+            'type': 'frame_ack',
+            'accepted': accepted,
+            'sample_interval_ms': self.interviewer.frame_sample_interval_ms()
+        })
+
     async def handle_message(self, websocket, data):
         message_type = data.get('type')
         
         if message_type == 'start_interview':
             # Initialize interviewer
             self.interviewer = ExpertTechnicalInterviewer()
+            # Partial transcripts arrive on the listening thread; hop onto this loop to push them,
+            # only to the client whose interview (and microphone) this is
+            loop = asyncio.get_running_loop()
+            self.interviewer.partial_transcript_listeners.append(
+                lambda text: asyncio.run_coroutine_threadsafe(
+                    self.send_partial(websocket, text), loop
+                )
+            )
             await self.send_message(websocket, {
                 'type': 'interview_started',
                 'status': 'Interview initialized'
             })
             
+        elif message_type == 'focus_event':
+            # visibilitychange / blur / focus from the browser
+            if self.interviewer and hasattr(self.interviewer.focus_source, 'push'):
+                await asyncio.to_thread(self.interviewer.focus_source.push, data.get('event'), data.get('detail'))
+
         elif message_type == 'run_code':
-            # Execute code using your existing method
-            result = self.interviewer._execute_code(
-                data['language'], 
-                self.create_temp_file(data['code'], data['language'])
-            )
-            await self.send_message(websocket, {
-                'type': 'code_result',
-                'output': result
-            })
+            if not self.interviewer:
+                await self.send_message(websocket, {'type': 'error', 'error': 'No interviewer session active'})
+                return
+            # Returns at once: output is streamed by a task, so cancel_run can arrive while it runs
+            self.start_run(websocket, data.get('run_id') or uuid.uuid4().hex, data)
+
+        elif message_type == 'cancel_run':
+            self.cancel_runs(websocket, data.get('run_id'))
             
         elif message_type == 'submit_solution':
             # Use your existing solution evaluation
@@ -62,16 +104,53 @@ class WebSocketInterviewServer:
                 'text': response
             })
     
+    def start_run(self, websocket, run_id, data):
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        # Output arrives on the runner's thread; hand it to this loop in order, then a None once the run ends
+        handle = self.interviewer.stream_code(
+            data['language'], data['code'],
+            lambda stream, text: loop.call_soon_threadsafe(chunks.put_nowait, (stream, text)),
+            data.get('stdin')
+        )
+        handle.future.add_done_callback(lambda f: loop.call_soon_threadsafe(chunks.put_nowait, None))
+        self.runs[run_id] = (websocket, handle)
+        asyncio.create_task(self.stream_run(websocket, run_id, handle, chunks))
+
+    async def stream_run(self, websocket, run_id, handle, chunks):
+        try:
+            await self.send_message(websocket, {'type': 'run_started', 'run_id': run_id})
+            while True:
+                item = await chunks.get()
+                if item is None:
+                    break
+                stream, text = item
+                await self.send_message(websocket, {'type': 'run_output', 'run_id': run_id, 'stream': stream, 'data': text})
+            if handle.future.cancelled():
+                message = {'type': 'code_result', 'run_id': run_id, 'output': "Run cancelled.", 'cancelled': True}
+            else:
+                result = handle.future.result()
+                message = {'type': 'code_result', 'run_id': run_id, 'output': result.format(), **result.to_dict()}
+            await self.send_message(websocket, message)
+        except websockets.exceptions.ConnectionClosed:
+            handle.cancel()
+        finally:
+            self.runs.pop(run_id, None)
+
+    def cancel_runs(self, websocket, run_id=None):
+        """Kill this client's run (all of them if run_id is None)"""
+        for key, (owner, handle) in list(self.runs.items()):
+            if owner is websocket and run_id in (None, key):
+                handle.cancel()
+
     async def send_message(self, websocket, message):
         await websocket.send(json.dumps(message))
-    
-    def create_temp_file(self, code, language):
-        # Use your existing temp file creation logic
-        import tempfile
-        extension = self.interviewer._get_file_extension(language)
-        with tempfile.NamedTemporaryFile(mode='w', suffix=extension, delete=False) as f:
-            f.write(code)
-            return f.name
+
+    async def send_partial(self, websocket, text):
+        try:
+            await self.send_message(websocket, {'type': 'partial_transcript', 'text': text})
+        except websockets.exceptions.ConnectionClosed:
+            pass
 
 # Start the WebSocket server
 server = WebSocketInterviewServer()